@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Content-addressed backup store
+
+Backups saved by the migration scripts are split into records (list items or
+dict values), each stored once as a blob named by the SHA-256 of its canonical
+JSON. String values of BLOB_MIN_BYTES or more (notebook sources, large
+definitions) become blobs of their own, so identical content is stored once
+across runs, paths and object types. Each save writes a small manifest listing
+the blob hashes: a rehearsal that finds most objects unchanged writes only the
+changed records and the manifest. A SQLite index of blobs and manifest
+references answers existence checks and garbage collection without scanning
+the blob directories; only --gc walks them, for files a failed save left
+outside the index.
+
+Settings (migration_settings in config.json):
+  - backup_store_path:      store directory; when unset, backups are written as
+                            backup_<type>_<timestamp>.json files (default: unset)
+  - backup_retention_runs:  manifests kept per object type; older ones are removed
+                            with the blobs only they referenced (default: 10)
+
+Usage:
+    python backup_store.py --info
+    python backup_store.py --list --type notebooks
+    python backup_store.py --restore notebooks_20260108_103000 --output backup_notebooks.json
+    python backup_store.py --gc
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from utils import load_config, setup_logging, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_RUNS = 10
+
+# Strings at least this long are stored as separate blobs instead of inside their record
+BLOB_MIN_BYTES = 1024
+
+# Marker replacing an externalized string inside a stored record
+BLOB_REF = "$blob"
+
+# Blobs smaller than this live in the index database rather than as files, which would each take a
+# filesystem block and a file creation
+INLINE_BLOB_BYTES = 4096
+
+INDEX_FILE = "index.db"
+
+# Digests looked up in the index per query while saving
+LOOKUP_BATCH = 500
+
+# Blob files the index does not know are only swept once this old, as younger ones may belong to a save
+# that has not committed yet
+ORPHAN_FILE_MIN_AGE = 3600
+
+# Manifest references are kept in the index as concatenated binary digests, one row per manifest
+DIGEST_BYTES = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    data BLOB
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    name TEXT PRIMARY KEY,
+    object_type TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    record_count INTEGER NOT NULL,
+    logical_bytes INTEGER NOT NULL,
+    written_bytes INTEGER NOT NULL,
+    refs BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS manifests_by_type ON manifests (object_type, created_at);
+"""
+
+_settings = None
+
+def configure_backup_store(config: Dict[str, Any]):
+    """Set backup store settings from a loaded configuration"""
+    global _settings
+    migration_settings = config.get('migration_settings', {})
+    _settings = {
+        "path": migration_settings.get('backup_store_path'),
+        "retention_runs": migration_settings.get('backup_retention_runs', DEFAULT_RETENTION_RUNS),
+    }
+
+def get_settings() -> Dict[str, Any]:
+    """Backup store settings (read from config.json on first use unless configured)"""
+    if _settings is None:
+        try:
+            configure_backup_store(load_config())
+        except (FileNotFoundError, json.JSONDecodeError):
+            configure_backup_store({})
+    return _settings
+
+def canonical_json(value: Any) -> bytes:
+    """Stable encoding used for record blobs, so equal records hash equally"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+class BackupStore:
+    """Blobs keyed by SHA-256 (small ones in the index, others under blobs/), one manifest per
+    saved backup under manifests/"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.blob_dir = os.path.join(path, "blobs")
+        self.manifest_dir = os.path.join(path, "manifests")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(path, INDEX_FILE))
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def _write_blob(self, digest: str, data: bytes):
+        path = self.blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def read_blob(self, digest: str) -> bytes:
+        row = self.conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is not None and row[0] is not None:
+            return row[0]
+        with open(self.blob_path(digest), 'rb') as f:
+            return f.read()
+
+    def save(self, data: Any, object_type: str) -> str:
+        """Store a backup and return its manifest name; only blobs missing from the index are written"""
+        created_at = time.time()
+        name = base_name = f"{object_type}_{datetime.fromtimestamp(created_at).strftime('%Y%m%d_%H%M%S')}"
+        suffix = 1
+        while self._name_taken(name):
+            suffix += 1
+            name = f"{base_name}_{suffix}"
+
+        referenced = {}
+        pending = {}
+        new_blobs = []
+
+        def flush():
+            placeholders = ",".join("?" * len(pending))
+            known = {digest for digest, in self.conn.execute(
+                f"SELECT hash FROM blobs WHERE hash IN ({placeholders})", list(pending))}
+            for digest, blob in pending.items():
+                if digest not in known:
+                    inline = len(blob) < INLINE_BLOB_BYTES
+                    if not inline:
+                        self._write_blob(digest, blob)
+                    new_blobs.append((digest, len(blob), created_at, blob if inline else None))
+            pending.clear()
+
+        def put(blob: bytes) -> str:
+            digest = hashlib.sha256(blob).hexdigest()
+            if digest in referenced:
+                return digest
+            referenced[digest] = len(blob)
+            pending[digest] = blob
+            if len(pending) >= LOOKUP_BATCH:
+                flush()
+            return digest
+
+        def pack(value: Any) -> Any:
+            if isinstance(value, str) and len(value) >= BLOB_MIN_BYTES:
+                return {BLOB_REF: put(value.encode())}
+            if isinstance(value, dict):
+                return {key: pack(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [pack(item) for item in value]
+            return value
+
+        def put_record(record: Any) -> str:
+            return put(canonical_json(pack(record)))
+
+        if isinstance(data, list):
+            root = {"list": [put_record(record) for record in data]}
+        elif isinstance(data, dict):
+            root = {"dict": {key: put_record(record) for key, record in data.items()}}
+        else:
+            root = {"value": put_record(data)}
+        if pending:
+            flush()
+
+        record_count = len(data) if isinstance(data, (list, dict)) else 1
+        written_bytes = sum(size for _, size, _, _ in new_blobs)
+        manifest = {"name": name, "object_type": object_type, "created_at": created_at, "root": root}
+        write_json_atomic(os.path.join(self.manifest_dir, f"{name}.json"), manifest, indent=None)
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)", new_blobs)
+            self.conn.execute("INSERT INTO manifests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (name, object_type, created_at, record_count, sum(referenced.values()), written_bytes,
+                               b"".join(bytes.fromhex(digest) for digest in referenced)))
+        logger.info(f"Backup saved to {self.path} as {name}: {record_count} records, "
+                    f"{len(new_blobs)} new blobs ({written_bytes / 1024:.0f} KB written)")
+        return name
+
+    def _name_taken(self, name: str) -> bool:
+        """Whether a manifest of this name is indexed or has a file (the two can disagree after a failed save
+        or a manual deletion)"""
+        if os.path.exists(os.path.join(self.manifest_dir, f"{name}.json")):
+            return True
+        return self.conn.execute("SELECT 1 FROM manifests WHERE name = ?", (name,)).fetchone() is not None
+
+    def load(self, name: str) -> Any:
+        """Rebuild the data of a stored backup"""
+        with open(os.path.join(self.manifest_dir, f"{name}.json")) as f:
+            root = json.load(f)["root"]
+
+        def unpack(value: Any) -> Any:
+            if isinstance(value, dict):
+                if len(value) == 1 and BLOB_REF in value:
+                    return self.read_blob(value[BLOB_REF]).decode()
+                return {key: unpack(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [unpack(item) for item in value]
+            return value
+
+        def load_record(digest: str) -> Any:
+            return unpack(json.loads(self.read_blob(digest)))
+
+        if "list" in root:
+            return [load_record(digest) for digest in root["list"]]
+        if "dict" in root:
+            return {key: load_record(digest) for key, digest in root["dict"].items()}
+        return load_record(root["value"])
+
+    def manifests(self, object_type: str = None) -> List[tuple]:
+        """(name, object_type, created_at, record_count, logical_bytes, written_bytes), newest first"""
+        query = "SELECT name, object_type, created_at, record_count, logical_bytes, written_bytes FROM manifests"
+        params = ()
+        if object_type:
+            query += " WHERE object_type = ?"
+            params = (object_type,)
+        return self.conn.execute(query + " ORDER BY created_at DESC", params).fetchall()
+
+    def latest(self, object_type: str) -> Optional[str]:
+        """Name of the newest manifest of an object type"""
+        rows = self.manifests(object_type)
+        return rows[0][0] if rows else None
+
+    def _unindexed_files(self, older_than: float) -> List[tuple]:
+        """(path, size) of files under blobs/ that no index row points to, such as blobs written by a save
+        that failed before its index commit, or temporary files left by an interrupted write"""
+        files = []
+        for directory, _, names in os.walk(self.blob_dir):
+            for file_name in names:
+                path = os.path.join(directory, file_name)
+                stat = os.stat(path)
+                if stat.st_mtime >= older_than:
+                    continue
+                indexed = self.conn.execute("SELECT 1 FROM blobs WHERE hash = ? AND data IS NULL",
+                                            (file_name,)).fetchone()
+                if indexed is None:
+                    files.append((path, stat.st_size))
+        return files
+
+    def collect_garbage(self, retention_runs: int, sweep: bool = False) -> tuple:
+        """Drop all but the newest retention_runs manifests per object type, then every blob no
+        remaining manifest references; returns (manifests removed, blobs removed, bytes freed)
+
+        Blobs are only swept when manifests were dropped, unless sweep is set, which also removes blob
+        files missing from the index."""
+        expired = self.conn.execute(
+            "SELECT name FROM (SELECT name, ROW_NUMBER() OVER "
+            "(PARTITION BY object_type ORDER BY created_at DESC) AS position FROM manifests) "
+            "WHERE position > ?", (retention_runs,)).fetchall()
+        expired = [name for name, in expired]
+        if not expired and not sweep:
+            return 0, 0, 0
+        with self.conn:
+            self.conn.executemany("DELETE FROM manifests WHERE name = ?", ((name,) for name in expired))
+            live = set()
+            for refs, in self.conn.execute("SELECT refs FROM manifests"):
+                live.update(refs[i:i + DIGEST_BYTES].hex() for i in range(0, len(refs), DIGEST_BYTES))
+            orphans = [row for row in self.conn.execute("SELECT hash, size, data IS NULL FROM blobs")
+                       if row[0] not in live]
+            self.conn.executemany("DELETE FROM blobs WHERE hash = ?", ((digest,) for digest, _, _ in orphans))
+        for name in expired:
+            path = os.path.join(self.manifest_dir, f"{name}.json")
+            if os.path.exists(path):
+                os.remove(path)
+        for digest, _, in_file in orphans:
+            path = self.blob_path(digest)
+            if in_file and os.path.exists(path):
+                os.remove(path)
+        unindexed = self._unindexed_files(time.time() - ORPHAN_FILE_MIN_AGE) if sweep else []
+        for path, _ in unindexed:
+            os.remove(path)
+        return (len(expired), len(orphans) + len(unindexed),
+                sum(size for _, size, _ in orphans) + sum(size for _, size in unindexed))
+
+    def info(self) -> Dict[str, int]:
+        """Blob count, stored bytes and the logical bytes of the retained manifests"""
+        blob_count, stored_bytes = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        manifest_count, logical_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(logical_bytes), 0) FROM manifests").fetchone()
+        return {"manifests": manifest_count, "blobs": blob_count, "stored_bytes": stored_bytes,
+                "logical_bytes": logical_bytes}
+
+def save_to_store(data: Any, object_type: str) -> Optional[str]:
+    """Save a backup into the configured store and apply retention; None when no store is configured"""
+    settings = get_settings()
+    if not settings["path"]:
+        return None
+    with BackupStore(settings["path"]) as store:
+        name = store.save(data, object_type)
+        manifests, blobs, freed = store.collect_garbage(settings["retention_runs"])
+        if manifests:
+            logger.info(f"Removed {manifests} old backup manifests and {blobs} unreferenced blobs "
+                        f"({freed / 1024:.0f} KB)")
+    return name
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect, restore and clean up the content-addressed backup store')
+    parser.add_argument('--info', action='store_true', help='Show store size and deduplication')
+    parser.add_argument('--list', action='store_true', help='List stored backups, newest first')
+    parser.add_argument('--type', help='Object type for --list, or --restore of its latest backup')
+    parser.add_argument('--restore', metavar='MANIFEST', nargs='?', const='',
+                        help='Write a stored backup back out as JSON (default: latest of --type)')
+    parser.add_argument('--output', metavar='PATH', help='File for --restore (default: backup_<manifest>.json)')
+    parser.add_argument('--gc', action='store_true', help='Apply backup_retention_runs and delete unreferenced blobs')
+    args = parser.parse_args()
+
+    config = load_config()
+    setup_logging(config)
+    configure_backup_store(config)
+    settings = get_settings()
+    if not settings["path"]:
+        logger.error("No backup store configured (migration_settings.backup_store_path)")
+        return 1
+
+    with BackupStore(settings["path"]) as store:
+        if args.list:
+            for name, object_type, created_at, records, logical, written in store.manifests(args.type):
+                logger.info(f"{name}: {records} records, {logical / 1024:.0f} KB "
+                            f"({written / 1024:.0f} KB written)")
+        if args.restore is not None:
+            name = args.restore or (args.type and store.latest(args.type))
+            if not name:
+                logger.error("Give a manifest name or --type to restore")
+                return 1
+            output = args.output or f"backup_{name}.json"
+            write_json_atomic(output, store.load(name))
+            logger.info(f"Restored {name} to {output}")
+        if args.gc:
+            manifests, blobs, freed = store.collect_garbage(settings["retention_runs"], sweep=True)
+            logger.info(f"Removed {manifests} manifests and {blobs} blobs ({freed / 1024:.0f} KB)")
+        if args.info or not (args.list or args.restore is not None or args.gc):
+            info = store.info()
+            ratio = info["logical_bytes"] / info["stored_bytes"] if info["stored_bytes"] else 0
+            logger.info(f"{settings['path']}: {info['manifests']} manifests, {info['blobs']} blobs, "
+                        f"{info['stored_bytes'] / 1024:.0f} KB stored for {info['logical_bytes'] / 1024:.0f} KB "
+                        f"of backups ({ratio:.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1419 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Databricks REST endpoints used by the migration scripts
+
+Serves an in-memory workspace (optionally pre-populated with synthetic objects)
+with configurable latency, rate limiting and 429 injection, so the toolkit can
+be exercised and benchmarked without a real workspace.
+
+Usage:
+    python benchmarks/mock_databricks_server.py --port 8800 --notebooks 100000
+"""
+import argparse
+import base64
+import email.parser
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+LANGUAGE_EXTENSIONS = {"PYTHON": "py", "SQL": "sql", "SCALA": "scala", "R": "r"}
+COMMENT_PREFIX = {"PYTHON": "#", "SQL": "--", "SCALA": "//", "R": "#"}
+
+class ApiError(Exception):
+    """Error returned to the client in the Databricks error format"""
+
+    def __init__(self, status: int, error_code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+        self.message = message
+
+class RawResponse:
+    """Non-JSON response body (used for direct_download exports)"""
+
+    def __init__(self, body: bytes, content_type: str = "application/octet-stream"):
+        self.body = body
+        self.content_type = content_type
+
+class MockWorkspace:
+    """In-memory state of a single Databricks workspace"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._ids = itertools.count(1000)
+        self.objects = {"/": {"path": "/", "object_type": "DIRECTORY", "object_id": 0}}
+        self.children = {"/": set()}
+        self.contents = {}
+        self.jobs = {}
+        self.clusters = {}
+        self.libraries = {}
+        self.policies = {}
+        self.instance_pools = {}
+        self.warehouses = {}
+        self.warehouse_polls = Counter()
+        self.warehouse_quota = 0
+        self.warehouse_stockouts = 0
+        self.stocked_out_warehouses = set()
+        self.standard_tier = False
+        self.queries = {}
+        self.alerts = {}
+        self.dashboards = {}
+        self.permissions = {}
+        self.uc = {collection: {} for collection in UC_COLLECTIONS}
+        self.uc_grants = {}
+        self.scopes = {}
+        self.repos = {}
+        self.groups = {}
+        self.users = {}
+        self.created = Counter()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    # Workspace tree
+
+    def add_object(self, path: str, object_type: str, language: str = None, content: bytes = None):
+        parent = path.rsplit('/', 1)[0] or "/"
+        if parent not in self.objects:
+            raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Path ({parent}) doesn't exist.")
+        if self.objects[parent]["object_type"] != "DIRECTORY":
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Parent {parent} is not a directory")
+        obj = {"path": path, "object_type": object_type, "object_id": self.next_id()}
+        if object_type != "DIRECTORY":
+            obj["created_at"] = obj["modified_at"] = int(time.time() * 1000)
+        if language:
+            obj["language"] = language
+        self.objects[path] = obj
+        self.children[parent].add(path)
+        if object_type == "DIRECTORY":
+            self.children.setdefault(path, set())
+        if content is not None:
+            self.contents[path] = content
+        return obj
+
+    def mkdirs(self, path: str):
+        current = ""
+        for part in [p for p in path.split('/') if p]:
+            current = f"{current}/{part}"
+            existing = self.objects.get(current)
+            if existing is None:
+                self.add_object(current, "DIRECTORY")
+                self.created["directories"] += 1
+            elif existing["object_type"] != "DIRECTORY":
+                raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"{current} already exists and is not a directory")
+
+    def notebook_source(self, path: str) -> bytes:
+        if path in self.contents:
+            return self.contents[path]
+        if self.objects[path]["object_type"] == "FILE":
+            line = f"synthetic file {path}\n".encode()
+            size = self.objects[path]["size"]
+            return (line * (size // len(line) + 1))[:size]
+        language = self.objects[path].get("language", "PYTHON")
+        prefix = COMMENT_PREFIX[language]
+        return (f"{prefix} Databricks notebook source\n"
+                f"{prefix} synthetic notebook {path}\n"
+                f"{prefix} MAGIC %run {path.rsplit('/', 1)[0]}/setup\n").encode()
+
+class SyntheticSpec:
+    """Object counts for a generated source workspace"""
+
+    def __init__(self, notebooks=1000, notebooks_per_folder=50, folders_per_user=4,
+                 jobs=100, clusters=20, policies=5, instance_pools=3, warehouses=5, queries=12, scopes=10,
+                 secrets_per_scope=5, repos=20, groups=20, members_per_group=10, catalogs=3,
+                 schemas_per_catalog=4, volumes_per_schema=2, files=50, file_size_kb=64, seed=42):
+        self.notebooks = notebooks
+        self.notebooks_per_folder = notebooks_per_folder
+        self.folders_per_user = folders_per_user
+        self.jobs = jobs
+        self.clusters = clusters
+        self.policies = policies
+        self.instance_pools = instance_pools
+        self.warehouses = warehouses
+        self.queries = queries
+        self.scopes = scopes
+        self.secrets_per_scope = secrets_per_scope
+        self.repos = repos
+        self.groups = groups
+        self.members_per_group = members_per_group
+        self.catalogs = catalogs
+        self.schemas_per_catalog = schemas_per_catalog
+        self.volumes_per_schema = volumes_per_schema
+        self.files = files
+        self.file_size_kb = file_size_kb
+        self.seed = seed
+
+def _branch_head(url: str, ref: str) -> str:
+    """Deterministic head commit of a branch or tag in a synthetic Git remote"""
+    return hashlib.sha1(f"{url}@{ref}".encode()).hexdigest()
+
+def populate(ws: MockWorkspace, spec: SyntheticSpec):
+    """Fill a workspace with deterministic synthetic objects"""
+    rng = random.Random(spec.seed)
+    languages = list(LANGUAGE_EXTENSIONS)
+    now = int(time.time() * 1000)
+
+    ws.mkdirs("/Users")
+    ws.mkdirs("/Shared")
+    notebooks_per_user = spec.notebooks_per_folder * spec.folders_per_user
+    user_count = max(1, -(-spec.notebooks // notebooks_per_user))
+    users = [f"user{i}@example.com" for i in range(user_count)]
+    notebook_paths = []
+    for i in range(spec.notebooks):
+        user = users[i // notebooks_per_user]
+        folder = (i % notebooks_per_user) // spec.notebooks_per_folder
+        directory = f"/Users/{user}/project{folder}"
+        if directory not in ws.objects:
+            ws.mkdirs(directory)
+        path = f"{directory}/notebook{i}"
+        ws.add_object(path, "NOTEBOOK", language=languages[i % len(languages)])
+        notebook_paths.append(path)
+
+    for i in range(spec.files):
+        directory = f"/Users/{users[i % len(users)]}/project0"
+        ws.mkdirs(directory)
+        obj = ws.add_object(f"{directory}/data{i}.{('csv', 'json', 'py')[i % 3]}", "FILE")
+        # Every 10th file is ten times larger
+        obj["size"] = spec.file_size_kb * 1024 * (10 if i % 10 == 0 else 1)
+
+    for user in users:
+        ws.users[user] = {"id": str(ws.next_id()), "userName": user, "active": True}
+
+    for i in range(spec.groups):
+        members = rng.sample(users, min(spec.members_per_group, len(users)))
+        ws.groups[f"group{i}"] = [{"user_name": m} for m in members]
+
+    policy_ids = []
+    for i in range(spec.policies):
+        policy_id = f"POLICY{i:06d}"
+        policy_ids.append(policy_id)
+        ws.policies[policy_id] = {
+            "policy_id": policy_id,
+            "name": f"policy-{i}",
+            "definition": json.dumps({"spark_version": {"type": "unlimited"}}),
+            "description": f"Synthetic policy {i}",
+            "created_at_timestamp": now,
+            "is_default": i == 0,
+        }
+
+    pool_ids = []
+    for i in range(spec.instance_pools):
+        pool_id = f"{i:04d}-000000-pool{i}"
+        pool_ids.append(pool_id)
+        ws.instance_pools[pool_id] = {
+            "instance_pool_id": pool_id,
+            "instance_pool_name": f"pool-{i}",
+            "node_type_id": "Standard_DS3_v2",
+            "min_idle_instances": i % 3,
+            "max_capacity": 10 * (i + 1),
+            "idle_instance_autotermination_minutes": 30,
+            "preloaded_spark_versions": ["13.3.x-scala2.12"],
+            "custom_tags": {"team": f"team{i % 5}"},
+            "state": "ACTIVE",
+            "default_tags": {"DatabricksInstancePoolId": pool_id},
+        }
+
+    cluster_ids = []
+    for i in range(spec.clusters):
+        cluster_id = f"{i:04d}-000000-cluster{i}"
+        cluster_ids.append(cluster_id)
+        cluster = {
+            "cluster_id": cluster_id,
+            "cluster_name": f"cluster-{i}",
+            "spark_version": "13.3.x-scala2.12",
+            "node_type_id": "Standard_DS3_v2",
+            "num_workers": 1 + i % 4,
+            "autotermination_minutes": 60,
+            "spark_conf": {"spark.speculation": "true"},
+            "custom_tags": {"team": f"team{i % 5}"},
+            "cluster_source": "UI",
+            "state": "TERMINATED",
+            "creator_user_name": users[i % len(users)],
+            "start_time": now,
+        }
+        if policy_ids and i % 2:
+            cluster["policy_id"] = policy_ids[i % len(policy_ids)]
+        if pool_ids and i % 4 == 0:
+            cluster["instance_pool_id"] = pool_ids[(i // 4) % len(pool_ids)]
+        ws.clusters[cluster_id] = cluster
+        ws.libraries[cluster_id] = [
+            {"library": {"pypi": {"package": f"pandas=={1 + i % 2}.5.0"}}, "status": "INSTALLED"},
+            {"library": {"maven": {"coordinates": "com.example:connector:1.0"}}, "status": "INSTALLED"},
+            {"library": {"whl": f"/Workspace/Shared/libs/team{i % 5}-0.1-py3-none-any.whl"}, "status": "INSTALLED"},
+        ]
+        if i % 5 == 0:
+            ws.libraries[cluster_id].append(
+                {"library": {"pypi": {"package": "does-not-exist==9.9"}}, "status": "FAILED",
+                 "messages": ["Library installation failed: no matching distribution"]})
+        elif i % 5 == 2:
+            ws.libraries[cluster_id].append(
+                {"library": {"jar": "dbfs:/FileStore/jars/legacy-udfs.jar"}, "status": "UNINSTALL_ON_RESTART"})
+
+    for i in range(spec.warehouses):
+        warehouse_id = f"wh{i:012d}"
+        ws.warehouses[warehouse_id] = {
+            "id": warehouse_id,
+            "name": f"warehouse-{i}",
+            "cluster_size": ["2X-Small", "Small", "Medium"][i % 3],
+            "min_num_clusters": 1,
+            "max_num_clusters": 1 + i % 3,
+            "auto_stop_mins": 30,
+            "enable_photon": True,
+            "warehouse_type": "PRO",
+            "state": "STOPPED",
+            "creator_name": users[i % len(users)],
+        }
+
+    query_ids = []
+    for i in range(spec.queries if spec.warehouses else 0):
+        query_id = f"q{ws.next_id()}"
+        query_ids.append(query_id)
+        parameters = []
+        if i % 4 == 3:
+            # Query-based dropdown parameter backed by an earlier query
+            parameters.append({"name": "region", "type": "query", "queryId": query_ids[0]})
+        ws.queries[query_id] = {
+            "id": query_id,
+            "name": f"query-{i}",
+            "description": f"Synthetic query {i}",
+            "query": f"SELECT * FROM sales WHERE id > {i}",
+            "data_source_id": f"ds-wh{i % spec.warehouses:012d}",
+            "options": {"parameters": parameters},
+            "tags": [f"team{i % 5}"],
+            "user": {"email": users[i % len(users)]},
+            "visualizations": [
+                {"id": f"v{ws.next_id()}", "type": "TABLE", "name": "Table", "options": {}},
+                {"id": f"v{ws.next_id()}", "type": "CHART", "name": f"Chart {i}",
+                 "options": {"globalSeriesType": "line"}},
+            ],
+        }
+
+    for i in range(len(query_ids) // 2):
+        alert_id = f"a{ws.next_id()}"
+        ws.alerts[alert_id] = {
+            "id": alert_id,
+            "name": f"alert-{i}",
+            "query": {"id": query_ids[i * 2], "name": ws.queries[query_ids[i * 2]]["name"]},
+            "options": {"column": "id", "op": ">", "value": 100},
+            "rearm": 3600 if i % 2 else None,
+            "state": "unknown",
+        }
+
+    for i in range(len(query_ids) // 4):
+        dashboard_id = f"d{ws.next_id()}"
+        widgets = [{"id": f"w{ws.next_id()}", "text": f"# Dashboard {i}", "width": 1,
+                    "options": {"position": {"col": 0, "row": 0, "sizeX": 6, "sizeY": 2}}}]
+        for k, query_id in enumerate(query_ids[i * 4:i * 4 + 4]):
+            visualization = ws.queries[query_id]["visualizations"][1]
+            widgets.append({"id": f"w{ws.next_id()}", "visualization": visualization, "width": 1,
+                            "options": {"position": {"col": 3 * (k % 2), "row": 2 + k // 2, "sizeX": 3, "sizeY": 8}}})
+        ws.dashboards[dashboard_id] = {
+            "id": dashboard_id,
+            "name": f"dashboard-{i}",
+            "tags": ["synthetic"],
+            "dashboard_filters_enabled": bool(i % 2),
+            "widgets": widgets,
+        }
+
+    for i in range(spec.scopes):
+        ws.scopes[f"scope{i}"] = {
+            "backend_type": "DATABRICKS",
+            "secrets": {f"key{k}": f"value-{i}-{k}" for k in range(spec.secrets_per_scope)},
+            "acls": {"users": "READ"},
+        }
+
+    for i in range(spec.repos):
+        repo_id = ws.next_id()
+        path = f"/Repos/{users[i % len(users)]}/repo{i}"
+        ws.repos[repo_id] = {
+            "id": repo_id,
+            "path": path,
+            "url": f"https://github.com/example/repo{i}.git",
+            "provider": "gitHub",
+            "branch": "main" if i % 3 else "develop",
+        }
+        # Every 7th repo was checked out before its branch moved on
+        ws.repos[repo_id]["head_commit_id"] = (f"{rng.getrandbits(160):040x}" if i % 7 == 0 else
+                                               _branch_head(ws.repos[repo_id]["url"], ws.repos[repo_id]["branch"]))
+
+    for i in range(spec.jobs):
+        job_id = ws.next_id()
+        notebook = notebook_paths[i % len(notebook_paths)] if notebook_paths else "/Shared/missing"
+        tasks = [{
+            "task_key": "ingest",
+            "notebook_task": {"notebook_path": notebook, "base_parameters": {"run": str(i)}},
+            "job_cluster_key": "main",
+        }, {
+            "task_key": "report",
+            "depends_on": [{"task_key": "ingest"}],
+            "notebook_task": {"notebook_path": notebook},
+        }]
+        if cluster_ids:
+            tasks[1]["existing_cluster_id"] = cluster_ids[i % len(cluster_ids)]
+        ws.jobs[job_id] = {
+            "job_id": job_id,
+            "creator_user_name": users[i % len(users)],
+            "created_time": now,
+            "settings": {
+                "name": f"job-{i}",
+                "max_concurrent_runs": 1,
+                "format": "MULTI_TASK",
+                "job_clusters": [{
+                    "job_cluster_key": "main",
+                    "new_cluster": {"spark_version": "13.3.x-scala2.12",
+                                    "node_type_id": "Standard_DS3_v2", "num_workers": 2},
+                }],
+                "tasks": tasks,
+                "schedule": {"quartz_cron_expression": "0 0 3 * * ?", "timezone_id": "UTC",
+                             "pause_status": "PAUSED"},
+            },
+        }
+        # The cluster of the job's last run still shows up in clusters/list
+        if i % 10 == 0:
+            run_cluster_id = f"{i:04d}-000000-job{job_id}"
+            ws.clusters[run_cluster_id] = {
+                "cluster_id": run_cluster_id,
+                "cluster_name": f"job-{job_id}-run-{i + 1}",
+                "spark_version": "13.3.x-scala2.12",
+                "node_type_id": "Standard_DS3_v2",
+                "num_workers": 2,
+                "cluster_source": "JOB",
+                "state": "TERMINATED",
+                "creator_user_name": users[i % len(users)],
+                "start_time": now,
+            }
+
+    populate_permissions(ws, users)
+    populate_unity_catalog(ws, spec, users)
+
+def populate_permissions(ws: MockWorkspace, users: list):
+    """Direct grants on a sample of the synthetic objects"""
+    groups = sorted(ws.groups) or ["users"]
+    for i, (path, obj) in enumerate(sorted(ws.objects.items())):
+        if obj["object_type"] == "DIRECTORY" and path.count('/') == 3:
+            ws.permissions[("directories", str(obj["object_id"]))] = [
+                {"group_name": groups[i % len(groups)], "permission_level": "CAN_READ"}]
+        elif obj["object_type"] == "NOTEBOOK" and i % 10 == 0:
+            ws.permissions[("notebooks", str(obj["object_id"]))] = [
+                {"user_name": users[i % len(users)], "permission_level": "CAN_EDIT"}]
+        elif obj["object_type"] == "FILE" and i % 10 == 0:
+            ws.permissions[("files", str(obj["object_id"]))] = [
+                {"group_name": groups[i % len(groups)], "permission_level": "CAN_READ"}]
+    for i, cluster in enumerate(ws.clusters.values()):
+        ws.permissions[("clusters", cluster["cluster_id"])] = [
+            {"user_name": cluster["creator_user_name"], "permission_level": "CAN_MANAGE"},
+            {"group_name": groups[i % len(groups)], "permission_level": "CAN_ATTACH_TO"}]
+    for i, policy_id in enumerate(ws.policies):
+        ws.permissions[("cluster-policies", policy_id)] = [
+            {"group_name": groups[i % len(groups)], "permission_level": "CAN_USE"}]
+    for i, pool_id in enumerate(ws.instance_pools):
+        ws.permissions[("instance-pools", pool_id)] = [
+            {"group_name": groups[i % len(groups)], "permission_level": "CAN_ATTACH_TO"}]
+    for i, warehouse in enumerate(ws.warehouses.values()):
+        ws.permissions[("warehouses", warehouse["id"])] = [
+            {"user_name": warehouse["creator_name"], "permission_level": "IS_OWNER"},
+            {"group_name": groups[i % len(groups)], "permission_level": "CAN_USE"}]
+    for i, job in enumerate(ws.jobs.values()):
+        ws.permissions[("jobs", str(job["job_id"]))] = [
+            {"user_name": job["creator_user_name"], "permission_level": "IS_OWNER"},
+            {"group_name": groups[i % len(groups)], "permission_level": "CAN_MANAGE_RUN"}]
+    for repo in ws.repos.values():
+        ws.permissions[("repos", str(repo["id"]))] = [
+            {"user_name": repo["path"].split('/')[2], "permission_level": "CAN_MANAGE"}]
+    for sql_type, sql_objects in (("queries", ws.queries), ("alerts", ws.alerts), ("dashboards", ws.dashboards)):
+        for i, object_id in enumerate(sorted(sql_objects)):
+            ws.permissions[(f"sql/{sql_type}", object_id)] = [
+                {"group_name": groups[i % len(groups)], "permission_level": "CAN_RUN"}]
+
+def populate_unity_catalog(ws: MockWorkspace, spec: SyntheticSpec, users: list):
+    """Metastore with credentials, external locations, catalogs, schemas, volumes and grants"""
+    groups = sorted(ws.groups) or ["users"]
+    _uc_create(ws, "catalogs", {"name": "system", "catalog_type": "SYSTEM_CATALOG"}, "System user")
+    _uc_create(ws, "catalogs", {"name": "hive_metastore", "catalog_type": "SYSTEM_CATALOG"}, "System user")
+    for i in range(min(2, spec.catalogs)):
+        credential = _uc_create(ws, "storage-credentials", {
+            "name": f"credential{i}",
+            "aws_iam_role": {"role_arn": f"arn:aws:iam::123456789012:role/uc-access-{i}",
+                             "external_id": f"ext-{i}",
+                             "unity_catalog_iam_arn": "arn:aws:iam::414351767826:role/unity-catalog"},
+        }, users[0])
+        ws.uc_grants[("storage_credential", credential["name"])] = {groups[0]: ["CREATE_EXTERNAL_LOCATION"]}
+    for i in range(spec.catalogs):
+        owner = users[i % len(users)]
+        location = _uc_create(ws, "external-locations", {
+            "name": f"location{i}", "url": f"s3://example-uc/catalog{i}",
+            "credential_name": f"credential{i % 2}", "comment": f"Landing zone {i}",
+        }, owner)
+        ws.uc_grants[("external_location", location["name"])] = {
+            groups[i % len(groups)]: ["READ_FILES", "CREATE_EXTERNAL_VOLUME"]}
+        catalog = _uc_create(ws, "catalogs", {
+            "name": f"catalog{i}", "comment": f"Synthetic catalog {i}",
+            "storage_root": f"s3://example-uc/catalog{i}/managed", "properties": {"team": f"team{i}"},
+        }, owner)
+        ws.uc_grants[("catalog", catalog["name"])] = {groups[i % len(groups)]: ["USE_CATALOG", "BROWSE"]}
+        for j in range(spec.schemas_per_catalog):
+            name = "default" if j == 0 else f"schema{j}"
+            full_name = f"{catalog['name']}.{name}"
+            if full_name in ws.uc["schemas"]:
+                ws.uc["schemas"][full_name]["comment"] = f"Schema {j} of {catalog['name']}"
+                schema = ws.uc["schemas"][full_name]
+            else:
+                schema = _uc_create(ws, "schemas", {"name": name, "catalog_name": catalog['name'],
+                                                    "comment": f"Schema {j} of {catalog['name']}"}, owner)
+            ws.uc_grants[("schema", full_name)] = {
+                groups[(i + j) % len(groups)]: ["USE_SCHEMA", "SELECT"],
+                users[j % len(users)]: ["MODIFY"]}
+            for k in range(spec.volumes_per_schema):
+                volume = {"name": f"volume{k}", "catalog_name": catalog['name'], "schema_name": name,
+                          "volume_type": "MANAGED"}
+                if k % 2:
+                    volume.update(volume_type="EXTERNAL",
+                                  storage_location=f"s3://example-uc/catalog{i}/{name}/volume{k}")
+                volume = _uc_create(ws, "volumes", volume, owner)
+                ws.uc_grants[("volume", volume["full_name"])] = {groups[(i + k) % len(groups)]: ["READ_VOLUME"]}
+
+class MockDatabricksServer(ThreadingHTTPServer):
+    """HTTP server exposing a MockWorkspace through the Databricks REST API"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, workspace: MockWorkspace = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, rate_limit: float = 0.0, error_rate: float = 0.0,
+                 page_size: int = 100, seed: int = 0):
+        super().__init__(address, MockRequestHandler)
+        self.workspace = workspace or MockWorkspace()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.request_counts = Counter()
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._stats_lock = threading.Lock()
+        self._tokens = rate_limit
+        self._last_refill = time.monotonic()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.request_counts.clear()
+            self.throttled = 0
+
+    def admit(self, route: str) -> bool:
+        """Count the request and decide whether it is throttled"""
+        with self._stats_lock:
+            self.request_counts[route] += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.throttled += 1
+                return False
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit,
+                                   self._tokens + (now - self._last_refill) * self.rate_limit)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.throttled += 1
+                    return False
+                self._tokens -= 1
+            return True
+
+    def simulate_latency(self):
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+            time.sleep(delay / 1000.0)
+
+    def start_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+ROUTES = []
+
+def route(method: str, pattern: str):
+    """Register a handler for METHOD + path regex"""
+    def decorator(func):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), func))
+        return func
+    return decorator
+
+def _require(params: dict, name: str):
+    value = params.get(name)
+    if value in (None, ""):
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Missing required field: {name}")
+    return value
+
+def _paginate_offset(items: list, params: dict, default_limit: int):
+    limit = int(params.get('limit') or default_limit)
+    if 'page_token' in params and params['page_token']:
+        offset = int(params['page_token'])
+    else:
+        offset = int(params.get('offset') or 0)
+    page = items[offset:offset + limit]
+    has_more = offset + limit < len(items)
+    return page, has_more, (str(offset + limit) if has_more else None)
+
+# Workspace
+
+@route("GET", "/api/2.0/workspace/list")
+def workspace_list(ws: MockWorkspace, params: dict, server):
+    path = _require(params, 'path')
+    obj = ws.objects.get(path)
+    if obj is None:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Path ({path}) doesn't exist.")
+    if obj["object_type"] != "DIRECTORY":
+        return {"objects": [obj]}
+    objects = [ws.objects[child] for child in sorted(ws.children[path])]
+    return {"objects": objects} if objects else {}
+
+@route("GET", "/api/2.0/workspace/get-status")
+def workspace_get_status(ws: MockWorkspace, params: dict, server):
+    path = _require(params, 'path')
+    if path not in ws.objects:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Path ({path}) doesn't exist.")
+    return ws.objects[path]
+
+@route("GET", "/api/2.0/workspace/export")
+def workspace_export(ws: MockWorkspace, params: dict, server):
+    path = _require(params, 'path')
+    obj = ws.objects.get(path)
+    if obj is None or obj["object_type"] == "DIRECTORY":
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Path ({path}) doesn't exist.")
+    content = ws.notebook_source(path)
+    if str(params.get('direct_download', '')).lower() == 'true':
+        return RawResponse(content)
+    extension = LANGUAGE_EXTENSIONS.get(obj.get("language"), "")
+    return {"content": base64.b64encode(content).decode(), "file_type": extension}
+
+@route("POST", "/api/2.0/workspace/import")
+def workspace_import(ws: MockWorkspace, body: dict, server):
+    path = _require(body, 'path')
+    content = body.get('content') or ""
+    # Multipart uploads carry the raw file, JSON requests base64
+    content = content if isinstance(content, bytes) else base64.b64decode(content)
+    overwrite = str(body.get('overwrite', '')).lower() == 'true'
+    if path in ws.objects and not overwrite:
+        raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"Path ({path}) already exists.")
+    if path in ws.objects:
+        ws.contents[path] = content
+        ws.objects[path]["modified_at"] = int(time.time() * 1000)
+    elif body.get('format') == "RAW":
+        ws.add_object(path, "FILE", content=content)["size"] = len(content)
+    else:
+        ws.add_object(path, "NOTEBOOK", language=body.get('language', 'PYTHON'), content=content)
+    ws.created["files" if body.get('format') == "RAW" else "notebooks"] += 1
+    return {}
+
+@route("POST", "/api/2.0/workspace/mkdirs")
+def workspace_mkdirs(ws: MockWorkspace, body: dict, server):
+    ws.mkdirs(_require(body, 'path'))
+    return {}
+
+# Jobs
+
+@route("GET", "/api/2.1/jobs/list")
+def jobs_list(ws: MockWorkspace, params: dict, server):
+    jobs = [ws.jobs[job_id] for job_id in sorted(ws.jobs)]
+    page, has_more, token = _paginate_offset(jobs, params, 20)
+    expand = str(params.get('expand_tasks', '')).lower() == 'true'
+    result = []
+    for job in page:
+        job = json.loads(json.dumps(job))
+        if not expand:
+            job["settings"].pop("tasks", None)
+            job["settings"].pop("job_clusters", None)
+        result.append(job)
+    response = {"jobs": result, "has_more": has_more}
+    if token:
+        response["next_page_token"] = token
+    return response
+
+@route("GET", "/api/2.1/jobs/get")
+def jobs_get(ws: MockWorkspace, params: dict, server):
+    job_id = int(_require(params, 'job_id'))
+    if job_id not in ws.jobs:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Job {job_id} does not exist.")
+    return ws.jobs[job_id]
+
+@route("POST", "/api/2.1/jobs/create")
+def jobs_create(ws: MockWorkspace, body: dict, server):
+    _require(body, 'name')
+    job_id = ws.next_id()
+    ws.jobs[job_id] = {"job_id": job_id, "created_time": int(time.time() * 1000), "settings": body}
+    ws.created["jobs"] += 1
+    return {"job_id": job_id}
+
+# Clusters and policies
+
+@route("GET", "/api/2.0/clusters/list")
+def clusters_list(ws: MockWorkspace, params: dict, server):
+    return {"clusters": list(ws.clusters.values())} if ws.clusters else {}
+
+@route("GET", "/api/2.0/clusters/get")
+def clusters_get(ws: MockWorkspace, params: dict, server):
+    cluster_id = _require(params, 'cluster_id')
+    if cluster_id not in ws.clusters:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Cluster {cluster_id} does not exist")
+    return ws.clusters[cluster_id]
+
+@route("GET", "/api/2.0/libraries/cluster-status")
+def libraries_cluster_status(ws: MockWorkspace, params: dict, server):
+    cluster_id = _require(params, 'cluster_id')
+    if cluster_id not in ws.clusters:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Cluster {cluster_id} does not exist")
+    return {"cluster_id": cluster_id, "library_statuses": ws.libraries.get(cluster_id, [])}
+
+@route("POST", "/api/2.0/libraries/install")
+def libraries_install(ws: MockWorkspace, body: dict, server):
+    cluster_id = _require(body, 'cluster_id')
+    if cluster_id not in ws.clusters:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Cluster {cluster_id} does not exist")
+    libraries = _require(body, 'libraries')
+    ws.libraries.setdefault(cluster_id, []).extend(
+        {"library": library, "status": "PENDING"} for library in libraries)
+    ws.created["libraries"] += len(libraries)
+    ws.created["library_installs"] += 1
+    return {}
+
+@route("POST", "/api/2.0/clusters/create")
+def clusters_create(ws: MockWorkspace, body: dict, server):
+    _require(body, 'spark_version')
+    policy_id = body.get('policy_id')
+    if policy_id and policy_id not in ws.policies:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Policy {policy_id} does not exist")
+    for field in ('instance_pool_id', 'driver_instance_pool_id'):
+        if body.get(field) and body[field] not in ws.instance_pools:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Instance pool {body[field]} does not exist")
+    cluster_id = f"{ws.next_id():04d}-000000-created"
+    ws.clusters[cluster_id] = dict(body, cluster_id=cluster_id, state="PENDING", cluster_source="API")
+    ws.created["clusters"] += 1
+    return {"cluster_id": cluster_id}
+
+@route("GET", "/api/2.0/policies/clusters/list")
+def policies_list(ws: MockWorkspace, params: dict, server):
+    return {"policies": list(ws.policies.values()), "total_count": len(ws.policies)}
+
+@route("GET", "/api/2.0/policies/clusters/get")
+def policies_get(ws: MockWorkspace, params: dict, server):
+    policy_id = _require(params, 'policy_id')
+    if policy_id not in ws.policies:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Policy {policy_id} does not exist")
+    return ws.policies[policy_id]
+
+@route("POST", "/api/2.0/policies/clusters/create")
+def policies_create(ws: MockWorkspace, body: dict, server):
+    name = _require(body, 'name')
+    if any(p["name"] == name for p in ws.policies.values()):
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Policy with name {name} already exists")
+    policy_id = f"POLICY{ws.next_id():06d}"
+    ws.policies[policy_id] = dict(body, policy_id=policy_id)
+    ws.created["cluster_policies"] += 1
+    return {"policy_id": policy_id}
+
+# Instance pools
+
+@route("GET", "/api/2.0/instance-pools/list")
+def instance_pools_list(ws: MockWorkspace, params: dict, server):
+    return {"instance_pools": list(ws.instance_pools.values())}
+
+@route("GET", "/api/2.0/instance-pools/get")
+def instance_pools_get(ws: MockWorkspace, params: dict, server):
+    pool_id = _require(params, 'instance_pool_id')
+    if pool_id not in ws.instance_pools:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Instance pool {pool_id} does not exist")
+    return ws.instance_pools[pool_id]
+
+@route("POST", "/api/2.0/instance-pools/create")
+def instance_pools_create(ws: MockWorkspace, body: dict, server):
+    name = _require(body, 'instance_pool_name')
+    _require(body, 'node_type_id')
+    if any(p["instance_pool_name"] == name for p in ws.instance_pools.values()):
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Instance pool with name {name} already exists")
+    pool_id = f"{ws.next_id():04d}-000000-createdpool"
+    ws.instance_pools[pool_id] = dict(body, instance_pool_id=pool_id, state="ACTIVE")
+    ws.created["instance_pools"] += 1
+    return {"instance_pool_id": pool_id}
+
+@route("POST", "/api/2.0/instance-pools/edit")
+def instance_pools_edit(ws: MockWorkspace, body: dict, server):
+    pool_id = _require(body, 'instance_pool_id')
+    _require(body, 'instance_pool_name')
+    _require(body, 'node_type_id')
+    if pool_id not in ws.instance_pools:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Instance pool {pool_id} does not exist")
+    ws.instance_pools[pool_id].update(body)
+    ws.created["instance_pool_edits"] += 1
+    return {}
+
+# SQL warehouses
+
+WAREHOUSE_TRANSITIONS = {"STARTING": "RUNNING", "STOPPING": "STOPPED"}
+
+@route("GET", "/api/2.0/sql/warehouses")
+def warehouses_list(ws: MockWorkspace, params: dict, server):
+    return {"warehouses": list(ws.warehouses.values())}
+
+@route("GET", "/api/2.0/sql/warehouses/(?P<warehouse_id>[^/]+)")
+def warehouses_get(ws: MockWorkspace, params: dict, server, warehouse_id: str):
+    if warehouse_id not in ws.warehouses:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Warehouse {warehouse_id} does not exist")
+    warehouse = ws.warehouses[warehouse_id]
+    # Transitional states settle after a couple of polls (stocked-out warehouses stop instead of starting)
+    if warehouse["state"] in WAREHOUSE_TRANSITIONS:
+        ws.warehouse_polls[warehouse_id] += 1
+        if ws.warehouse_polls[warehouse_id] >= 2:
+            if warehouse_id in ws.stocked_out_warehouses and warehouse["state"] == "STARTING":
+                warehouse["state"] = "STOPPED"
+                warehouse["health"] = {"status": "FAILED", "failure_reason": {
+                    "code": "CLOUD_PROVIDER_RESOURCE_STOCKOUT", "type": "CLOUD_FAILURE", "parameters": {}}}
+            else:
+                warehouse["state"] = WAREHOUSE_TRANSITIONS[warehouse["state"]]
+            del ws.warehouse_polls[warehouse_id]
+    return warehouse
+
+@route("POST", "/api/2.0/sql/warehouses")
+def warehouses_create(ws: MockWorkspace, body: dict, server):
+    _require(body, 'name')
+    active = sum(1 for w in ws.warehouses.values() if w["state"] in ("STARTING", "RUNNING"))
+    if ws.warehouse_quota and active >= ws.warehouse_quota:
+        raise ApiError(400, "QUOTA_EXCEEDED", f"Running warehouse quota of {ws.warehouse_quota} reached")
+    if any(w["name"] == body["name"] for w in ws.warehouses.values()):
+        raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"Warehouse {body['name']} already exists")
+    warehouse_id = f"wh{ws.next_id():012d}"
+    ws.warehouses[warehouse_id] = dict(body, id=warehouse_id, state="STARTING")
+    if ws.warehouse_stockouts:
+        ws.warehouse_stockouts -= 1
+        ws.stocked_out_warehouses.add(warehouse_id)
+    ws.created["sql_warehouses"] += 1
+    return {"id": warehouse_id}
+
+@route("DELETE", "/api/2.0/sql/warehouses/(?P<warehouse_id>[^/]+)")
+def warehouses_delete(ws: MockWorkspace, body: dict, server, warehouse_id: str):
+    if ws.warehouses.pop(warehouse_id, None) is None:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Warehouse {warehouse_id} does not exist")
+    ws.stocked_out_warehouses.discard(warehouse_id)
+    return {}
+
+@route("POST", "/api/2.0/sql/warehouses/(?P<warehouse_id>[^/]+)/stop")
+def warehouses_stop(ws: MockWorkspace, body: dict, server, warehouse_id: str):
+    if warehouse_id not in ws.warehouses:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Warehouse {warehouse_id} does not exist")
+    if ws.warehouses[warehouse_id]["state"] != "STOPPED":
+        ws.warehouses[warehouse_id]["state"] = "STOPPING"
+    return {}
+
+# Databricks SQL (legacy preview API)
+
+def _paginate_page(items: list, params: dict):
+    page = int(params.get('page') or 1)
+    page_size = int(params.get('page_size') or 25)
+    return {"count": len(items), "page": page, "page_size": page_size,
+            "results": items[(page - 1) * page_size:page * page_size]}
+
+@route("GET", "/api/2.0/preview/sql/data_sources")
+def data_sources_list(ws: MockWorkspace, params: dict, server):
+    return [{"id": f"ds-{warehouse_id}", "warehouse_id": warehouse_id, "name": warehouse["name"]}
+            for warehouse_id, warehouse in ws.warehouses.items()]
+
+@route("GET", "/api/2.0/preview/sql/queries")
+def queries_list(ws: MockWorkspace, params: dict, server):
+    # List entries omit visualizations, as the real API does
+    queries = [{k: v for k, v in query.items() if k != "visualizations"}
+               for _, query in sorted(ws.queries.items())]
+    return _paginate_page(queries, params)
+
+@route("GET", "/api/2.0/preview/sql/queries/(?P<query_id>[^/]+)")
+def queries_get(ws: MockWorkspace, params: dict, server, query_id: str):
+    if query_id not in ws.queries:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Query {query_id} does not exist")
+    return ws.queries[query_id]
+
+@route("POST", "/api/2.0/preview/sql/queries")
+def queries_create(ws: MockWorkspace, body: dict, server):
+    data_source_id = _require(body, 'data_source_id')
+    if data_source_id.replace("ds-", "", 1) not in ws.warehouses:
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Data source {data_source_id} does not exist")
+    for parameter in body.get('options', {}).get('parameters', []):
+        if parameter.get('queryId') and parameter['queryId'] not in ws.queries:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Query {parameter['queryId']} does not exist")
+    query_id = f"q{ws.next_id()}"
+    # New queries come with a default table visualization
+    ws.queries[query_id] = dict(body, id=query_id, name=_require(body, 'name'), visualizations=[
+        {"id": f"v{ws.next_id()}", "type": "TABLE", "name": "Table", "options": {}}])
+    ws.created["sql_queries"] += 1
+    return ws.queries[query_id]
+
+@route("POST", "/api/2.0/preview/sql/visualizations")
+def visualizations_create(ws: MockWorkspace, body: dict, server):
+    query_id = _require(body, 'query_id')
+    if query_id not in ws.queries:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Query {query_id} does not exist")
+    visualization = {k: v for k, v in body.items() if k != 'query_id'}
+    visualization["id"] = f"v{ws.next_id()}"
+    ws.queries[query_id]["visualizations"].append(visualization)
+    ws.created["sql_visualizations"] += 1
+    return visualization
+
+@route("GET", "/api/2.0/preview/sql/alerts")
+def alerts_list(ws: MockWorkspace, params: dict, server):
+    return [ws.alerts[alert_id] for alert_id in sorted(ws.alerts)]
+
+@route("POST", "/api/2.0/preview/sql/alerts")
+def alerts_create(ws: MockWorkspace, body: dict, server):
+    query_id = _require(body, 'query_id')
+    if query_id not in ws.queries:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Query {query_id} does not exist")
+    alert_id = f"a{ws.next_id()}"
+    ws.alerts[alert_id] = {"id": alert_id, "name": _require(body, 'name'), "options": body.get('options'),
+                           "rearm": body.get('rearm'), "query": {"id": query_id}, "state": "unknown"}
+    ws.created["sql_alerts"] += 1
+    return ws.alerts[alert_id]
+
+@route("GET", "/api/2.0/preview/sql/dashboards")
+def dashboards_list(ws: MockWorkspace, params: dict, server):
+    dashboards = [{k: v for k, v in dashboard.items() if k != "widgets"}
+                  for _, dashboard in sorted(ws.dashboards.items())]
+    return _paginate_page(dashboards, params)
+
+@route("GET", "/api/2.0/preview/sql/dashboards/(?P<dashboard_id>[^/]+)")
+def dashboards_get(ws: MockWorkspace, params: dict, server, dashboard_id: str):
+    if dashboard_id not in ws.dashboards:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Dashboard {dashboard_id} does not exist")
+    return ws.dashboards[dashboard_id]
+
+@route("POST", "/api/2.0/preview/sql/dashboards")
+def dashboards_create(ws: MockWorkspace, body: dict, server):
+    dashboard_id = f"d{ws.next_id()}"
+    ws.dashboards[dashboard_id] = dict(body, id=dashboard_id, name=_require(body, 'name'), widgets=[])
+    ws.created["sql_dashboards"] += 1
+    return ws.dashboards[dashboard_id]
+
+@route("POST", "/api/2.0/preview/sql/widgets")
+def widgets_create(ws: MockWorkspace, body: dict, server):
+    dashboard_id = _require(body, 'dashboard_id')
+    if dashboard_id not in ws.dashboards:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Dashboard {dashboard_id} does not exist")
+    widget = {"id": f"w{ws.next_id()}", "width": body.get('width', 1), "options": body.get('options', {})}
+    if body.get('visualization_id'):
+        visualizations = {v["id"]: v for q in ws.queries.values() for v in q["visualizations"]}
+        if body['visualization_id'] not in visualizations:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Visualization {body['visualization_id']} does not exist")
+        widget["visualization"] = visualizations[body['visualization_id']]
+    else:
+        widget["text"] = body.get('text', "")
+    ws.dashboards[dashboard_id]["widgets"].append(widget)
+    ws.created["sql_widgets"] += 1
+    return widget
+
+# Secrets
+
+@route("GET", "/api/2.0/secrets/scopes/list")
+def scopes_list(ws: MockWorkspace, params: dict, server):
+    return {"scopes": [{"name": name, "backend_type": scope["backend_type"]}
+                       for name, scope in ws.scopes.items()]}
+
+@route("POST", "/api/2.0/secrets/scopes/create")
+def scopes_create(ws: MockWorkspace, body: dict, server):
+    scope = _require(body, 'scope')
+    if scope in ws.scopes:
+        raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"Scope {scope} already exists!")
+    if ws.standard_tier and body.get('initial_manage_principal') != "users":
+        raise ApiError(400, "INVALID_PARAMETER_VALUE",
+                       'Premium Tier is disabled in this workspace. Secret scopes can only be created with '
+                       'initial_manage_principal "users".')
+    acls = {body['initial_manage_principal']: "MANAGE"} if body.get('initial_manage_principal') else {}
+    ws.scopes[scope] = {"backend_type": body.get('backend_type', 'DATABRICKS'), "secrets": {}, "acls": acls}
+    ws.created["secret_scopes"] += 1
+    return {}
+
+@route("GET", "/api/2.0/secrets/list")
+def secrets_list(ws: MockWorkspace, params: dict, server):
+    scope = _require(params, 'scope')
+    if scope not in ws.scopes:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Scope {scope} does not exist!")
+    now = int(time.time() * 1000)
+    return {"secrets": [{"key": key, "last_updated_timestamp": now}
+                        for key in ws.scopes[scope]["secrets"]]}
+
+@route("POST", "/api/2.0/secrets/put")
+def secrets_put(ws: MockWorkspace, body: dict, server):
+    scope = _require(body, 'scope')
+    if scope not in ws.scopes:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Scope {scope} does not exist!")
+    ws.scopes[scope]["secrets"][_require(body, 'key')] = body.get('string_value')
+    ws.created["secrets"] += 1
+    return {}
+
+@route("GET", "/api/2.0/secrets/acls/list")
+def secret_acls_list(ws: MockWorkspace, params: dict, server):
+    scope = _require(params, 'scope')
+    if scope not in ws.scopes:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Scope {scope} does not exist!")
+    return {"items": [{"principal": principal, "permission": permission}
+                      for principal, permission in ws.scopes[scope]["acls"].items()]}
+
+@route("POST", "/api/2.0/secrets/acls/put")
+def secret_acls_put(ws: MockWorkspace, body: dict, server):
+    scope = _require(body, 'scope')
+    if scope not in ws.scopes:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Scope {scope} does not exist!")
+    ws.scopes[scope]["acls"][_require(body, 'principal')] = _require(body, 'permission')
+    ws.created["secret_acls"] += 1
+    return {}
+
+# Repos
+
+@route("GET", "/api/2.0/repos")
+def repos_list(ws: MockWorkspace, params: dict, server):
+    repos = [ws.repos[repo_id] for repo_id in sorted(ws.repos)]
+    prefix = params.get('path_prefix')
+    if prefix:
+        repos = [r for r in repos if r["path"].startswith(prefix)]
+    page, has_more, token = _paginate_offset(
+        repos, {"page_token": params.get('next_page_token'), "limit": server.page_size}, server.page_size)
+    response = {"repos": page}
+    if token:
+        response["next_page_token"] = token
+    return response
+
+@route("GET", "/api/2.0/repos/(?P<repo_id>[0-9]+)")
+def repos_get(ws: MockWorkspace, params: dict, server, repo_id: str):
+    if int(repo_id) not in ws.repos:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Repo {repo_id} does not exist")
+    return ws.repos[int(repo_id)]
+
+@route("POST", "/api/2.0/repos")
+def repos_create(ws: MockWorkspace, body: dict, server):
+    path = _require(body, 'path')
+    if any(r["path"] == path for r in ws.repos.values()):
+        raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"Repo {path} already exists")
+    repo_id = ws.next_id()
+    ws.repos[repo_id] = {"id": repo_id, "path": path, "url": body.get('url'),
+                         "provider": body.get('provider'), "branch": body.get('branch', 'main')}
+    ws.repos[repo_id]["head_commit_id"] = _branch_head(body.get('url'), ws.repos[repo_id]["branch"])
+    ws.created["repos"] += 1
+    return ws.repos[repo_id]
+
+@route("PATCH", "/api/2.0/repos/(?P<repo_id>[0-9]+)")
+def repos_update(ws: MockWorkspace, body: dict, server, repo_id: str):
+    repo = ws.repos.get(int(repo_id))
+    if repo is None:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Repo {repo_id} does not exist")
+    if body.get('branch'):
+        repo["branch"] = body['branch']
+        repo.pop("tag", None)
+        repo["head_commit_id"] = _branch_head(repo["url"], body['branch'])
+    if body.get('tag'):
+        repo["tag"] = body['tag']
+        repo["head_commit_id"] = _branch_head(repo["url"], body['tag'])
+    ws.created["repo_checkouts"] += 1
+    return repo
+
+# Permissions
+
+@route("GET", "/api/2.0/permissions/(?P<object_type>[a-z-]+)/(?P<object_id>[^/]+)")
+def permissions_get(ws: MockWorkspace, params: dict, server, object_type: str, object_id: str):
+    acl = [dict({k: v for k, v in grant.items() if k != "permission_level"},
+                all_permissions=[{"permission_level": grant["permission_level"], "inherited": False}])
+           for grant in ws.permissions.get((object_type, object_id), [])]
+    acl.append({"group_name": "admins", "all_permissions": [
+        {"permission_level": "CAN_MANAGE", "inherited": True, "inherited_from_object": [f"/{object_type}/"]}]})
+    return {"object_id": f"/{object_type}/{object_id}", "object_type": object_type,
+            "access_control_list": acl}
+
+@route("PUT", "/api/2.0/permissions/(?P<object_type>[a-z-]+)/(?P<object_id>[^/]+)")
+def permissions_set(ws: MockWorkspace, body: dict, server, object_type: str, object_id: str):
+    grants = body.get('access_control_list', [])
+    for grant in grants:
+        if grant.get('group_name') == "admins":
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", "Permissions of the admins group cannot be changed")
+        if grant.get('user_name') and grant['user_name'] not in ws.users:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Principal: UserName({grant['user_name']}) does not exist")
+        if grant.get('group_name') and grant['group_name'] not in ws.groups and grant['group_name'] != "users":
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"Principal: GroupName({grant['group_name']}) does not exist")
+    ws.permissions[(object_type, object_id)] = grants
+    ws.created["permissions"] += 1
+    return permissions_get(ws, {}, server, object_type, object_id)
+
+SQL_PERMISSION_TYPES = "queries|alerts|dashboards"
+
+@route("GET", f"/api/2.0/preview/sql/permissions/(?P<object_type>{SQL_PERMISSION_TYPES})/(?P<object_id>[^/]+)")
+def sql_permissions_get(ws: MockWorkspace, params: dict, server, object_type: str, object_id: str):
+    acl = list(ws.permissions.get((f"sql/{object_type}", object_id), []))
+    acl.append({"group_name": "admins", "permission_level": "CAN_MANAGE"})
+    return {"object_id": f"{object_type}/{object_id}", "object_type": object_type[:-1],
+            "access_control_list": acl}
+
+@route("POST", f"/api/2.0/preview/sql/permissions/(?P<object_type>{SQL_PERMISSION_TYPES})/(?P<object_id>[^/]+)")
+def sql_permissions_set(ws: MockWorkspace, body: dict, server, object_type: str, object_id: str):
+    grants = body.get('access_control_list', [])
+    for grant in grants:
+        if grant.get('user_name') and grant['user_name'] not in ws.users:
+            raise ApiError(400, "INVALID_PARAMETER_VALUE", f"User {grant['user_name']} does not exist")
+    ws.permissions[(f"sql/{object_type}", object_id)] = [g for g in grants if g.get('group_name') != "admins"]
+    ws.created["permissions"] += 1
+    return sql_permissions_get(ws, {}, server, object_type, object_id)
+
+# Unity Catalog
+
+# API collection -> (securable type, required create fields, parent collection and field)
+UC_COLLECTIONS = {
+    "storage-credentials": ("storage_credential", ["name"], None),
+    "external-locations": ("external_location", ["name", "url", "credential_name"],
+                           ("storage-credentials", "credential_name")),
+    "catalogs": ("catalog", ["name"], None),
+    "schemas": ("schema", ["name", "catalog_name"], ("catalogs", "catalog_name")),
+    "volumes": ("volume", ["name", "catalog_name", "schema_name", "volume_type"], ("schemas", "schema_parent")),
+}
+
+UC_COLLECTION_PATTERN = "|".join(UC_COLLECTIONS)
+
+# Principal owning what the migration token creates
+UC_TOKEN_PRINCIPAL = "migration-admin@example.com"
+
+def _uc_create(ws: MockWorkspace, collection: str, body: dict, owner: str) -> dict:
+    securable_type, required, parent = UC_COLLECTIONS[collection]
+    for field in required:
+        _require(body, field)
+    if collection == "storage-credentials" and not any(
+            body.get(k) for k in ("aws_iam_role", "azure_managed_identity", "azure_service_principal",
+                                  "databricks_gcp_service_account")):
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", "A storage credential needs a cloud identity")
+    if collection == "volumes" and body["volume_type"] == "MANAGED" and body.get("storage_location"):
+        raise ApiError(400, "INVALID_PARAMETER_VALUE", "Storage location cannot be specified for a managed volume")
+    obj = dict(body)
+    if collection == "schemas":
+        obj["full_name"] = f"{body['catalog_name']}.{body['name']}"
+    elif collection == "volumes":
+        obj["full_name"] = f"{body['catalog_name']}.{body['schema_name']}.{body['name']}"
+        obj["schema_parent"] = f"{body['catalog_name']}.{body['schema_name']}"
+    name = obj.get("full_name", obj["name"])
+    if parent and obj[parent[1]] not in ws.uc[parent[0]]:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"{parent[0][:-1]} '{obj[parent[1]]}' does not exist.")
+    if name in ws.uc[collection]:
+        raise ApiError(409, "RESOURCE_ALREADY_EXISTS", f"{securable_type} '{name}' already exists")
+    obj.pop("schema_parent", None)
+    obj.update(owner=owner, created_at=int(time.time() * 1000), metastore_id="mock-metastore")
+    if collection == "storage-credentials" and "aws_iam_role" in obj:
+        obj["aws_iam_role"] = dict(obj["aws_iam_role"], external_id=f"ext-{ws.next_id()}",
+                                   unity_catalog_iam_arn="arn:aws:iam::414351767826:role/unity-catalog")
+    if collection == "catalogs":
+        obj.setdefault("catalog_type", "MANAGED_CATALOG")
+    if collection == "volumes" and obj["volume_type"] == "MANAGED":
+        # Managed volumes report the location the metastore picked for them
+        obj["storage_location"] = f"s3://mock-metastore/volumes/{ws.next_id()}"
+    ws.uc[collection][name] = obj
+    # Every new catalog comes with these two schemas
+    if collection == "catalogs" and obj["catalog_type"] != "SYSTEM_CATALOG":
+        for schema in ("default", "information_schema"):
+            _uc_create(ws, "schemas", {"name": schema, "catalog_name": name,
+                                       "comment": "Default schema (auto-created)"}, owner)
+    return obj
+
+@route("GET", f"/api/2.1/unity-catalog/(?P<collection>{UC_COLLECTION_PATTERN})")
+def uc_list(ws: MockWorkspace, params: dict, server, collection: str):
+    items = list(ws.uc[collection].values())
+    if collection in ("schemas", "volumes"):
+        catalog = _require(params, 'catalog_name')
+        items = [item for item in items if item["catalog_name"] == catalog]
+    if collection == "volumes":
+        schema = _require(params, 'schema_name')
+        items = [item for item in items if item["schema_name"] == schema]
+    page, _, next_token = _paginate_offset(items, {"limit": params.get('max_results'),
+                                                   "page_token": params.get('page_token')}, 25)
+    result = {collection.replace('-', '_'): page}
+    if next_token:
+        result["next_page_token"] = next_token
+    return result
+
+@route("POST", f"/api/2.1/unity-catalog/(?P<collection>{UC_COLLECTION_PATTERN})")
+def uc_create(ws: MockWorkspace, body: dict, server, collection: str):
+    obj = _uc_create(ws, collection, body, UC_TOKEN_PRINCIPAL)
+    ws.created[collection.replace('-', '_')] += 1
+    return obj
+
+@route("PATCH", f"/api/2.1/unity-catalog/(?P<collection>{UC_COLLECTION_PATTERN})/(?P<name>[^/]+)")
+def uc_update(ws: MockWorkspace, body: dict, server, collection: str, name: str):
+    obj = ws.uc[collection].get(name)
+    if obj is None:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"{UC_COLLECTIONS[collection][0]} '{name}' does not exist.")
+    obj.update({k: v for k, v in body.items() if k not in ("name", "full_name", "catalog_name", "schema_name")})
+    ws.created[f"{collection.replace('-', '_')}_updates"] += 1
+    return obj
+
+@route("GET", "/api/2.1/unity-catalog/permissions/(?P<securable_type>[a-z_]+)/(?P<name>[^/]+)")
+def uc_grants_get(ws: MockWorkspace, params: dict, server, securable_type: str, name: str):
+    grants = ws.uc_grants.get((securable_type, name), {})
+    return {"privilege_assignments": [{"principal": principal, "privileges": privileges}
+                                      for principal, privileges in sorted(grants.items())]}
+
+@route("PATCH", "/api/2.1/unity-catalog/permissions/(?P<securable_type>[a-z_]+)/(?P<name>[^/]+)")
+def uc_grants_update(ws: MockWorkspace, body: dict, server, securable_type: str, name: str):
+    collection = next(c for c, spec in UC_COLLECTIONS.items() if spec[0] == securable_type)
+    if name not in ws.uc[collection]:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"{securable_type} '{name}' does not exist.")
+    grants = ws.uc_grants.setdefault((securable_type, name), {})
+    for change in body.get('changes', []):
+        privileges = set(grants.get(change['principal'], [])) | set(change.get('add', []))
+        privileges -= set(change.get('remove', []))
+        grants[change['principal']] = sorted(privileges)
+    ws.created["uc_grants"] += 1
+    return {"privilege_assignments": [{"principal": principal, "privileges": privileges}
+                                      for principal, privileges in sorted(grants.items())]}
+
+# Groups and users
+
+@route("GET", "/api/2.0/groups/list")
+def groups_list(ws: MockWorkspace, params: dict, server):
+    return {"group_names": sorted(ws.groups)}
+
+@route("GET", "/api/2.0/groups/list-members")
+def groups_list_members(ws: MockWorkspace, params: dict, server):
+    group = _require(params, 'group_name')
+    if group not in ws.groups:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Group {group} does not exist")
+    return {"members": ws.groups[group]}
+
+@route("POST", "/api/2.0/groups/create")
+def groups_create(ws: MockWorkspace, body: dict, server):
+    group = _require(body, 'group_name')
+    if group in ws.groups:
+        raise ApiError(400, "RESOURCE_ALREADY_EXISTS", f"Group {group} already exists")
+    ws.groups[group] = []
+    ws.created["groups"] += 1
+    return {"group_name": group}
+
+@route("POST", "/api/2.0/groups/add-member")
+def groups_add_member(ws: MockWorkspace, body: dict, server):
+    group = _require(body, 'parent_name') if 'parent_name' in body else _require(body, 'group_name')
+    if group not in ws.groups:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"Group {group} does not exist")
+    user = _require(body, 'user_name')
+    if user not in ws.users:
+        raise ApiError(404, "RESOURCE_DOES_NOT_EXIST", f"User {user} does not exist")
+    ws.groups[group].append({"user_name": user})
+    ws.created["group_members"] += 1
+    return {}
+
+@route("GET", "/api/2.0/preview/scim/v2/Users")
+def scim_users_list(ws: MockWorkspace, params: dict, server):
+    users = list(ws.users.values())
+    start = int(params.get('startIndex') or 1)
+    count = int(params.get('count') or 100)
+    page = users[start - 1:start - 1 + count]
+    return {"totalResults": len(users), "startIndex": start, "itemsPerPage": len(page),
+            "Resources": page}
+
+@route("POST", "/api/2.0/preview/scim/v2/Users")
+def scim_users_create(ws: MockWorkspace, body: dict, server):
+    user = _require(body, 'userName')
+    if user in ws.users:
+        raise ApiError(409, "RESOURCE_CONFLICT", f"User with username {user} already exists.")
+    ws.users[user] = {"id": str(ws.next_id()), "userName": user, "active": True}
+    ws.created["users"] += 1
+    return ws.users[user]
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Dispatch requests to the registered route handlers"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY keep-alive
+    # connections stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload, headers: dict = None):
+        if isinstance(payload, RawResponse):
+            body, content_type = payload.body, payload.content_type
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> dict:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            raw = self._read_chunked()
+        else:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+        if not raw:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            return self._parse_multipart(raw)
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise ApiError(400, "MALFORMED_REQUEST", "Request body is not valid JSON")
+
+    def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                # Skip trailers up to the terminating blank line
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _parse_multipart(self, raw: bytes) -> dict:
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+        message = email.parser.BytesParser().parsebytes(header + raw)
+        if not message.is_multipart():
+            raise ApiError(400, "MALFORMED_REQUEST", "Malformed multipart body")
+        body = {}
+        for part in message.get_payload():
+            payload = part.get_payload(decode=True)
+            # File parts stay bytes, form fields become strings
+            body[part.get_param("name", header="content-disposition")] = (
+                payload if part.get_filename() else payload.decode())
+        return body
+
+    def _control(self, path: str) -> dict:
+        """Benchmark control endpoints (not counted or throttled)"""
+        server = self.server
+        if path == "/__mock__/reset":
+            server.reset_stats()
+        with server.workspace.lock:
+            created = dict(server.workspace.created)
+        return {"requests": dict(server.request_counts), "throttled": server.throttled,
+                "created": created}
+
+    def _dispatch(self, method: str):
+        server = self.server
+        parsed = urlparse(self.path)
+        try:
+            body = self._read_body()
+        except ApiError as e:
+            self._send(e.status, {"error_code": e.error_code, "message": e.message})
+            return
+        if parsed.path.startswith("/__mock__/"):
+            self._send(200, self._control(parsed.path))
+            return
+        for route_method, pattern, handler in ROUTES:
+            match = pattern.match(parsed.path)
+            if route_method == method and match:
+                break
+        else:
+            self._send(404, {"error_code": "ENDPOINT_NOT_FOUND",
+                             "message": f"No API found for '{method} {parsed.path}'"})
+            return
+
+        if not server.admit(f"{method} {pattern.pattern.strip('^$')}"):
+            self._send(429, {"error_code": "REQUEST_LIMIT_EXCEEDED",
+                             "message": "Too many requests"}, {"Retry-After": "1"})
+            return
+        server.simulate_latency()
+
+        if method == "GET":
+            params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+            params.update({k: v for k, v in body.items() if k not in params})
+        else:
+            params = body
+        try:
+            with server.workspace.lock:
+                result = handler(server.workspace, params, server, **match.groupdict())
+            self._send(200, result)
+        except ApiError as e:
+            self._send(e.status, {"error_code": e.error_code, "message": e.message})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """Options shared by the standalone server and the benchmark runner"""
+    parser.add_argument('--notebooks', type=int, default=1000, help='Synthetic notebooks in the source')
+    parser.add_argument('--jobs', type=int, default=100, help='Synthetic jobs in the source')
+    parser.add_argument('--clusters', type=int, default=20, help='Synthetic clusters in the source')
+    parser.add_argument('--policies', type=int, default=5, help='Synthetic cluster policies')
+    parser.add_argument('--instance-pools', type=int, default=3, help='Synthetic instance pools')
+    parser.add_argument('--warehouses', type=int, default=5, help='Synthetic SQL warehouses')
+    parser.add_argument('--queries', type=int, default=12,
+                        help='Synthetic SQL queries (with alerts and dashboards built on them)')
+    parser.add_argument('--scopes', type=int, default=10, help='Synthetic secret scopes')
+    parser.add_argument('--repos', type=int, default=20, help='Synthetic Git repos')
+    parser.add_argument('--groups', type=int, default=20, help='Synthetic groups')
+    parser.add_argument('--files', type=int, default=50, help='Synthetic workspace files')
+    parser.add_argument('--file-size-kb', type=int, default=64,
+                        help='Size of the synthetic workspace files (every 10th is 10x larger)')
+    parser.add_argument('--catalogs', type=int, default=3,
+                        help='Synthetic Unity Catalog catalogs (with schemas, volumes and external locations)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Fixed latency added to each request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency (0..N ms)')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='Requests per second before 429s are returned (0 = unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with an injected 429')
+    parser.add_argument('--warehouse-quota', type=int, default=0,
+                        help='Starting/running SQL warehouses allowed before creates fail (0 = unlimited)')
+    parser.add_argument('--warehouse-stockouts', type=int, default=0,
+                        help='SQL warehouses that stop with a capacity stockout while provisioning')
+
+def spec_from_args(args: argparse.Namespace) -> SyntheticSpec:
+    return SyntheticSpec(notebooks=args.notebooks, jobs=args.jobs, clusters=args.clusters,
+                         policies=args.policies, instance_pools=args.instance_pools,
+                         warehouses=args.warehouses, queries=args.queries, scopes=args.scopes,
+                         repos=args.repos, groups=args.groups, catalogs=args.catalogs, files=args.files,
+                         file_size_kb=args.file_size_kb)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a mock Databricks REST server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8800, help='Port to listen on')
+    parser.add_argument('--empty', action='store_true', help='Start with an empty workspace (target)')
+    parser.add_argument('--standard-tier', action='store_true',
+                        help='Behave like a Standard tier workspace (secret scopes must be managed by "users")')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    workspace = MockWorkspace()
+    workspace.warehouse_quota = args.warehouse_quota
+    workspace.warehouse_stockouts = args.warehouse_stockouts
+    workspace.standard_tier = args.standard_tier
+    if not args.empty:
+        print(f"Generating synthetic workspace ({args.notebooks} notebooks, {args.jobs} jobs)...")
+        populate(workspace, spec_from_args(args))
+    server = MockDatabricksServer((args.host, args.port), workspace, latency_ms=args.latency_ms,
+                                  jitter_ms=args.jitter_ms, rate_limit=args.rate_limit,
+                                  error_rate=args.error_rate)
+    print(f"Mock Databricks workspace listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
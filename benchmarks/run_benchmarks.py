@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Scale benchmarks for the migration scripts against the mock Databricks server
+
+Starts a populated source and an empty target mock workspace in separate
+processes, runs each migrate_* entry point in dependency order and reports
+objects/sec, request counts, throttled requests and peak Python memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py --notebooks 100000 --latency-ms 20
+    python benchmarks/run_benchmarks.py --only notebooks jobs --rate-limit 50
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+# Add parent directory to path to import the migration scripts
+sys.path.append(str(Path(__file__).parent.parent))
+from mock_databricks_server import add_server_arguments
+from utils import setup_logging
+from migrate_users_groups import migrate_users_and_groups
+from migrate_unity_catalog import migrate_unity_catalog
+from migrate_cluster_policies import migrate_cluster_policies
+from migrate_instance_pools import migrate_instance_pools
+from migrate_sql_warehouses import migrate_sql_warehouses
+from migrate_sql_queries import migrate_sql_queries
+from migrate_secret_scopes import migrate_secret_scopes
+from migrate_workspace_folders import migrate_workspace_folders
+from migrate_clusters import migrate_clusters
+from migrate_notebooks import migrate_notebooks
+from migrate_workspace_files import migrate_workspace_files
+from migrate_git_repos import migrate_git_repos
+from migrate_jobs import migrate_jobs
+from migrate_permissions import migrate_permissions
+
+logger = logging.getLogger(__name__)
+
+SERVER_SCRIPT = str(Path(__file__).parent / "mock_databricks_server.py")
+
+# (name, entry point, target counters that represent migrated objects)
+BENCHMARKS = [
+    ("users_groups", migrate_users_and_groups, ["groups", "users", "group_members"]),
+    ("unity_catalog", migrate_unity_catalog, ["storage_credentials", "external_locations", "catalogs", "schemas",
+                                              "volumes", "uc_grants"]),
+    ("cluster_policies", migrate_cluster_policies, ["cluster_policies"]),
+    ("instance_pools", migrate_instance_pools, ["instance_pools"]),
+    ("sql_warehouses", migrate_sql_warehouses, ["sql_warehouses"]),
+    ("sql_queries", migrate_sql_queries, ["sql_queries", "sql_visualizations", "sql_alerts", "sql_dashboards",
+                                          "sql_widgets"]),
+    ("secret_scopes", migrate_secret_scopes, ["secret_scopes", "secrets"]),
+    ("workspace_folders", migrate_workspace_folders, ["directories"]),
+    ("clusters", migrate_clusters, ["clusters"]),
+    ("notebooks", migrate_notebooks, ["notebooks"]),
+    ("workspace_files", migrate_workspace_files, ["files"]),
+    ("git_repos", migrate_git_repos, ["repos"]),
+    ("jobs", migrate_jobs, ["jobs"]),
+    ("permissions", migrate_permissions, ["permissions"]),
+]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_mock_server(server_args: list, timeout: float = 600.0):
+    """Start a mock workspace in a subprocess and wait until it answers"""
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT, "--port", str(port)] + server_args,
+                               stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Mock server exited with code {process.returncode}")
+        try:
+            requests.get(f"{url}/__mock__/stats", timeout=1)
+            return process, url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Mock server did not start in time")
+
+def server_stats(url: str, reset: bool = False) -> dict:
+    endpoint = "reset" if reset else "stats"
+    return requests.get(f"{url}/__mock__/{endpoint}", timeout=10).json()
+
+def run_benchmark(name: str, func, counters: list, source_url: str, target_url: str,
+                  trace_memory: bool) -> dict:
+    """Run one migration entry point and collect its metrics"""
+    server_stats(source_url, reset=True)
+    created_before = server_stats(target_url, reset=True)["created"]
+
+    if trace_memory:
+        tracemalloc.start()
+    error = None
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Benchmark {name} failed: {e}")
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    source = server_stats(source_url)
+    target = server_stats(target_url)
+    objects = sum(target["created"].get(c, 0) - created_before.get(c, 0) for c in counters)
+    return {
+        "name": name,
+        "seconds": round(elapsed, 3),
+        "objects": objects,
+        "objects_per_sec": round(objects / elapsed, 1) if elapsed else 0.0,
+        "source_requests": sum(source["requests"].values()),
+        "target_requests": sum(target["requests"].values()),
+        "throttled": source["throttled"] + target["throttled"],
+        "peak_memory_mb": round(peak / 1024 / 1024, 1),
+        "requests_by_endpoint": {"source": source["requests"], "target": target["requests"]},
+        "error": error,
+    }
+
+def print_report(results: list):
+    header = (f"{'Benchmark':<20}{'Seconds':>10}{'Objects':>10}{'Obj/sec':>10}"
+              f"{'Src req':>10}{'Tgt req':>10}{'429s':>8}{'Peak MB':>10}")
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['name']:<20}{r['seconds']:>10.2f}{r['objects']:>10}{r['objects_per_sec']:>10.1f}"
+              f"{r['source_requests']:>10}{r['target_requests']:>10}{r['throttled']:>8}"
+              f"{r['peak_memory_mb']:>10.1f}" + ("  FAILED" if r['error'] else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark migration scripts against a mock workspace')
+    add_server_arguments(parser)
+    parser.add_argument('--only', nargs='+', choices=[b[0] for b in BENCHMARKS],
+                        help='Run only these benchmarks (in dependency order)')
+    parser.add_argument('--log-level', default='WARNING', help='Log level for the migration scripts')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip tracemalloc (faster, no peak memory figures)')
+    parser.add_argument('--output', default=None, help='Path of the JSON results file')
+    args = parser.parse_args()
+
+    server_args = []
+    for option in ("notebooks", "jobs", "clusters", "policies", "instance_pools", "warehouses", "queries", "scopes",
+                   "repos", "groups", "catalogs", "files", "latency_ms", "jitter_ms", "rate_limit", "error_rate",
+                   "warehouse_quota", "warehouse_stockouts"):
+        server_args += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    target_args = ["--empty"] + server_args[server_args.index("--latency-ms"):]
+
+    output = args.output or f"benchmark_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output = os.path.abspath(output)
+
+    print(f"Starting mock workspaces ({args.notebooks} notebooks, {args.jobs} jobs)...")
+    source_process, source_url = start_mock_server(server_args)
+    target_process, target_url = start_mock_server(target_args)
+
+    results = []
+    original_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="migration_benchmark_") as workdir:
+            os.chdir(workdir)
+            config = {
+                "source": {"host": source_url, "token": "mock-source-token"},
+                "target": {"host": target_url, "token": "mock-target-token"},
+                "migration_settings": {"log_level": args.log_level, "log_sample_every": 0},
+            }
+            with open("config.json", 'w') as f:
+                json.dump(config, f, indent=2)
+            setup_logging(config)
+
+            for name, func, counters in BENCHMARKS:
+                if args.only and name not in args.only:
+                    continue
+                print(f"Running {name}...")
+                results.append(run_benchmark(name, func, counters, source_url, target_url,
+                                             not args.no_memory))
+    finally:
+        os.chdir(original_cwd)
+        source_process.terminate()
+        target_process.terminate()
+
+    print_report(results)
+    with open(output, 'w') as f:
+        json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    print(f"\nResults saved to {output}")
+    return 0 if not any(r['error'] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Record/replay cassettes for the Databricks REST API
+
+A cassette is a gzip-compressed JSON file holding the responses to read (GET)
+requests made through utils.make_api_request. Record once against a real
+workspace, then replay offline at full speed for repeatable benchmarks and
+for debugging transform logic against production-shaped data.
+
+In replay mode:
+  - GET requests are answered from the cassette (repeated requests replay
+    the recorded responses in order, then keep returning the last one)
+  - GET requests that were never recorded get a 404 response
+  - writes (POST/PUT/PATCH/DELETE) are not sent anywhere and return 200 {}
+  - id_mappings.json is left untouched, as the writes return no target IDs
+"""
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+def request_key(method: str, url: str, data: Dict[str, Any] = None) -> str:
+    """Build the lookup key for a request: method, URL and sorted query parameters"""
+    key = f"{method.upper()} {url}"
+    if data:
+        key += "?" + urlencode(sorted((k, str(v)) for k, v in data.items()))
+    return key
+
+def _build_response(method: str, url: str, status: int, body: bytes,
+                    content_type: str = "application/json") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response._content_consumed = True
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+    response.url = url
+    response.encoding = "utf-8"
+    response.reason = "OK" if status < 400 else "Replayed Error"
+    response.request = requests.Request(method.upper(), url).prepare()
+    return response
+
+class Cassette:
+    """Recorded API interactions keyed by request"""
+
+    def __init__(self, path: str, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.interactions = defaultdict(list)
+        self._replay_positions = defaultdict(int)
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self.load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def load(self):
+        """Load interactions from disk"""
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version in {self.path}")
+        self.interactions = defaultdict(list, payload["interactions"])
+        logger.info(f"Loaded cassette {self.path} ({len(self.interactions)} recorded requests)")
+
+    def save(self):
+        """Write interactions to disk (atomically)"""
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            payload = {"version": CASSETTE_VERSION, "interactions": dict(self.interactions)}
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        logger.info(f"Cassette saved to {self.path} ({len(payload['interactions'])} recorded requests)")
+
+    def record(self, method: str, url: str, data: Dict[str, Any], response: requests.Response):
+        """Store the response to a read request"""
+        if method.upper() != "GET":
+            return
+        entry = {
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+        }
+        try:
+            entry["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(response.content).decode()
+        with self._lock:
+            self.interactions[request_key(method, url, data)].append(entry)
+
+    def play(self, method: str, url: str, data: Dict[str, Any] = None) -> requests.Response:
+        """Return the recorded response for a request"""
+        if method.upper() != "GET":
+            return _build_response(method, url, 200, b"{}")
+
+        key = request_key(method, url, data)
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                body = json.dumps({"error_code": "NOT_RECORDED",
+                                   "message": f"No recorded response for {key}"}).encode()
+                return _build_response(method, url, 404, body)
+            position = self._replay_positions[key]
+            self._replay_positions[key] = min(position + 1, len(entries) - 1)
+            entry = entries[position]
+
+        if "body_b64" in entry:
+            body = base64.b64decode(entry["body_b64"])
+        else:
+            body = entry["body"].encode("utf-8")
+        return _build_response(method, url, entry["status"], body, entry["content_type"])
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Shared inventory snapshot of a Databricks workspace
+
+Crawls a workspace once, concurrently, into a local SQLite store. With
+use_inventory_snapshot enabled, the migration scripts, validate_migration.py
+and export_to_terraform.py read their listings from the snapshot when a fresh
+one exists for the workspace host, instead of re-listing everything on every
+run. Without it, snapshots are only shared within one run_all_migrations.py
+invocation (e.g. the workspace listing taken by the folder migration is reused
+by the notebook and file migrations).
+
+Settings (migration_settings in config.json):
+  - inventory_path:          SQLite file (default: inventory.db)
+  - inventory_ttl_minutes:   snapshots older than this are ignored (default: 60)
+  - use_inventory_snapshot:  read snapshots taken by earlier runs (default: false)
+
+Usage:
+    python inventory.py                          # snapshot the source workspace
+    python inventory.py --types clusters jobs    # refresh selected object types
+    python inventory.py --workspace target
+    python inventory.py --info
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from utils import (load_config, get_headers, make_api_request, list_all, run_parallel,
+                   setup_logging, add_common_arguments, use_cassette, DEFAULT_MAX_WORKERS)
+from profiling import profile_phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INVENTORY_PATH = "inventory.db"
+DEFAULT_TTL_MINUTES = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    host TEXT NOT NULL,
+    object_type TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    object_count INTEGER NOT NULL,
+    PRIMARY KEY (host, object_type)
+);
+CREATE TABLE IF NOT EXISTS objects (
+    host TEXT NOT NULL,
+    object_type TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    name TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (host, object_type, object_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_by_name ON objects (host, object_type, name);
+"""
+
+_settings = None
+# Start of the current run_all invocation; snapshots taken since are always usable
+_run_started_at = None
+# (host, object type) pairs whose snapshot age has been logged
+_reported = set()
+
+def configure_inventory(config: Dict[str, Any]):
+    """Set inventory settings from a loaded configuration"""
+    global _settings
+    migration_settings = config.get('migration_settings', {})
+    _settings = {
+        "path": migration_settings.get('inventory_path', DEFAULT_INVENTORY_PATH),
+        "ttl_minutes": migration_settings.get('inventory_ttl_minutes', DEFAULT_TTL_MINUTES),
+        "enabled": migration_settings.get('use_inventory_snapshot', False),
+        "max_workers": migration_settings.get('max_workers', DEFAULT_MAX_WORKERS),
+    }
+
+def begin_run():
+    """Share snapshots taken from now on across the rest of this process (one run_all invocation),
+    even when use_inventory_snapshot is off"""
+    global _run_started_at
+    _run_started_at = time.time()
+
+def snapshots_enabled() -> bool:
+    """Whether snapshots are read and written (opted in, or inside a run_all invocation)"""
+    return get_settings()["enabled"] or _run_started_at is not None
+
+def get_settings() -> Dict[str, Any]:
+    """Inventory settings (read from config.json on first use unless configured)"""
+    if _settings is None:
+        try:
+            configure_inventory(load_config())
+        except (FileNotFoundError, json.JSONDecodeError):
+            configure_inventory({})
+    return _settings
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _normalize_host(host: str) -> str:
+    return host.rstrip('/')
+
+# Crawlers: each returns a list of (object_key, name, payload)
+
+def crawl_workspace_objects(host: str, token: str, root: str = "/", max_workers: int = DEFAULT_MAX_WORKERS):
+    """Crawl the workspace tree breadth-first, listing each level's directories concurrently"""
+    url = f"{host}/api/2.0/workspace/list"
+    headers = get_headers(token)
+
+    def list_directory(path: str):
+        response = make_api_request("GET", url, headers, {"path": path})
+        return response.json().get('objects', [])
+
+    objects = []
+    frontier = [root]
+    while frontier:
+        next_frontier = []
+        for children in run_parallel(list_directory, frontier, max_workers):
+            for obj in children:
+                objects.append(obj)
+                if obj.get('object_type') == 'DIRECTORY':
+                    next_frontier.append(obj['path'])
+        frontier = next_frontier
+    return [(obj['path'], obj['path'], obj) for obj in objects]
+
+def crawl_groups(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """List groups and their members"""
+    headers = get_headers(token)
+    response = make_api_request("GET", f"{host}/api/2.0/groups/list", headers)
+    group_names = response.json().get('group_names', [])
+
+    def with_members(group_name: str):
+        response = make_api_request("GET", f"{host}/api/2.0/groups/list-members", headers,
+                                    {"group_name": group_name})
+        return {"group_name": group_name, "members": response.json().get('members', [])}
+
+    return [(g['group_name'], g['group_name'], g) for g in run_parallel(with_members, group_names, max_workers)]
+
+def crawl_secret_scopes(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """List secret scopes and the secret keys in each scope"""
+    headers = get_headers(token)
+    response = make_api_request("GET", f"{host}/api/2.0/secrets/scopes/list", headers)
+    scopes = response.json().get('scopes', [])
+
+    def with_secrets(scope: dict):
+        response = make_api_request("GET", f"{host}/api/2.0/secrets/list", headers,
+                                    {"scope": scope['name']})
+        return dict(scope, secrets=response.json().get('secrets', []))
+
+    return [(s['name'], s['name'], s) for s in run_parallel(with_secrets, scopes, max_workers)]
+
+def crawl_clusters(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """List all-purpose clusters (job clusters are created per run and never migrated)"""
+    clusters = list_all(host, token, "/api/2.0/clusters/list", "clusters")
+    return [(c['cluster_id'], c.get('cluster_name'), c) for c in clusters if c.get('cluster_source') != 'JOB']
+
+def crawl_cluster_policies(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    policies = list_all(host, token, "/api/2.0/policies/clusters/list", "policies")
+    return [(p['policy_id'], p.get('name'), p) for p in policies]
+
+def crawl_instance_pools(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    pools = list_all(host, token, "/api/2.0/instance-pools/list", "instance_pools")
+    return [(p['instance_pool_id'], p.get('instance_pool_name'), p) for p in pools]
+
+def crawl_jobs(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    jobs = list_all(host, token, "/api/2.1/jobs/list", "jobs", {"limit": 100, "expand_tasks": "true"})
+    return [(str(j['job_id']), j.get('settings', {}).get('name'), j) for j in jobs]
+
+def crawl_sql_warehouses(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    warehouses = list_all(host, token, "/api/2.0/sql/warehouses", "warehouses")
+    return [(w['id'], w.get('name'), w) for w in warehouses]
+
+def crawl_repos(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    repos = list_all(host, token, "/api/2.0/repos", "repos", token_param="next_page_token")
+    return [(str(r['id']), r.get('path'), r) for r in repos]
+
+CRAWLERS = {
+    "groups": crawl_groups,
+    "cluster_policies": crawl_cluster_policies,
+    "instance_pools": crawl_instance_pools,
+    "clusters": crawl_clusters,
+    "sql_warehouses": crawl_sql_warehouses,
+    "secret_scopes": crawl_secret_scopes,
+    "repos": crawl_repos,
+    "jobs": crawl_jobs,
+    "workspace_objects": crawl_workspace_objects,
+}
+
+def crawl(host: str, token: str, object_types: List[str] = None,
+          max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Optional[list]]:
+    """Crawl object types concurrently; a failed type maps to None"""
+    object_types = object_types or list(CRAWLERS)
+
+    def crawl_type(object_type: str):
+        start = time.perf_counter()
+        try:
+            rows = CRAWLERS[object_type](host, token, max_workers=max_workers)
+            logger.info(f"  {object_type}: {len(rows)} objects ({time.perf_counter() - start:.1f}s)")
+            return rows
+        except Exception as e:
+            logger.error(f"  {object_type}: crawl failed - {e}")
+            return None
+
+    results = run_parallel(crawl_type, object_types, max_workers=len(object_types))
+    return dict(zip(object_types, results))
+
+def save_snapshot(host: str, crawled: Dict[str, Optional[list]], path: str = None):
+    """Replace the stored snapshot for each successfully crawled object type"""
+    path = path or get_settings()["path"]
+    host = _normalize_host(host)
+    now = time.time()
+    conn = _connect(path)
+    try:
+        with conn:
+            for object_type, rows in crawled.items():
+                if rows is None:
+                    continue
+                conn.execute("DELETE FROM objects WHERE host = ? AND object_type = ?", (host, object_type))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO objects (host, object_type, object_key, name, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    ((host, object_type, key, name, json.dumps(payload, separators=(',', ':')))
+                     for key, name, payload in rows))
+                conn.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                             (host, object_type, now, len(rows)))
+    finally:
+        conn.close()
+
+def _usable_snapshot_age(conn: sqlite3.Connection, host: str, object_type: str) -> Optional[float]:
+    """Age in seconds of the stored snapshot if it may be used: taken during this run, or opted in
+    and within the TTL"""
+    row = conn.execute("SELECT created_at FROM snapshots WHERE host = ? AND object_type = ?",
+                       (host, object_type)).fetchone()
+    if row is None:
+        return None
+    age = time.time() - row[0]
+    if _run_started_at is not None and row[0] >= _run_started_at:
+        return age
+    settings = get_settings()
+    return age if settings["enabled"] and age <= settings["ttl_minutes"] * 60 else None
+
+def load_snapshot(host: str, object_type: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the snapshotted objects of a type, or None if there is no usable snapshot"""
+    settings = get_settings()
+    if not snapshots_enabled() or not os.path.exists(settings["path"]):
+        return None
+    host = _normalize_host(host)
+    conn = _connect(settings["path"])
+    try:
+        age = _usable_snapshot_age(conn, host, object_type)
+        if age is None:
+            return None
+        rows = conn.execute("SELECT payload FROM objects WHERE host = ? AND object_type = ? "
+                            "ORDER BY object_key", (host, object_type)).fetchall()
+    finally:
+        conn.close()
+    logger.info(f"Using inventory snapshot for {object_type} ({len(rows)} objects, taken {age / 60:.1f} min ago)")
+    return [json.loads(row[0]) for row in rows]
+
+def load_snapshot_object(host: str, object_type: str, object_key: str) -> Optional[Dict[str, Any]]:
+    """Return one snapshotted object by key, or None if absent or not usable"""
+    settings = get_settings()
+    if not snapshots_enabled() or not os.path.exists(settings["path"]):
+        return None
+    host = _normalize_host(host)
+    conn = _connect(settings["path"])
+    try:
+        age = _usable_snapshot_age(conn, host, object_type)
+        if age is None:
+            return None
+        row = conn.execute("SELECT payload FROM objects WHERE host = ? AND object_type = ? "
+                           "AND object_key = ?", (host, object_type, str(object_key))).fetchone()
+    finally:
+        conn.close()
+    if (host, object_type) not in _reported:
+        _reported.add((host, object_type))
+        logger.info(f"Using inventory snapshot for {object_type} lookups (taken {age / 60:.1f} min ago)")
+    return json.loads(row[0]) if row else None
+
+def load_workspace_objects(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS) -> List[Dict[str, Any]]:
+    """Every object in the workspace tree: a usable snapshot, or a crawl that is saved as the
+    snapshot so the folder, notebook and file migrations share one listing"""
+    cached = load_snapshot(host, "workspace_objects")
+    if cached is not None:
+        return cached
+    rows = crawl_workspace_objects(host, token, max_workers=max_workers)
+    if snapshots_enabled():
+        save_snapshot(host, {"workspace_objects": rows})
+    return [obj for _, _, obj in rows]
+
+def snapshot_info(path: str = None) -> List[tuple]:
+    """Return (host, object_type, age_minutes, object_count) for every stored snapshot"""
+    path = path or get_settings()["path"]
+    if not os.path.exists(path):
+        return []
+    conn = _connect(path)
+    try:
+        rows = conn.execute("SELECT host, object_type, created_at, object_count FROM snapshots "
+                            "ORDER BY host, object_type").fetchall()
+    finally:
+        conn.close()
+    now = time.time()
+    return [(host, object_type, (now - created_at) / 60, count) for host, object_type, created_at, count in rows]
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshot a workspace inventory for reuse by other tools')
+    parser.add_argument('--workspace', choices=['source', 'target'], default='source',
+                        help='Which workspace to snapshot')
+    parser.add_argument('--types', nargs='+', choices=list(CRAWLERS),
+                        help='Object types to crawl (default: all)')
+    parser.add_argument('--info', action='store_true', help='Show stored snapshots and exit')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    config = load_config()
+    setup_logging(config)
+    configure_inventory(config)
+    settings = get_settings()
+
+    if args.info:
+        ttl = settings["ttl_minutes"]
+        for host, object_type, age, count in snapshot_info():
+            status = "fresh" if age <= ttl else "stale"
+            logger.info(f"{host} {object_type}: {count} objects, {age:.0f} min old ({status})")
+        return 0
+
+    workspace = config[args.workspace]
+    logger.info(f"Crawling {args.workspace} workspace {workspace['host']}...")
+    with use_cassette(args.record_cassette, args.replay_cassette), \
+            profile_phase("inventory_snapshot", enabled=args.profile, top_n=args.profile_top):
+        start = time.perf_counter()
+        crawled = crawl(workspace['host'], workspace['token'], args.types, settings["max_workers"])
+        save_snapshot(workspace['host'], crawled)
+    failed = [t for t, rows in crawled.items() if rows is None]
+    logger.info(f"Snapshot saved to {settings['path']} in {time.perf_counter() - start:.1f}s")
+    if not settings["enabled"]:
+        logger.warning("migration_settings.use_inventory_snapshot is off - set it to true for the other "
+                       "tools to read this snapshot")
+    if failed:
+        logger.error(f"Failed to crawl: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
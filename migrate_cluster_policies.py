@@ -3,13 +3,20 @@
 Migrate Cluster Policies from source to target Databricks workspace
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   fetch_details, get_max_workers, record_id_mappings, PER_OBJECT)
+from inventory import load_snapshot
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields a policies/clusters/list entry must carry to be used without a get call
+POLICY_DETAIL_FIELDS = ('policy_id', 'name', 'definition')
+
 def list_cluster_policies(host: str, token: str):
     """List all cluster policies"""
+    cached = load_snapshot(host, "cluster_policies")
+    if cached is not None:
+        return cached
     url = f"{host}/api/2.0/policies/clusters/list"
     headers = get_headers(token)
     try:
@@ -25,7 +32,7 @@ def get_cluster_policy(host: str, token: str, policy_id: str):
     headers = get_headers(token)
     data = {"policy_id": policy_id}
     try:
-        response = make_api_request("GET", url, headers)
+        response = make_api_request("GET", url, headers, data)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to get cluster policy {policy_id}: {e}")
@@ -49,7 +56,7 @@ def create_cluster_policy(host: str, token: str, policy_config: dict):
     
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created cluster policy: {data['name']}")
+        logger.info(f"Created cluster policy: {data['name']}", extra=PER_OBJECT)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to create cluster policy {data['name']}: {e}")
@@ -68,35 +75,43 @@ def migrate_cluster_policies():
     policies = list_cluster_policies(source['host'], source['token'])
     logger.info(f"Found {len(policies)} cluster policies")
     
-    # Get detailed config for each policy
-    policy_configs = []
+    # Skip built-in policies
+    custom_policies = []
     for policy in policies:
-        # Skip built-in policies
         if policy.get('is_default', False):
-            logger.info(f"Skipping built-in policy: {policy['name']}")
+            logger.info(f"Skipping built-in policy: {policy['name']}", extra=PER_OBJECT)
             continue
-            
-        policy_id = policy['policy_id']
-        config_detail = get_cluster_policy(source['host'], source['token'], policy_id)
-        if config_detail:
-            policy_configs.append(config_detail)
+        custom_policies.append(policy)
+    
+    # Get detailed config for each policy (list entries are complete unless trimmed)
+    policy_configs = fetch_details(
+        custom_policies,
+        lambda policy: get_cluster_policy(source['host'], source['token'], policy['policy_id']),
+        POLICY_DETAIL_FIELDS, get_max_workers(config))
     
     # Save backup
     save_backup(policy_configs, "cluster_policies")
     
     success_count = 0
     failed_count = 0
+    id_mapping = {}
     
     # Create policies in target
     for policy_config in policy_configs:
-        logger.info(f"Creating cluster policy: {policy_config['name']}")
+        logger.info(f"Creating cluster policy: {policy_config['name']}", extra=PER_OBJECT)
         
-        if create_cluster_policy(target['host'], target['token'], policy_config):
+        result = create_cluster_policy(target['host'], target['token'], policy_config)
+        if result:
             success_count += 1
+            if 'policy_id' in result:
+                id_mapping[policy_config['policy_id']] = result['policy_id']
         else:
             failed_count += 1
     
+    # Clusters and jobs translate policy IDs through this mapping
+    record_id_mappings("policy", id_mapping)
+    
     log_migration_result("Cluster Policies", success_count, failed_count)
 
 if __name__ == "__main__":
-    migrate_cluster_policies()
+    run_script(migrate_cluster_policies, "cluster_policies", __doc__)
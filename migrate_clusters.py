@@ -4,13 +4,41 @@ Migrate Clusters (All-Purpose) from source to target Databricks workspace
 Note: Job clusters are migrated as part of job definitions
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+import json
+from datetime import datetime
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   fetch_details, get_max_workers, get_id_mapping, match_ids_by_name, run_parallel,
+                   record_id_mappings, PER_OBJECT)
+from inventory import load_snapshot
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields a clusters/list entry must carry to be used without a clusters/get call
+CLUSTER_DETAIL_FIELDS = ('cluster_id', 'cluster_name', 'spark_version')
+
+# Library states that mean the library never resolved in the source cluster
+UNRESOLVED_LIBRARY_STATES = {'FAILED', 'SKIPPED'}
+# Library state of a library removed from the source cluster, pending its next restart
+UNINSTALL_PENDING_STATE = 'UNINSTALL_ON_RESTART'
+
+# Cluster fields holding workspace-specific IDs -> ID mapping type
+REMAPPED_FIELDS = {
+    'policy_id': 'policy',
+    'instance_pool_id': 'instance_pool',
+    'driver_instance_pool_id': 'instance_pool',
+}
+
+# ID mapping type -> (list endpoint, items key, name field) for matching by name
+ID_SOURCES = [
+    ("policy", "/api/2.0/policies/clusters/list", "policies", "name"),
+    ("instance_pool", "/api/2.0/instance-pools/list", "instance_pools", "instance_pool_name"),
+]
+
 def list_clusters(host: str, token: str):
     """List all clusters"""
+    cached = load_snapshot(host, "clusters")
+    if cached is not None:
+        return cached
     url = f"{host}/api/2.0/clusters/list"
     headers = get_headers(token)
     try:
@@ -26,7 +54,7 @@ def get_cluster(host: str, token: str, cluster_id: str):
     headers = get_headers(token)
     data = {"cluster_id": cluster_id}
     try:
-        response = make_api_request("GET", url, headers)
+        response = make_api_request("GET", url, headers, data)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to get cluster {cluster_id}: {e}")
@@ -57,25 +85,138 @@ def create_cluster(host: str, token: str, cluster_config: dict):
         "runtime_engine": cluster_config.get('runtime_engine', 'STANDARD')
     }
     
-    # Add policy if exists
-    if 'policy_id' in cluster_config:
-        data['policy_id'] = cluster_config['policy_id']
-    
-    # Add instance pool if exists
-    if 'instance_pool_id' in cluster_config:
-        data['instance_pool_id'] = cluster_config['instance_pool_id']
+    # Add policy and instance pools if they exist (IDs already translated for the target)
+    for field in REMAPPED_FIELDS:
+        if field in cluster_config:
+            data[field] = cluster_config[field]
     
     # Remove None values
     data = {k: v for k, v in data.items() if v is not None}
     
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created cluster: {data['cluster_name']}")
+        logger.info(f"Created cluster: {data['cluster_name']}", extra=PER_OBJECT)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to create cluster {data['cluster_name']}: {e}")
         return None
 
+def get_cluster_libraries(host: str, token: str, cluster_id: str):
+    """Get the library statuses of a cluster"""
+    url = f"{host}/api/2.0/libraries/cluster-status"
+    headers = get_headers(token)
+    data = {"cluster_id": cluster_id}
+    try:
+        response = make_api_request("GET", url, headers, data)
+        return response.json().get('library_statuses', [])
+    except Exception as e:
+        logger.error(f"Failed to get libraries of cluster {cluster_id}: {e}")
+        return None
+
+def split_libraries(library_statuses: list):
+    """Libraries to reinstall, libraries that failed to resolve in the source, and libraries
+    uninstalled from the source pending a restart
+
+    Libraries installed on all clusters are skipped (the target installs them itself)."""
+    to_install = []
+    unresolved = []
+    uninstall_pending = []
+    for status in library_statuses:
+        if status.get('is_library_for_all_clusters'):
+            continue
+        if status.get('status') in UNRESOLVED_LIBRARY_STATES:
+            unresolved.append({"library": status['library'], "status": status.get('status'),
+                               "messages": status.get('messages', [])})
+        elif status.get('status') == UNINSTALL_PENDING_STATE:
+            uninstall_pending.append(status['library'])
+        else:
+            to_install.append(status['library'])
+    return to_install, unresolved, uninstall_pending
+
+def install_libraries(host: str, token: str, cluster_id: str, libraries: list):
+    """Install all libraries on a cluster with one request"""
+    url = f"{host}/api/2.0/libraries/install"
+    headers = get_headers(token)
+    data = {"cluster_id": cluster_id, "libraries": libraries}
+    try:
+        make_api_request("POST", url, headers, data)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to install {len(libraries)} libraries on cluster {cluster_id}: {e}")
+        return False
+
+def migrate_cluster_libraries(config: dict, cluster_configs: list, library_statuses: dict, id_mapping: dict):
+    """Reinstall source libraries on the migrated clusters (one batched install per cluster)
+
+    library_statuses maps source cluster ID -> library statuses (None if unavailable).
+    Returns the libraries that could not be migrated, per cluster."""
+    target = config['target']
+    installs = []
+    issues = []
+    for cluster_config in cluster_configs:
+        name = cluster_config['cluster_name']
+        statuses = library_statuses.get(cluster_config['cluster_id'])
+        if statuses is None:
+            issues.append({"cluster_name": name, "error": "library status unavailable"})
+            continue
+        to_install, unresolved, uninstall_pending = split_libraries(statuses)
+        if unresolved or uninstall_pending:
+            issue = {"cluster_name": name, "unresolved": unresolved, "uninstall_pending": uninstall_pending}
+            issues.append({k: v for k, v in issue.items() if v})
+        target_id = id_mapping.get(cluster_config['cluster_id'])
+        if to_install and target_id:
+            installs.append((name, target_id, to_install))
+    
+    results = run_parallel(lambda install: install_libraries(target['host'], target['token'], *install[1:]),
+                           installs, get_max_workers(config))
+    for (name, _, libraries), installed in zip(installs, results):
+        if installed:
+            logger.info(f"Queued {len(libraries)} libraries on cluster {name}", extra=PER_OBJECT)
+        else:
+            issues.append({"cluster_name": name, "install_failed": libraries})
+    
+    installed_count = sum(len(libraries) for (_, _, libraries), ok in zip(installs, results) if ok)
+    logger.info(f"Queued {installed_count} libraries on {results.count(True)} clusters")
+    return issues
+
+def build_id_mappings(config: dict):
+    """Policy and instance pool ID maps: same-name objects, recorded migration results, then config"""
+    source = config['source']
+    target = config['target']
+    mappings = {}
+    for object_type, endpoint, items_key, name_field in ID_SOURCES:
+        try:
+            matched = match_ids_by_name(source, target, endpoint, items_key, name_field, f"{object_type}_id")
+        except Exception as e:
+            logger.warning(f"Could not match {object_type} IDs by name: {e}")
+            matched = {}
+        mappings[object_type] = get_id_mapping(config, object_type, matched)
+        logger.info(f"Resolved {len(mappings[object_type])} {object_type} ID mappings")
+    return mappings
+
+def remap_cluster_ids(cluster_configs: list, mappings: dict):
+    """Translate policy and instance pool IDs for all clusters at once
+
+    Returns (clusters ready to create, clusters with an ID that has no target equivalent)."""
+    ready = []
+    unresolved = []
+    for cluster_config in cluster_configs:
+        remapped = dict(cluster_config)
+        missing = []
+        for field, object_type in REMAPPED_FIELDS.items():
+            source_id = cluster_config.get(field)
+            if source_id is None:
+                continue
+            if source_id in mappings[object_type]:
+                remapped[field] = mappings[object_type][source_id]
+            else:
+                missing.append(f"{field}={source_id}")
+        if missing:
+            unresolved.append((cluster_config, missing))
+        else:
+            ready.append(remapped)
+    return ready, unresolved
+
 def migrate_clusters():
     """Main migration function for clusters"""
     config = load_config()
@@ -93,31 +234,56 @@ def migrate_clusters():
     all_purpose_clusters = [c for c in clusters if c.get('cluster_source') != 'JOB']
     logger.info(f"Found {len(all_purpose_clusters)} all-purpose clusters")
     
-    # Get detailed config for each cluster
-    cluster_configs = []
-    for cluster in all_purpose_clusters:
-        cluster_id = cluster['cluster_id']
-        config_detail = get_cluster(source['host'], source['token'], cluster_id)
-        if config_detail:
-            cluster_configs.append(config_detail)
+    # Get detailed config for each cluster (list entries are complete unless trimmed)
+    cluster_configs = fetch_details(
+        all_purpose_clusters,
+        lambda cluster: get_cluster(source['host'], source['token'], cluster['cluster_id']),
+        CLUSTER_DETAIL_FIELDS, get_max_workers(config))
+    
+    # Fetch library status of every cluster concurrently
+    statuses = run_parallel(
+        lambda cluster: get_cluster_libraries(source['host'], source['token'], cluster['cluster_id']),
+        cluster_configs, get_max_workers(config))
+    library_statuses = {c['cluster_id']: status for c, status in zip(cluster_configs, statuses)}
     
     # Save backup
     save_backup(cluster_configs, "clusters")
+    save_backup(library_statuses, "cluster_libraries")
+    
+    # Translate policy and instance pool IDs before creating anything
+    cluster_configs, unresolved = remap_cluster_ids(cluster_configs, build_id_mappings(config))
+    for cluster_config, missing in unresolved:
+        logger.error(f"Skipping cluster {cluster_config['cluster_name']}: no target ID for {', '.join(missing)} "
+                     f"(migrate policies/instance pools first or add mappings in config.json)")
     
     success_count = 0
-    failed_count = 0
+    failed_count = len(unresolved)
+    id_mapping = {}
     
     # Create clusters in target (they will be in TERMINATED state)
     for cluster_config in cluster_configs:
-        logger.info(f"Creating cluster: {cluster_config['cluster_name']}")
+        logger.info(f"Creating cluster: {cluster_config['cluster_name']}", extra=PER_OBJECT)
         
-        if create_cluster(target['host'], target['token'], cluster_config):
+        result = create_cluster(target['host'], target['token'], cluster_config)
+        if result:
             success_count += 1
+            if 'cluster_id' in result:
+                id_mapping[cluster_config['cluster_id']] = result['cluster_id']
         else:
             failed_count += 1
     
+    record_id_mappings("cluster", id_mapping)
+    
+    # Libraries are installed once the clusters exist (they are applied when a cluster starts)
+    library_issues = migrate_cluster_libraries(config, cluster_configs, library_statuses, id_mapping)
+    if library_issues:
+        report_file = f"cluster_library_issues_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w') as f:
+            json.dump(library_issues, f, indent=2)
+        logger.warning(f"{len(library_issues)} clusters have libraries that were not migrated - see {report_file}")
+    
     log_migration_result("Clusters", success_count, failed_count)
     logger.info("Note: Clusters created in TERMINATED state. Start them manually as needed.")
 
 if __name__ == "__main__":
-    migrate_clusters()
+    run_script(migrate_clusters, "clusters", __doc__)
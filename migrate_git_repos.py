@@ -1,20 +1,27 @@
 #!/usr/bin/env python3
 """
 Migrate Git Repos integration from source to target Databricks workspace
+Note: Repos are cloned on the provider's default branch and then switched to the source's
+branch or tag. The Repos API cannot check out an arbitrary commit, so repos whose head
+commit differs from the source afterwards are reported
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   fetch_details, run_parallel, get_max_workers, get_rate_limiter, list_all, PER_OBJECT)
+from inventory import load_snapshot
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields a repos list entry must carry to be used without a get call
+REPO_DETAIL_FIELDS = ('id', 'path', 'url', 'provider')
+
 def list_repos(host: str, token: str):
     """List all Git repos"""
-    url = f"{host}/api/2.0/repos"
-    headers = get_headers(token)
+    cached = load_snapshot(host, "repos")
+    if cached is not None:
+        return cached
     try:
-        response = make_api_request("GET", url, headers)
-        return response.json().get('repos', [])
+        return list_all(host, token, "/api/2.0/repos", "repos", token_param="next_page_token")
     except Exception as e:
         logger.error(f"Failed to list repos: {e}")
         return []
@@ -31,7 +38,7 @@ def get_repo(host: str, token: str, repo_id: str):
         return None
 
 def create_repo(host: str, token: str, repo_config: dict):
-    """Create a Git repo"""
+    """Create a Git repo (cloned on the provider's default branch)"""
     url = f"{host}/api/2.0/repos"
     headers = get_headers(token)
     
@@ -41,22 +48,61 @@ def create_repo(host: str, token: str, repo_config: dict):
         "path": repo_config.get('path')
     }
     
-    # Add branch if specified
-    if 'branch' in repo_config and repo_config['branch']:
-        data['branch'] = repo_config['branch']
-    
-    # Add tag if specified
-    if 'tag' in repo_config and repo_config['tag']:
-        data['tag'] = repo_config['tag']
+    # Keep sparse checkout patterns if specified
+    if repo_config.get('sparse_checkout'):
+        data['sparse_checkout'] = repo_config['sparse_checkout']
     
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created Git repo: {data['path']}")
+        logger.info(f"Created Git repo: {data['path']}", extra=PER_OBJECT)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to create Git repo {data['path']}: {e}")
         return None
 
+def checkout_repo(host: str, token: str, repo_id: str, repo_config: dict):
+    """Check out the source repo's tag or branch on a migrated repo"""
+    url = f"{host}/api/2.0/repos/{repo_id}"
+    headers = get_headers(token)
+    
+    if repo_config.get('tag'):
+        data = {"tag": repo_config['tag']}
+    elif repo_config.get('branch'):
+        data = {"branch": repo_config['branch']}
+    else:
+        return {}
+    
+    try:
+        response = make_api_request("PATCH", url, headers, data)
+        logger.info(f"Checked out {next(iter(data.values()))} in Git repo: {repo_config['path']}", extra=PER_OBJECT)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to check out {next(iter(data.values()))} in Git repo {repo_config['path']}: {e}")
+        return None
+
+def migrate_repo(host: str, token: str, repo_config: dict, limiter):
+    """Create a repo and check out the source branch/tag
+
+    Returns 'created', 'drifted' (checked out but on a different commit than the source) or None."""
+    logger.info(f"Creating Git repo: {repo_config['path']}", extra=PER_OBJECT)
+    limiter.acquire()
+    result = create_repo(host, token, repo_config)
+    if not result or 'id' not in result:
+        return None
+    
+    limiter.acquire()
+    checked_out = checkout_repo(host, token, result['id'], repo_config)
+    if checked_out is None:
+        return None
+    
+    source_commit = repo_config.get('head_commit_id')
+    target_commit = checked_out.get('head_commit_id', result.get('head_commit_id'))
+    if source_commit and target_commit and source_commit != target_commit:
+        logger.warning(f"Git repo {repo_config['path']} is at {target_commit[:12]}, "
+                       f"source was at {source_commit[:12]}")
+        return 'drifted'
+    return 'created'
+
 def migrate_git_repos():
     """Main migration function for Git repos"""
     config = load_config()
@@ -70,30 +116,28 @@ def migrate_git_repos():
     repos = list_repos(source['host'], source['token'])
     logger.info(f"Found {len(repos)} Git repos")
     
-    # Get detailed config for each repo
-    repo_configs = []
-    for repo in repos:
-        repo_id = repo['id']
-        config_detail = get_repo(source['host'], source['token'], repo_id)
-        if config_detail:
-            repo_configs.append(config_detail)
+    # Get detailed config for each repo (list entries are complete unless trimmed)
+    repo_configs = fetch_details(
+        repos,
+        lambda repo: get_repo(source['host'], source['token'], repo['id']),
+        REPO_DETAIL_FIELDS, get_max_workers(config))
     
     # Save backup
     save_backup(repo_configs, "git_repos")
     
-    success_count = 0
-    failed_count = 0
-    
-    # Create repos in target
-    for repo_config in repo_configs:
-        logger.info(f"Creating Git repo: {repo_config['path']}")
-        
-        if create_repo(target['host'], target['token'], repo_config):
-            success_count += 1
-        else:
-            failed_count += 1
+    # Create repos in target concurrently, within the requests_per_second budget
+    limiter = get_rate_limiter(config)
+    results = run_parallel(lambda repo_config: migrate_repo(target['host'], target['token'], repo_config, limiter),
+                           repo_configs, get_max_workers(config))
     
+    success_count = sum(1 for result in results if result)
+    failed_count = len(results) - success_count
     log_migration_result("Git Repos", success_count, failed_count)
+    
+    drifted = results.count('drifted')
+    if drifted:
+        logger.warning(f"{drifted} Git repos are not at the source commit (the branch moved since the source "
+                       f"was checked out) - pull or reset them manually if the exact commit matters")
 
 if __name__ == "__main__":
-    migrate_git_repos()
+    run_script(migrate_git_repos, "git_repos", __doc__)
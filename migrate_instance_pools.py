@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Migrate Instance Pools from source to target Databricks workspace
+Note: Pools are created without idle instances so that instance spin-up does not
+compete with migration traffic. Pre-warm them once the migration is done with
+--prewarm (run_all_migrations.py does this when migration_settings.prewarm_instance_pools is true)
+"""
+import logging
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   list_all, run_parallel, get_max_workers, load_id_mappings, record_id_mappings, PER_OBJECT)
+from inventory import load_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Pool settings carried over to the target (IDs, state and stats are workspace-specific)
+POOL_FIELDS = [
+    'instance_pool_name', 'node_type_id', 'max_capacity', 'idle_instance_autotermination_minutes',
+    'enable_elastic_disk', 'disk_spec', 'preloaded_spark_versions', 'preloaded_docker_images',
+    'custom_tags', 'aws_attributes', 'azure_attributes', 'gcp_attributes', 'node_type_flexibility',
+]
+
+def list_instance_pools(host: str, token: str):
+    """List all instance pools"""
+    cached = load_snapshot(host, "instance_pools")
+    if cached is not None:
+        return cached
+    try:
+        return list_all(host, token, "/api/2.0/instance-pools/list", "instance_pools")
+    except Exception as e:
+        logger.error(f"Failed to list instance pools: {e}")
+        return []
+
+def create_instance_pool(host: str, token: str, pool_config: dict):
+    """Create an instance pool with no idle instances"""
+    url = f"{host}/api/2.0/instance-pools/create"
+    headers = get_headers(token)
+    
+    data = {k: pool_config[k] for k in POOL_FIELDS if pool_config.get(k) is not None}
+    data['min_idle_instances'] = 0
+    
+    try:
+        response = make_api_request("POST", url, headers, data)
+        logger.info(f"Created instance pool: {data['instance_pool_name']}", extra=PER_OBJECT)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to create instance pool {data['instance_pool_name']}: {e}")
+        return None
+
+def set_min_idle_instances(host: str, token: str, pool_id: str, pool_config: dict, min_idle_instances: int):
+    """Edit a pool's idle instance count (edit requires the pool's name and node type)"""
+    url = f"{host}/api/2.0/instance-pools/edit"
+    headers = get_headers(token)
+    data = {
+        "instance_pool_id": pool_id,
+        "instance_pool_name": pool_config['instance_pool_name'],
+        "node_type_id": pool_config['node_type_id'],
+        "min_idle_instances": min_idle_instances,
+    }
+    for field in ('max_capacity', 'idle_instance_autotermination_minutes', 'custom_tags'):
+        if pool_config.get(field) is not None:
+            data[field] = pool_config[field]
+    
+    try:
+        make_api_request("POST", url, headers, data)
+        logger.info(f"Pre-warming instance pool {pool_config['instance_pool_name']}: "
+                    f"{min_idle_instances} idle instances", extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to pre-warm instance pool {pool_config['instance_pool_name']}: {e}")
+        return False
+
+def prewarm_instance_pools():
+    """Restore the source pools' min_idle_instances on the migrated pools"""
+    config = load_config()
+    source = config['source']
+    target = config['target']
+    
+    id_mapping = load_id_mappings("instance_pool")
+    pools = [pool for pool in list_instance_pools(source['host'], source['token'])
+             if pool.get('min_idle_instances') and pool['instance_pool_id'] in id_mapping]
+    # Largest pools first so the most capacity is requested earliest
+    pools.sort(key=lambda pool: pool['min_idle_instances'], reverse=True)
+    logger.info(f"Pre-warming {len(pools)} instance pools...")
+    
+    results = run_parallel(
+        lambda pool: set_min_idle_instances(target['host'], target['token'], id_mapping[pool['instance_pool_id']],
+                                            pool, pool['min_idle_instances']),
+        pools, get_max_workers(config))
+    log_migration_result("Instance Pool Pre-warm", results.count(True), results.count(False))
+
+def migrate_instance_pools():
+    """Main migration function for instance pools"""
+    config = load_config()
+    source = config['source']
+    target = config['target']
+    
+    logger.info("Starting instance pool migration...")
+    
+    # Get instance pools from source (list entries carry the full pool definition)
+    logger.info("Fetching instance pools from source workspace...")
+    pools = list_instance_pools(source['host'], source['token'])
+    logger.info(f"Found {len(pools)} instance pools")
+    
+    # Save backup
+    save_backup(pools, "instance_pools")
+    
+    # Create pools in target concurrently
+    results = run_parallel(lambda pool: create_instance_pool(target['host'], target['token'], pool),
+                           pools, get_max_workers(config))
+    
+    id_mapping = {pool['instance_pool_id']: result['instance_pool_id']
+                  for pool, result in zip(pools, results) if result and 'instance_pool_id' in result}
+    success_count = sum(1 for result in results if result)
+    failed_count = len(results) - success_count
+    
+    # Clusters and jobs translate instance pool IDs through this mapping
+    record_id_mappings("instance_pool", id_mapping)
+    
+    log_migration_result("Instance Pools", success_count, failed_count)
+    
+    idle = sum(pool.get('min_idle_instances', 0) for pool in pools)
+    if idle:
+        logger.info(f"Note: Pools were created without idle instances ({idle} in the source). "
+                    f"Run 'python migrate_instance_pools.py --prewarm' once the migration is done.")
+
+if __name__ == "__main__":
+    run_script(migrate_instance_pools, "instance_pools", __doc__,
+               actions={"prewarm": (prewarm_instance_pools, "Restore min_idle_instances on migrated pools")})
@@ -3,13 +3,17 @@
 Migrate Jobs/Workflows from source to target Databricks workspace
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   record_id_mappings, get_path_rewriter, PathRewriter, PER_OBJECT)
+from inventory import load_snapshot
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def list_jobs(host: str, token: str):
     """List all jobs"""
+    cached = load_snapshot(host, "jobs")
+    if cached is not None:
+        return cached
     url = f"{host}/api/2.1/jobs/list"
     headers = get_headers(token)
     all_jobs = []
@@ -21,7 +25,7 @@ def list_jobs(host: str, token: str):
         
         while has_more:
             data = {"limit": limit, "offset": offset}
-            response = make_api_request("GET", url, headers)
+            response = make_api_request("GET", url, headers, data)
             result = response.json()
             
             jobs = result.get('jobs', [])
@@ -41,12 +45,28 @@ def get_job(host: str, token: str, job_id: str):
     headers = get_headers(token)
     data = {"job_id": job_id}
     try:
-        response = make_api_request("GET", url, headers)
+        response = make_api_request("GET", url, headers, data)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to get job {job_id}: {e}")
         return None
 
+def rewrite_job_paths(settings: dict, rewriter: PathRewriter):
+    """Point workspace notebook and Python file paths of a job at their target locations;
+    returns the number of paths changed"""
+    changed = 0
+    for task in [settings] + settings.get('tasks', []):
+        for task_type, field in (('notebook_task', 'notebook_path'), ('spark_python_task', 'python_file')):
+            spec = task.get(task_type)
+            # Paths in Git-sourced tasks are relative to the repository
+            if not spec or not spec.get(field, '').startswith('/') or spec.get('source') == 'GIT':
+                continue
+            rewritten = rewriter.rewrite_path(spec[field])
+            if rewritten != spec[field]:
+                spec[field] = rewritten
+                changed += 1
+    return changed
+
 def create_job(host: str, token: str, job_config: dict):
     """Create a job"""
     url = f"{host}/api/2.1/jobs/create"
@@ -62,7 +82,7 @@ def create_job(host: str, token: str, job_config: dict):
     
     try:
         response = make_api_request("POST", url, headers, settings)
-        logger.info(f"Created job: {settings.get('name', 'Unnamed')}")
+        logger.info(f"Created job: {settings.get('name', 'Unnamed')}", extra=PER_OBJECT)
         return response.json()
     except Exception as e:
         logger.error(f"Failed to create job {settings.get('name', 'Unnamed')}: {e}")
@@ -95,19 +115,32 @@ def migrate_jobs():
     
     success_count = 0
     failed_count = 0
+    id_mapping = {}
+    
+    # Notebooks under remapped home folders and prefixes moved with the notebook migration
+    rewriter = get_path_rewriter(config)
+    if rewriter.active:
+        changed = sum(rewrite_job_paths(job_config.get('settings', {}), rewriter) for job_config in job_configs)
+        logger.info(f"Rewrote {changed} notebook and file paths in jobs")
     
     # Create jobs in target
     for job_config in job_configs:
         job_name = job_config.get('settings', {}).get('name', 'Unnamed')
-        logger.info(f"Creating job: {job_name}")
+        logger.info(f"Creating job: {job_name}", extra=PER_OBJECT)
         
-        if create_job(target['host'], target['token'], job_config):
+        result = create_job(target['host'], target['token'], job_config)
+        if result:
             success_count += 1
+            if 'job_id' in result:
+                id_mapping[str(job_config['job_id'])] = str(result['job_id'])
         else:
             failed_count += 1
     
+    # Permissions migration looks up the target jobs through this mapping
+    record_id_mappings("job", id_mapping)
+    
     log_migration_result("Jobs", success_count, failed_count)
     logger.warning("IMPORTANT: Review and update cluster IDs, notebook paths, and file paths in migrated jobs")
 
 if __name__ == "__main__":
-    migrate_jobs()
+    run_script(migrate_jobs, "jobs", __doc__)
@@ -4,54 +4,74 @@ Migrate Notebooks from source to target Databricks workspace
 """
 import logging
 import base64
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   get_max_workers, get_path_rewriter, streamed_size, transfer_workspace_object, PathRewriter,
+                   PER_OBJECT, DEFAULT_MAX_WORKERS, STREAM_CHUNK_SIZE)
+from inventory import load_workspace_objects
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def list_workspace_objects(host: str, token: str, path: str = "/"):
-    """List all objects in a workspace path"""
-    url = f"{host}/api/2.0/workspace/list"
-    headers = get_headers(token)
-    data = {"path": path}
-    try:
-        response = make_api_request("GET", url, headers)
-        return response.json().get('objects', [])
-    except Exception as e:
-        logger.error(f"Failed to list workspace path {path}: {e}")
-        return []
+MB = 1024 * 1024
 
-def get_all_notebooks(host: str, token: str, path: str = "/", notebooks: list = None):
-    """Recursively get all notebooks"""
-    if notebooks is None:
-        notebooks = []
-    
-    objects = list_workspace_objects(host, token, path)
-    
-    for obj in objects:
-        if obj['object_type'] == 'NOTEBOOK':
-            notebooks.append(obj)
-        elif obj['object_type'] == 'DIRECTORY':
-            # Recursively get notebooks from subdirectories
-            get_all_notebooks(host, token, obj['path'], notebooks)
-    
-    return notebooks
+# Notebooks whose JSON import request would exceed this size (migration_settings.large_notebook_threshold_mb)
+# are streamed between the workspaces as multipart imports instead; the JSON import API stops at 10 MB
+DEFAULT_LARGE_NOTEBOOK_THRESHOLD_MB = 10
+
+# Room in the JSON import request for the path, the other fields and rewritten path references
+IMPORT_REQUEST_OVERHEAD = 64 * 1024
 
-def export_notebook(host: str, token: str, notebook_path: str, format: str = "SOURCE"):
-    """Export a notebook"""
+def import_request_size(size: int) -> int:
+    """Size of the JSON import request for a notebook source of size bytes (base64 adds a third)"""
+    return 4 * ((size + 2) // 3) + IMPORT_REQUEST_OVERHEAD
+
+def max_inline_size(threshold: int) -> int:
+    """Largest notebook source (bytes) whose JSON import request stays within threshold"""
+    return (threshold - IMPORT_REQUEST_OVERHEAD) // 4 * 3
+
+def read_up_to(response, limit: int):
+    """Read a streamed export until it ends or exceeds limit bytes; returns (bytes read, complete)"""
+    head = bytearray()
+    for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+        head += chunk
+        if len(head) > limit:
+            return bytes(head), False
+    return bytes(head), True
+
+def get_all_notebooks(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """Get all notebooks from the shared workspace listing"""
+    return [obj for obj in load_workspace_objects(host, token, max_workers) if obj['object_type'] == 'NOTEBOOK']
+
+def open_notebook_export(host: str, token: str, notebook_path: str, format: str = "SOURCE"):
+    """Start a direct-download export of a notebook (raw source, no JSON/base64 wrapping)"""
     url = f"{host}/api/2.0/workspace/export"
     headers = get_headers(token)
     data = {
         "path": notebook_path,
-        "format": format
+        "format": format,
+        "direct_download": "true"
     }
     try:
-        response = make_api_request("GET", url, headers)
-        return response.json()
+        return make_api_request("GET", url, headers, data, stream=True)
     except Exception as e:
         logger.error(f"Failed to export notebook {notebook_path}: {e}")
         return None
 
+def stream_notebook(source: dict, target: dict, notebook: dict, rewriter: PathRewriter, format: str = "SOURCE",
+                    response=None, head: bytes = b''):
+    """Stream a large notebook from the source export (opened here unless given; head holds bytes
+    already read from it) into a multipart import in the target, rewriting paths in its source on the way"""
+    path = notebook['path']
+    try:
+        size = transfer_workspace_object(source, target, path, format,
+                                         {"format": format, "language": notebook.get('language', 'PYTHON')},
+                                         response, rewriter.rewrite_path(path),
+                                         rewriter.rewrite_chunks if rewriter.active else None, head)
+        logger.info(f"Streamed notebook: {path} ({size / MB:.1f} MB)", extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to stream notebook {path}: {e}")
+        return False
+
 def import_notebook(host: str, token: str, notebook_path: str, content: str, language: str, format: str = "SOURCE"):
     """Import a notebook"""
     url = f"{host}/api/2.0/workspace/import"
@@ -65,7 +85,7 @@ def import_notebook(host: str, token: str, notebook_path: str, content: str, lan
     }
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Imported notebook: {notebook_path}")
+        logger.info(f"Imported notebook: {notebook_path}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to import notebook {notebook_path}: {e}")
@@ -81,45 +101,89 @@ def migrate_notebooks():
     
     # Get all notebooks from source
     logger.info("Fetching notebooks from source workspace...")
-    notebooks = get_all_notebooks(source['host'], source['token'])
+    notebooks = get_all_notebooks(source['host'], source['token'], get_max_workers(config))
     logger.info(f"Found {len(notebooks)} notebooks")
     
-    # Export all notebooks
+    threshold_mb = config.get('migration_settings', {}).get('large_notebook_threshold_mb',
+                                                            DEFAULT_LARGE_NOTEBOOK_THRESHOLD_MB)
+    threshold = threshold_mb * MB
+    rewriter = get_path_rewriter(config)
+    
+    # Export all notebooks; those above the threshold go straight from the source export
+    # into the target import instead
     notebook_exports = []
+    streamed = []
+    success_count = 0
+    failed_count = 0
     for notebook in notebooks:
         path = notebook['path']
         language = notebook.get('language', 'PYTHON')
         
-        logger.info(f"Exporting notebook: {path}")
-        exported = export_notebook(source['host'], source['token'], path)
+        logger.info(f"Exporting notebook: {path}", extra=PER_OBJECT)
+        # Size from the listing, else from the export headers, else by reading the export up to
+        # the largest source that fits in an import request
+        size = notebook.get('size')
+        response = None
+        content = None
+        head = b''
+        if size is None or import_request_size(size) <= threshold:
+            response = open_notebook_export(source['host'], source['token'], path)
+            if response is None:
+                failed_count += 1
+                continue
+            size = streamed_size(response)
+            if size is None:
+                head, complete = read_up_to(response, max_inline_size(threshold))
+                if complete:
+                    size = len(head)
+                    content = head
         
-        if exported:
-            notebook_exports.append({
-                'path': path,
-                'language': language,
-                'content': exported.get('content')
-            })
+        if size is None or import_request_size(size) > threshold:
+            streamed.append(path)
+            if stream_notebook(source, target, notebook, rewriter, response=response, head=head):
+                success_count += 1
+            else:
+                failed_count += 1
+            continue
+        with response:
+            if content is None:
+                content = response.content
+        
+        notebook_exports.append({
+            'path': path,
+            'language': language,
+            'content': base64.b64encode(content).decode()
+        })
     
     # Save backup
+    if streamed:
+        logger.warning(f"Streamed {len(streamed)} notebooks too large for a {threshold_mb} MB import request; "
+                       f"they are not included in the backup: {', '.join(streamed)}")
     save_backup(notebook_exports, "notebooks")
     
-    success_count = 0
-    failed_count = 0
-    
     # Import notebooks to target
     for notebook_export in notebook_exports:
         path = notebook_export['path']
         language = notebook_export['language']
         content = notebook_export['content']
         
-        logger.info(f"Importing notebook: {path}")
+        logger.info(f"Importing notebook: {path}", extra=PER_OBJECT)
+        
+        # Point %run, dbutils.notebook.run and other workspace paths at their target locations
+        if rewriter.active:
+            content = base64.b64encode(rewriter.rewrite(base64.b64decode(content))).decode()
         
-        if import_notebook(target['host'], target['token'], path, content, language):
+        if import_notebook(target['host'], target['token'], rewriter.rewrite_path(path), content, language):
             success_count += 1
         else:
             failed_count += 1
     
+    if rewriter.active:
+        moved = sum(1 for notebook in notebooks if rewriter.rewrite_path(notebook['path']) != notebook['path'])
+        logger.info(f"Rewrote {rewriter.references} path references in {rewriter.rewritten} notebooks; "
+                    f"{moved} notebooks moved to mapped paths")
+    
     log_migration_result("Notebooks", success_count, failed_count)
 
 if __name__ == "__main__":
-    migrate_notebooks()
+    run_script(migrate_notebooks, "notebooks", __doc__)
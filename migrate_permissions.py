@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Migrate object permissions (ACLs) from source to target Databricks workspace
+Note: Run last - every object must already exist in the target. Direct (non-inherited)
+grants are read concurrently for all migrated folders, notebooks, workspace files, repos,
+clusters, policies, instance pools, warehouses, jobs and Databricks SQL queries, alerts
+and dashboards, principals are translated through mappings.principal_mapping and
+mappings.user_email_domain_mapping, and each object's ACL is written with a single
+request (replacing its direct grants in the target)
+"""
+import logging
+from collections import Counter
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   list_all, run_parallel, get_max_workers, get_rate_limiter, get_id_mapping, match_ids_by_name,
+                   translate_principal, get_path_rewriter, PER_OBJECT)
+from inventory import load_snapshot, crawl_workspace_objects
+
+logger = logging.getLogger(__name__)
+
+# (permissions API object type, ID mapping type, same-name match: (endpoint, items key, name field, ID field))
+ID_MAPPED_OBJECTS = [
+    ("clusters", "cluster", ("/api/2.0/clusters/list", "clusters", "cluster_name", "cluster_id")),
+    ("cluster-policies", "policy", ("/api/2.0/policies/clusters/list", "policies", "name", "policy_id")),
+    ("instance-pools", "instance_pool",
+     ("/api/2.0/instance-pools/list", "instance_pools", "instance_pool_name", "instance_pool_id")),
+    ("warehouses", "warehouse", ("/api/2.0/sql/warehouses", "warehouses", "name", "id")),
+    ("jobs", "job", None),
+    ("sql/queries", "sql_query", None),
+    ("sql/alerts", "sql_alert", None),
+    ("sql/dashboards", "sql_dashboard", None),
+]
+
+# Databricks SQL objects (sql/<type>) have their own ACL API: flat grants, replaced with a POST
+SQL_PERMISSIONS_API = "/api/2.0/preview/sql/permissions"
+
+# Workspace object types matched by path -> permissions API object type
+PATH_MAPPED_OBJECTS = {"DIRECTORY": "directories", "NOTEBOOK": "notebooks", "FILE": "files"}
+
+PRINCIPAL_FIELDS = ('user_name', 'group_name', 'service_principal_name')
+
+# Groups whose grants are fixed by the platform and rejected by PUT
+PROTECTED_GROUPS = {'admins'}
+
+def permissions_url(host: str, object_type: str, object_id: str) -> str:
+    """ACL endpoint of an object"""
+    if object_type.startswith("sql/"):
+        return f"{host}{SQL_PERMISSIONS_API}/{object_type[len('sql/'):]}/{object_id}"
+    return f"{host}/api/2.0/permissions/{object_type}/{object_id}"
+
+def get_permissions(host: str, token: str, object_type: str, object_id: str):
+    """Get the access control list of an object"""
+    url = permissions_url(host, object_type, object_id)
+    headers = get_headers(token)
+    try:
+        response = make_api_request("GET", url, headers)
+        return response.json().get('access_control_list', [])
+    except Exception as e:
+        logger.error(f"Failed to get permissions for {object_type}/{object_id}: {e}")
+        return None
+
+def set_permissions(host: str, token: str, object_type: str, object_id: str, grants: list):
+    """Replace the direct grants on an object with one PUT (POST for Databricks SQL objects)"""
+    url = permissions_url(host, object_type, object_id)
+    headers = get_headers(token)
+    method = "POST" if object_type.startswith("sql/") else "PUT"
+    try:
+        make_api_request(method, url, headers, {"access_control_list": grants})
+        logger.info(f"Set {len(grants)} permissions on {object_type}/{object_id}", extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to set permissions on {object_type}/{object_id}: {e}")
+        return False
+
+def direct_grants(acl: list, mappings: dict):
+    """PUT-ready entries for the non-inherited grants of an ACL, with principals translated"""
+    grants = []
+    for entry in acl:
+        field = next((f for f in PRINCIPAL_FIELDS if entry.get(f)), None)
+        if field is None or (field == 'group_name' and entry[field] in PROTECTED_GROUPS):
+            continue
+        principal = translate_principal(entry[field], mappings)
+        # Databricks SQL ACL entries carry a single permission_level and no inheritance
+        permissions = entry.get('all_permissions') or [{"permission_level": entry.get('permission_level')}]
+        for permission in permissions:
+            if permission.get('permission_level') and not permission.get('inherited'):
+                grants.append({field: principal, "permission_level": permission['permission_level']})
+    return grants
+
+def map_id_objects(config: dict):
+    """(object type, source ID, target ID) for clusters, policies, pools, warehouses, jobs and SQL objects"""
+    source = config['source']
+    target = config['target']
+    objects = []
+    for object_type, mapping_type, name_match in ID_MAPPED_OBJECTS:
+        matched = {}
+        if name_match:
+            try:
+                matched = match_ids_by_name(source, target, *name_match)
+            except Exception as e:
+                logger.warning(f"Could not match {mapping_type} IDs by name: {e}")
+        mapping = get_id_mapping(config, mapping_type, matched)
+        objects.extend((object_type, str(source_id), str(target_id)) for source_id, target_id in mapping.items())
+    return objects
+
+def map_path_objects(config: dict):
+    """(object type, source ID, target ID) for folders, notebooks, files and repos, matched by path"""
+    source = config['source']
+    target = config['target']
+    max_workers = get_max_workers(config)
+    
+    def workspace_objects(workspace: dict, use_snapshot: bool):
+        cached = load_snapshot(workspace['host'], "workspace_objects") if use_snapshot else None
+        if cached is not None:
+            return cached
+        return [obj for _, _, obj in crawl_workspace_objects(workspace['host'], workspace['token'],
+                                                             max_workers=max_workers)]
+    
+    def repos(workspace: dict, use_snapshot: bool):
+        cached = load_snapshot(workspace['host'], "repos") if use_snapshot else None
+        if cached is not None:
+            return cached
+        return list_all(workspace['host'], workspace['token'], "/api/2.0/repos", "repos",
+                        token_param="next_page_token")
+    
+    # The target was just written to, so it is always listed live
+    listings = [(workspace_objects, source, True), (workspace_objects, target, False),
+                (repos, source, True), (repos, target, False)]
+    source_objects, target_objects, source_repos, target_repos = run_parallel(
+        lambda listing: listing[0](listing[1], listing[2]), listings, len(listings))
+    
+    # Home folders and mapped prefixes were migrated to their rewritten paths
+    rewriter = get_path_rewriter(config)
+    target_ids = {obj['path']: obj['object_id'] for obj in target_objects}
+    paths = {obj['path']: rewriter.rewrite_path(obj['path']) for obj in source_objects}
+    objects = [(PATH_MAPPED_OBJECTS[obj['object_type']], str(obj['object_id']), str(target_ids[paths[obj['path']]]))
+               for obj in source_objects
+               if obj.get('object_type') in PATH_MAPPED_OBJECTS and paths[obj['path']] in target_ids]
+    
+    target_repo_ids = {repo['path']: repo['id'] for repo in target_repos}
+    objects.extend(("repos", str(repo['id']), str(target_repo_ids[repo['path']]))
+                   for repo in source_repos if repo.get('path') in target_repo_ids)
+    return objects
+
+def migrate_permissions():
+    """Main migration function for object permissions"""
+    config = load_config()
+    source = config['source']
+    target = config['target']
+    mappings = config.get('mappings', {})
+    max_workers = get_max_workers(config)
+    
+    logger.info("Starting permissions migration...")
+    
+    # Pair every migrated object with its target equivalent
+    logger.info("Matching source objects to their target equivalents...")
+    objects = map_id_objects(config) + map_path_objects(config)
+    logger.info(f"Found {len(objects)} migrated objects: "
+                + ", ".join(f"{count} {object_type}" for object_type, count in
+                            Counter(object_type for object_type, _, _ in objects).items()))
+    
+    # Read source ACLs concurrently
+    acls = run_parallel(
+        lambda obj: get_permissions(source['host'], source['token'], obj[0], obj[1]), objects, max_workers)
+    
+    # Save backup
+    save_backup({f"{object_type}/{source_id}": acl for (object_type, source_id, _), acl in zip(objects, acls)},
+                "permissions")
+    
+    read_failed = sum(1 for acl in acls if acl is None)
+    updates = []
+    for (object_type, _, target_id), acl in zip(objects, acls):
+        grants = direct_grants(acl or [], mappings)
+        if grants:
+            updates.append((object_type, target_id, grants))
+    logger.info(f"Applying direct grants to {len(updates)} objects "
+                f"({len(objects) - len(updates) - read_failed} have inherited permissions only)")
+    
+    # One PUT per object, concurrently within the requests_per_second budget
+    limiter = get_rate_limiter(config)
+    
+    def apply(update: tuple):
+        limiter.acquire()
+        return set_permissions(target['host'], target['token'], *update)
+    
+    results = run_parallel(apply, updates, max_workers)
+    
+    success_count = results.count(True)
+    failed_count = results.count(False) + read_failed
+    log_migration_result("Permissions", success_count, failed_count)
+
+if __name__ == "__main__":
+    run_script(migrate_permissions, "permissions", __doc__)
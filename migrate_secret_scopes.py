@@ -1,16 +1,69 @@
 #!/usr/bin/env python3
 """
 Migrate Secret Scopes from source to target Databricks workspace
-NOTE: Secret values cannot be read from API, only secret names are migrated
+NOTE: Secret values cannot be read from API. Values are taken from a local file
+(migration_settings.secret_values_file) when one is configured; keys without a
+value get a placeholder that must be updated manually.
+Scopes are created without a blanket "users" MANAGE grant unless
+migration_settings.secret_scope_initial_manage_principal says otherwise or the
+target workspace (Standard tier) requires it.
 """
+import io
+import json
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+import os
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   run_parallel, get_max_workers, translate_principal, PER_OBJECT)
+from inventory import load_snapshot, load_snapshot_object
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PLACEHOLDER_VALUE = "PLACEHOLDER_PLEASE_UPDATE"
+DEFAULT_SECRET_VALUES_KEY_ENV = "SECRET_VALUES_KEY"
+# Principal covering every workspace user; Standard tier workspaces only accept it as initial_manage_principal
+ALL_USERS_PRINCIPAL = "users"
+
+def _parse_secret_values(text: str, path: str):
+    """Parse {"scope": {"key": "value"}} JSON or scope/key=value .env content"""
+    if path.endswith('.json'):
+        return {(scope, key): value
+                for scope, secrets in json.loads(text).items() for key, value in secrets.items()}
+    from dotenv import dotenv_values
+    values = {}
+    for name, value in dotenv_values(stream=io.StringIO(text)).items():
+        scope, _, key = name.partition('/')
+        if not key or value is None:
+            logger.warning(f"Ignoring entry '{name}' in {path}: expected scope/key=value")
+            continue
+        values[(scope, key)] = value
+    return values
+
+def load_secret_values(path: str, key_env: str = DEFAULT_SECRET_VALUES_KEY_ENV):
+    """Load secret values keyed by (scope, key) from a JSON or .env file
+
+    Files ending in .enc are Fernet-encrypted (e.g. secrets.json.enc) and are decrypted
+    with the key in the key_env environment variable; this requires the cryptography package."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    if path.endswith('.enc'):
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            raise RuntimeError(f"{path} is encrypted but the cryptography package is not installed")
+        key = os.environ.get(key_env)
+        if not key:
+            raise RuntimeError(f"{path} is encrypted but ${key_env} is not set")
+        content = Fernet(key.encode()).decrypt(content)
+        path = path[:-len('.enc')]
+    
+    return _parse_secret_values(content.decode('utf-8'), path)
+
 def list_secret_scopes(host: str, token: str):
     """List all secret scopes"""
+    cached = load_snapshot(host, "secret_scopes")
+    if cached is not None:
+        return cached
     url = f"{host}/api/2.0/secrets/scopes/list"
     headers = get_headers(token)
     try:
@@ -22,101 +75,176 @@ def list_secret_scopes(host: str, token: str):
 
 def list_secrets(host: str, token: str, scope_name: str):
     """List all secrets in a scope"""
+    cached = load_snapshot_object(host, "secret_scopes", scope_name)
+    if cached is not None:
+        return cached.get('secrets', [])
     url = f"{host}/api/2.0/secrets/list"
     headers = get_headers(token)
     data = {"scope": scope_name}
     try:
-        response = make_api_request("GET", url, headers)
+        response = make_api_request("GET", url, headers, data)
         return response.json().get('secrets', [])
     except Exception as e:
         logger.error(f"Failed to list secrets in scope {scope_name}: {e}")
         return []
 
-def create_secret_scope(host: str, token: str, scope_name: str, backend_type: str = "DATABRICKS"):
-    """Create a secret scope"""
+def list_scope_acls(host: str, token: str, scope_name: str):
+    """List the ACLs on a secret scope"""
+    url = f"{host}/api/2.0/secrets/acls/list"
+    headers = get_headers(token)
+    data = {"scope": scope_name}
+    try:
+        response = make_api_request("GET", url, headers, data)
+        return response.json().get('items', [])
+    except Exception as e:
+        logger.error(f"Failed to list ACLs for scope {scope_name}: {e}")
+        return []
+
+def requires_all_users_principal(error: Exception) -> bool:
+    """Whether a scope create was rejected because the workspace (Standard tier) only accepts scopes
+    managed by all users"""
+    response = getattr(error, 'response', None)
+    return response is not None and 'initial_manage_principal' in response.text
+
+def create_secret_scope(host: str, token: str, scope_name: str, backend_type: str = "DATABRICKS",
+                        initial_manage_principal: str = None):
+    """Create a secret scope managed only by its creator unless initial_manage_principal is given (the source
+    ACLs are applied afterwards); falls back to "users" where the workspace requires it"""
     url = f"{host}/api/2.0/secrets/scopes/create"
     headers = get_headers(token)
     data = {
         "scope": scope_name,
-        "initial_manage_principal": "users",
         "backend_type": backend_type
     }
+    if initial_manage_principal:
+        data["initial_manage_principal"] = initial_manage_principal
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created secret scope: {scope_name}")
+        logger.info(f"Created secret scope: {scope_name}", extra=PER_OBJECT)
         return True
     except Exception as e:
+        if initial_manage_principal != ALL_USERS_PRINCIPAL and requires_all_users_principal(e):
+            logger.warning(f"Target workspace only allows secret scopes managed by all users (Standard tier) - "
+                           f"creating {scope_name} with MANAGE for '{ALL_USERS_PRINCIPAL}'")
+            return create_secret_scope(host, token, scope_name, backend_type, ALL_USERS_PRINCIPAL)
         logger.error(f"Failed to create secret scope {scope_name}: {e}")
         return False
 
-def create_secret_placeholder(host: str, token: str, scope_name: str, secret_key: str):
-    """Create a placeholder for secret (value needs to be set manually)"""
+def put_scope_acl(host: str, token: str, scope_name: str, principal: str, permission: str):
+    """Grant a principal READ/WRITE/MANAGE on a secret scope"""
+    url = f"{host}/api/2.0/secrets/acls/put"
+    headers = get_headers(token)
+    data = {"scope": scope_name, "principal": principal, "permission": permission}
+    try:
+        make_api_request("POST", url, headers, data)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to set ACL {principal}={permission} on scope {scope_name}: {e}")
+        return False
+
+def put_secret(host: str, token: str, scope_name: str, secret_key: str, value: str = None):
+    """Write a secret value, or a placeholder (to be set manually) when no value is known"""
     url = f"{host}/api/2.0/secrets/put"
     headers = get_headers(token)
     data = {
         "scope": scope_name,
         "key": secret_key,
-        "string_value": "PLACEHOLDER_PLEASE_UPDATE"
+        "string_value": value if value is not None else PLACEHOLDER_VALUE
     }
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.warning(f"Created secret placeholder: {scope_name}/{secret_key} - PLEASE UPDATE VALUE")
+        if value is None:
+            logger.warning(f"Created secret placeholder: {scope_name}/{secret_key} - PLEASE UPDATE VALUE")
+        else:
+            logger.info(f"Migrated secret: {scope_name}/{secret_key}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to create secret {scope_name}/{secret_key}: {e}")
         return False
 
+def create_scope_with_acls(host: str, token: str, detail: dict, mappings: dict, initial_manage_principal: str = None):
+    """Create a scope and apply its source ACLs (principals translated); returns the number of ACLs
+    that failed, or None"""
+    scope_name = detail['scope']['name']
+    backend_type = detail['scope'].get('backend_type', 'DATABRICKS')
+    
+    logger.info(f"Creating secret scope: {scope_name}", extra=PER_OBJECT)
+    if not create_secret_scope(host, token, scope_name, backend_type, initial_manage_principal):
+        return None
+    return sum(1 for acl in detail['acls']
+               if not put_scope_acl(host, token, scope_name, translate_principal(acl['principal'], mappings),
+                                    acl['permission']))
+
 def migrate_secret_scopes():
     """Main migration function for secret scopes"""
     config = load_config()
     source = config['source']
     target = config['target']
+    settings = config.get('migration_settings', {})
+    max_workers = get_max_workers(config)
     
     logger.info("Starting secret scope migration...")
-    logger.warning("NOTE: Secret values cannot be read via API - placeholders will be created")
+    
+    secret_values = {}
+    values_file = settings.get('secret_values_file')
+    if values_file:
+        secret_values = load_secret_values(
+            values_file, settings.get('secret_values_key_env', DEFAULT_SECRET_VALUES_KEY_ENV))
+        logger.info(f"Loaded {len(secret_values)} secret values from {values_file}")
+    else:
+        logger.warning("NOTE: Secret values cannot be read via API - placeholders will be created "
+                       "(set migration_settings.secret_values_file to migrate values)")
     
     # Get secret scopes from source
     logger.info("Fetching secret scopes from source workspace...")
     scopes = list_secret_scopes(source['host'], source['token'])
     logger.info(f"Found {len(scopes)} secret scopes")
     
-    # Get secrets for each scope
-    scope_details = []
-    for scope in scopes:
-        scope_name = scope['name']
-        secrets = list_secrets(source['host'], source['token'], scope_name)
-        scope_details.append({
+    # Get secrets and ACLs for each scope
+    def with_details(scope: dict):
+        return {
             'scope': scope,
-            'secrets': secrets
-        })
+            'secrets': list_secrets(source['host'], source['token'], scope['name']),
+            'acls': list_scope_acls(source['host'], source['token'], scope['name']),
+        }
+    scope_details = run_parallel(with_details, scopes, max_workers)
     
-    # Save backup
+    # Save backup (key names and ACLs only, never values)
     save_backup(scope_details, "secret_scopes")
     
-    success_count = 0
-    failed_count = 0
-    secrets_migrated = 0
+    # Create scopes and their ACLs in target
+    mappings = config.get('mappings', {})
+    manage_principal = settings.get('secret_scope_initial_manage_principal')
+    acl_results = run_parallel(
+        lambda detail: create_scope_with_acls(target['host'], target['token'], detail, mappings, manage_principal),
+        scope_details, max_workers)
+    success_count = sum(1 for result in acl_results if result is not None)
+    failed_count = len(acl_results) - success_count
+    failed_acls = sum(result for result in acl_results if result)
     
-    # Create scopes and secrets in target
-    for detail in scope_details:
-        scope_name = detail['scope']['name']
-        backend_type = detail['scope'].get('backend_type', 'DATABRICKS')
-        
-        logger.info(f"Creating secret scope: {scope_name}")
-        
-        if create_secret_scope(target['host'], target['token'], scope_name, backend_type):
-            success_count += 1
-            
-            # Create placeholder secrets
-            for secret in detail['secrets']:
-                secret_key = secret['key']
-                if create_secret_placeholder(target['host'], target['token'], scope_name, secret_key):
-                    secrets_migrated += 1
-        else:
-            failed_count += 1
+    # Write secrets across all created scopes concurrently
+    puts = [(detail['scope']['name'], secret['key'])
+            for detail, result in zip(scope_details, acl_results) if result is not None
+            for secret in detail['secrets']]
+    put_results = run_parallel(
+        lambda put: put_secret(target['host'], target['token'], put[0], put[1], secret_values.get(put)),
+        puts, max_workers)
+    
+    values_written = sum(1 for put, ok in zip(puts, put_results) if ok and put in secret_values)
+    placeholders = sum(1 for put, ok in zip(puts, put_results) if ok and put not in secret_values)
+    failed_puts = put_results.count(False)
+    unused = len(set(secret_values) - set(puts))
     
     log_migration_result("Secret Scopes", success_count, failed_count)
-    logger.info(f"Created {secrets_migrated} secret placeholders - PLEASE UPDATE VALUES MANUALLY")
+    logger.info(f"Migrated {values_written} secret values")
+    if failed_puts:
+        logger.error(f"Failed to write {failed_puts} secrets")
+    if failed_acls:
+        logger.error(f"Failed to apply {failed_acls} scope ACLs")
+    if unused:
+        logger.warning(f"{unused} entries in {values_file} do not match a migrated secret")
+    if placeholders:
+        logger.warning(f"Created {placeholders} secret placeholders - PLEASE UPDATE VALUES MANUALLY")
 
 if __name__ == "__main__":
-    migrate_secret_scopes()
+    run_script(migrate_secret_scopes, "secret_scopes", __doc__)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Migrate SQL queries, visualizations, alerts and dashboards from source to target Databricks workspace
+Note: Run after migrate_sql_warehouses.py - each query is bound to the data source of the target
+warehouse its source warehouse was migrated to. Objects are created in dependency order:
+queries, visualizations, alerts, then dashboards and their widgets
+"""
+import logging
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   fetch_details, run_parallel, get_max_workers, get_id_mapping, match_ids_by_name,
+                   record_id_mappings, PER_OBJECT)
+
+logger = logging.getLogger(__name__)
+
+SQL_API = "/api/2.0/preview/sql"
+PAGE_SIZE = 250
+
+# Fields list entries must carry to be used without a get call
+QUERY_DETAIL_FIELDS = ('id', 'name', 'query', 'data_source_id', 'visualizations')
+DASHBOARD_DETAIL_FIELDS = ('id', 'name', 'widgets')
+
+# Settings carried over to the target (IDs, owners and timestamps are workspace-specific)
+QUERY_FIELDS = ['name', 'description', 'query', 'options', 'tags', 'run_as_role']
+VISUALIZATION_FIELDS = ['type', 'name', 'description', 'options']
+ALERT_FIELDS = ['name', 'options', 'rearm']
+DASHBOARD_FIELDS = ['name', 'tags', 'dashboard_filters_enabled']
+WIDGET_FIELDS = ['text', 'width', 'options']
+
+def list_sql_objects(host: str, token: str, object_type: str):
+    """List all SQL queries, alerts or dashboards (alerts are returned as a single unpaginated list)"""
+    url = f"{host}{SQL_API}/{object_type}"
+    headers = get_headers(token)
+    items = []
+    page = 1
+    try:
+        while True:
+            response = make_api_request("GET", url, headers, {"page": page, "page_size": PAGE_SIZE})
+            result = response.json()
+            if isinstance(result, list):
+                return result
+            results = result.get('results', [])
+            items.extend(results)
+            if not results or len(items) >= result.get('count', 0):
+                return items
+            page += 1
+    except Exception as e:
+        logger.error(f"Failed to list SQL {object_type}: {e}")
+        return []
+
+def get_sql_object(host: str, token: str, object_type: str, object_id: str):
+    """Get a SQL query or dashboard with its visualizations / widgets"""
+    url = f"{host}{SQL_API}/{object_type}/{object_id}"
+    headers = get_headers(token)
+    try:
+        response = make_api_request("GET", url, headers)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to get SQL {object_type} {object_id}: {e}")
+        return None
+
+def list_data_sources(host: str, token: str):
+    """List SQL data sources (one per warehouse)"""
+    url = f"{host}{SQL_API}/data_sources"
+    headers = get_headers(token)
+    try:
+        response = make_api_request("GET", url, headers)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to list SQL data sources: {e}")
+        return []
+
+def create_sql_object(host: str, token: str, object_type: str, data: dict, name: str):
+    """Create a SQL query, visualization, alert, dashboard or widget"""
+    url = f"{host}{SQL_API}/{object_type}"
+    headers = get_headers(token)
+    try:
+        response = make_api_request("POST", url, headers, data)
+        logger.info(f"Created SQL {object_type[:-1]}: {name}", extra=PER_OBJECT)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to create SQL {object_type[:-1]} {name}: {e}")
+        return None
+
+def build_warehouse_mappings(config: dict):
+    """Source -> target warehouse and data source IDs
+    
+    Warehouses: same-name warehouses, recorded migration results, then mappings.warehouse_id_mapping.
+    Data sources follow their warehouse, overridden by mappings.data_source_id_mapping."""
+    source = config['source']
+    target = config['target']
+    try:
+        matched = match_ids_by_name(source, target, "/api/2.0/sql/warehouses", "warehouses", "name", "id")
+    except Exception as e:
+        logger.warning(f"Could not match warehouse IDs by name: {e}")
+        matched = {}
+    warehouse_mapping = get_id_mapping(config, "warehouse", matched)
+    
+    source_sources, target_sources = run_parallel(
+        lambda workspace: list_data_sources(workspace['host'], workspace['token']), [source, target], 2)
+    target_by_warehouse = {ds['warehouse_id']: ds['id'] for ds in target_sources if ds.get('warehouse_id')}
+    derived = {ds['id']: target_by_warehouse[warehouse_mapping[ds['warehouse_id']]]
+               for ds in source_sources
+               if warehouse_mapping.get(ds.get('warehouse_id')) in target_by_warehouse}
+    data_source_mapping = get_id_mapping(config, "data_source", derived)
+    
+    logger.info(f"Resolved {len(warehouse_mapping)} warehouse and {len(data_source_mapping)} data source mappings")
+    return warehouse_mapping, data_source_mapping
+
+def query_dependencies(query: dict):
+    """IDs of the queries backing this query's dropdown parameters"""
+    return {parameter['queryId'] for parameter in query.get('options', {}).get('parameters', [])
+            if parameter.get('queryId')}
+
+def build_query_payload(query: dict, warehouse_mapping: dict, data_source_mapping: dict, query_mapping: dict):
+    """Create payload with warehouse, data source and dropdown query IDs translated
+    
+    Returns (payload, None) or (None, description of the ID with no target equivalent)."""
+    data = {k: query[k] for k in QUERY_FIELDS if query.get(k) is not None}
+    
+    for field, mapping in (('data_source_id', data_source_mapping), ('warehouse_id', warehouse_mapping)):
+        if query.get(field):
+            if query[field] not in mapping:
+                return None, f"{field} {query[field]}"
+            data[field] = mapping[query[field]]
+    
+    parameters = data.get('options', {}).get('parameters', [])
+    missing = query_dependencies(query) - set(query_mapping)
+    if missing:
+        return None, f"dropdown query {sorted(missing)[0]}"
+    if any(parameter.get('queryId') for parameter in parameters):
+        data['options'] = dict(data['options'], parameters=[
+            dict(parameter, queryId=query_mapping[parameter['queryId']]) if parameter.get('queryId') else parameter
+            for parameter in parameters])
+    return data, None
+
+def create_queries(config: dict, queries: list, warehouse_mapping: dict, data_source_mapping: dict):
+    """Create queries concurrently, in waves so dropdown source queries exist before the queries using them
+    
+    Returns (source query ID -> created target query, failed count)."""
+    target = config['target']
+    created = {}
+    failed = 0
+    remaining = list(queries)
+    while remaining:
+        pending_ids = {query['id'] for query in remaining}
+        wave = [query for query in remaining if not query_dependencies(query) & pending_ids]
+        if not wave:
+            # Dependency cycle: nothing left can be resolved
+            wave = remaining
+        wave_ids = {query['id'] for query in wave}
+        remaining = [query for query in remaining if query['id'] not in wave_ids]
+    
+        query_mapping = {source_id: result['id'] for source_id, result in created.items()}
+        def create(query: dict):
+            data, missing = build_query_payload(query, warehouse_mapping, data_source_mapping, query_mapping)
+            if data is None:
+                logger.error(f"Skipping SQL query {query['name']}: {missing} has no target equivalent")
+                return None
+            return create_sql_object(target['host'], target['token'], "queries", data, query['name'])
+    
+        results = run_parallel(create, wave, get_max_workers(config))
+        for query, result in zip(wave, results):
+            if result and 'id' in result:
+                created[query['id']] = result
+            else:
+                failed += 1
+    return created, failed
+
+def create_visualizations(config: dict, queries: list, created_queries: dict):
+    """Create the source visualizations on the migrated queries
+    
+    The default table visualization of a new query stands in for the matching source one.
+    Returns (source visualization ID -> target visualization ID, failed count)."""
+    target = config['target']
+    mapping = {}
+    to_create = []
+    for query in queries:
+        if query['id'] not in created_queries:
+            continue
+        target_query = created_queries[query['id']]
+        defaults = {(v.get('type'), v.get('name')): v['id'] for v in target_query.get('visualizations', [])}
+        for visualization in query.get('visualizations', []):
+            default_id = defaults.pop((visualization.get('type'), visualization.get('name')), None)
+            if default_id:
+                mapping[visualization['id']] = default_id
+            else:
+                to_create.append((target_query['id'], visualization))
+    
+    def create(item: tuple):
+        query_id, visualization = item
+        data = {k: visualization[k] for k in VISUALIZATION_FIELDS if visualization.get(k) is not None}
+        data['query_id'] = query_id
+        return create_sql_object(target['host'], target['token'], "visualizations", data,
+                                 visualization.get('name', visualization['id']))
+    
+    results = run_parallel(create, to_create, get_max_workers(config))
+    for (_, visualization), result in zip(to_create, results):
+        if result and 'id' in result:
+            mapping[visualization['id']] = result['id']
+    return mapping, sum(1 for result in results if not result)
+
+def create_alerts(config: dict, alerts: list, query_mapping: dict):
+    """Create alerts on the migrated queries; returns (source -> target alert IDs, failed count)"""
+    target = config['target']
+    
+    def create(alert: dict):
+        query_id = alert.get('query', {}).get('id')
+        if query_id not in query_mapping:
+            logger.error(f"Skipping SQL alert {alert['name']}: query {query_id} was not migrated")
+            return None
+        data = {k: alert[k] for k in ALERT_FIELDS if alert.get(k) is not None}
+        data['query_id'] = query_mapping[query_id]
+        return create_sql_object(target['host'], target['token'], "alerts", data, alert['name'])
+    
+    results = run_parallel(create, alerts, get_max_workers(config))
+    mapping = {alert['id']: result['id'] for alert, result in zip(alerts, results) if result and 'id' in result}
+    return mapping, len(alerts) - len(mapping)
+
+def create_dashboards(config: dict, dashboards: list, visualization_mapping: dict):
+    """Create dashboards, then all their widgets concurrently
+    
+    Returns (source -> target dashboard IDs, failed dashboards, failed widgets)."""
+    target = config['target']
+    max_workers = get_max_workers(config)
+    
+    def create(dashboard: dict):
+        data = {k: dashboard[k] for k in DASHBOARD_FIELDS if dashboard.get(k) is not None}
+        return create_sql_object(target['host'], target['token'], "dashboards", data, dashboard['name'])
+    
+    results = run_parallel(create, dashboards, max_workers)
+    mapping = {dashboard['id']: result['id']
+               for dashboard, result in zip(dashboards, results) if result and 'id' in result}
+    
+    widgets = [(dashboard, widget) for dashboard in dashboards if dashboard['id'] in mapping
+               for widget in dashboard.get('widgets', [])]
+    
+    def create_widget(item: tuple):
+        dashboard, widget = item
+        data = {k: widget[k] for k in WIDGET_FIELDS if widget.get(k) is not None}
+        data['dashboard_id'] = mapping[dashboard['id']]
+        visualization_id = (widget.get('visualization') or {}).get('id')
+        if visualization_id:
+            if visualization_id not in visualization_mapping:
+                logger.error(f"Skipping widget on SQL dashboard {dashboard['name']}: "
+                             f"visualization {visualization_id} was not migrated")
+                return None
+            data['visualization_id'] = visualization_mapping[visualization_id]
+            data.pop('text', None)
+        return create_sql_object(target['host'], target['token'], "widgets", data,
+                                 f"{dashboard['name']}/{widget.get('id')}")
+    
+    widget_results = run_parallel(create_widget, widgets, max_workers)
+    return mapping, len(dashboards) - len(mapping), sum(1 for result in widget_results if not result)
+
+def migrate_sql_queries():
+    """Main migration function for SQL queries, alerts and dashboards"""
+    config = load_config()
+    source = config['source']
+    max_workers = get_max_workers(config)
+    
+    logger.info("Starting SQL query, alert and dashboard migration...")
+    
+    # Get SQL objects from source (queries and dashboards need a get for visualizations / widgets)
+    logger.info("Fetching SQL queries, alerts and dashboards from source workspace...")
+    queries, alerts, dashboards = run_parallel(
+        lambda object_type: list_sql_objects(source['host'], source['token'], object_type),
+        ["queries", "alerts", "dashboards"], 3)
+    logger.info(f"Found {len(queries)} queries, {len(alerts)} alerts and {len(dashboards)} dashboards")
+    
+    queries = fetch_details(
+        queries, lambda query: get_sql_object(source['host'], source['token'], "queries", query['id']),
+        QUERY_DETAIL_FIELDS, max_workers)
+    dashboards = fetch_details(
+        dashboards, lambda dashboard: get_sql_object(source['host'], source['token'], "dashboards", dashboard['id']),
+        DASHBOARD_DETAIL_FIELDS, max_workers)
+    
+    # Save backup
+    save_backup({"queries": queries, "alerts": alerts, "dashboards": dashboards}, "sql_queries")
+    
+    warehouse_mapping, data_source_mapping = build_warehouse_mappings(config)
+    
+    # Queries first: everything else hangs off them
+    created_queries, failed_queries = create_queries(config, queries, warehouse_mapping, data_source_mapping)
+    query_mapping = {source_id: result['id'] for source_id, result in created_queries.items()}
+    record_id_mappings("sql_query", query_mapping)
+    log_migration_result("SQL Queries", len(created_queries), failed_queries)
+    
+    visualization_mapping, failed_visualizations = create_visualizations(config, queries, created_queries)
+    
+    alert_mapping, failed_alerts = create_alerts(config, alerts, query_mapping)
+    record_id_mappings("sql_alert", alert_mapping)
+    log_migration_result("SQL Alerts", len(alert_mapping), failed_alerts)
+    
+    dashboard_mapping, failed_dashboards, failed_widgets = create_dashboards(config, dashboards,
+                                                                             visualization_mapping)
+    record_id_mappings("sql_dashboard", dashboard_mapping)
+    log_migration_result("SQL Dashboards", len(dashboard_mapping), failed_dashboards)
+    
+    if failed_visualizations or failed_widgets:
+        logger.error(f"Failed to create {failed_visualizations} visualizations and {failed_widgets} widgets")
+    logger.info("Note: Alert destinations, refresh schedules and sharing settings must be reviewed manually")
+
+if __name__ == "__main__":
+    run_script(migrate_sql_queries, "sql_queries", __doc__)
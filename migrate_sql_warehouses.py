@@ -1,15 +1,68 @@
 #!/usr/bin/env python3
 """
 Migrate SQL Warehouses from source to target Databricks workspace
+Note: Warehouses are created concurrently and each is polled from the moment it is created until
+provisioned (or stopped, with migration_settings.create_warehouses_stopped). Warehouses rejected
+for quota or capacity, or stopped by it during provisioning (these are deleted first), are retried
+once others have settled; any still rejected are saved to sql_warehouse_retry_queue.json for a
+later run with --retry
 """
+import json
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+import os
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as futures_wait
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   fetch_details, run_parallel, get_max_workers, record_id_mappings, write_json_atomic,
+                   PER_OBJECT)
+from inventory import load_snapshot
+from profiling import profiled
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields a sql/warehouses list entry must carry to be used without a get call
+WAREHOUSE_DETAIL_FIELDS = ('id', 'name', 'cluster_size')
+
+# Warehouses that could not be created for lack of quota or capacity
+RETRY_QUEUE_FILE = "sql_warehouse_retry_queue.json"
+
+# Error codes / message fragments that mean "try again when capacity frees up"
+CAPACITY_ERROR_CODES = {'QUOTA_EXCEEDED', 'RESOURCE_EXHAUSTED', 'RESOURCE_LIMIT_EXCEEDED'}
+CAPACITY_ERROR_MARKERS = ('quota', 'capacity', 'stockout')
+
+# Provisioning poll: first interval, backoff factor and cap (seconds)
+POLL_INTERVAL = 2.0
+POLL_BACKOFF = 2.0
+MAX_POLL_INTERVAL = 30.0
+DEFAULT_POLL_TIMEOUT = 600
+
+# Retry rounds for the capacity queue within a single run
+RETRY_ROUNDS = 3
+
+def is_capacity_reason(code: str, message: str = None) -> bool:
+    """Whether an error or provisioning failure code/message points at quota or cloud capacity limits"""
+    if code in CAPACITY_ERROR_CODES:
+        return True
+    text = f"{code or ''} {message or ''}".lower()
+    return any(marker in text for marker in CAPACITY_ERROR_MARKERS)
+
+def is_capacity_error(error: Exception) -> bool:
+    """Whether an API error was caused by quota or cloud capacity limits"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    return is_capacity_reason(body.get('error_code'), body.get('message') or response.text)
+
 def list_sql_warehouses(host: str, token: str):
     """List all SQL warehouses"""
+    cached = load_snapshot(host, "sql_warehouses")
+    if cached is not None:
+        return cached
     url = f"{host}/api/2.0/sql/warehouses"
     headers = get_headers(token)
     try:
@@ -30,8 +83,8 @@ def get_sql_warehouse(host: str, token: str, warehouse_id: str):
         logger.error(f"Failed to get SQL warehouse {warehouse_id}: {e}")
         return None
 
-def create_sql_warehouse(host: str, token: str, warehouse_config: dict):
-    """Create a SQL warehouse"""
+def create_sql_warehouse(host: str, token: str, warehouse_config: dict, retry_queue: list = None):
+    """Create a SQL warehouse (quota/capacity rejections are appended to retry_queue when given)"""
     url = f"{host}/api/2.0/sql/warehouses"
     headers = get_headers(token)
     
@@ -52,17 +105,189 @@ def create_sql_warehouse(host: str, token: str, warehouse_config: dict):
     
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created SQL warehouse: {data['name']}")
+        logger.info(f"Created SQL warehouse: {data['name']}", extra=PER_OBJECT)
         return response.json()
     except Exception as e:
+        if retry_queue is not None and is_capacity_error(e):
+            logger.warning(f"SQL warehouse {data['name']} hit a quota/capacity limit - queued for retry")
+            retry_queue.append(warehouse_config)
+            return None
         logger.error(f"Failed to create SQL warehouse {data['name']}: {e}")
         return None
 
+def stop_sql_warehouse(host: str, token: str, warehouse_id: str):
+    """Stop a SQL warehouse"""
+    url = f"{host}/api/2.0/sql/warehouses/{warehouse_id}/stop"
+    headers = get_headers(token)
+    try:
+        make_api_request("POST", url, headers, {})
+        return True
+    except Exception as e:
+        logger.error(f"Failed to stop SQL warehouse {warehouse_id}: {e}")
+        return False
+
+def delete_sql_warehouse(host: str, token: str, warehouse_id: str):
+    """Delete a SQL warehouse"""
+    url = f"{host}/api/2.0/sql/warehouses/{warehouse_id}"
+    headers = get_headers(token)
+    try:
+        make_api_request("DELETE", url, headers)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete SQL warehouse {warehouse_id}: {e}")
+        return False
+
+def wait_for_warehouses(host: str, token: str, created: queue.Queue, creating: list, expected_state: str,
+                        timeout: float = DEFAULT_POLL_TIMEOUT, max_workers: int = 8):
+    """Poll warehouses from the moment their create call returns until they reach expected_state
+
+    created receives (target ID, source config) pairs from the create workers, creating holds their
+    futures. Each warehouse backs off between its own polls and times out `timeout` seconds after it
+    was created. Returns (settled, failed, timed_out, capacity_failed) lists of (target ID, config)."""
+    settled, failed, timed_out, capacity_failed = [], [], [], []
+    pending = {}  # target ID -> [config, deadline, next poll, poll interval]
+    
+    def add(warehouse_id: str, warehouse_config: dict):
+        now = time.monotonic()
+        pending[warehouse_id] = [warehouse_config, now + timeout, now + POLL_INTERVAL, POLL_INTERVAL]
+    
+    while True:
+        creates_done = all(future.done() for future in creating)
+        while not created.empty():
+            add(*created.get())
+        if creates_done and not pending:
+            break
+        
+        now = time.monotonic()
+        for warehouse_id in [w for w, (_, deadline, _, _) in pending.items() if deadline <= now]:
+            warehouse_config = pending.pop(warehouse_id)[0]
+            logger.warning(f"SQL warehouse {warehouse_config['name']} did not reach {expected_state} within "
+                           f"{timeout:g}s - counted as failed; check it in the target workspace")
+            timed_out.append((warehouse_id, warehouse_config))
+        
+        due = [w for w, (_, _, next_poll, _) in pending.items() if next_poll <= now]
+        details = run_parallel(lambda warehouse_id: get_sql_warehouse(host, token, warehouse_id), due, max_workers)
+        for warehouse_id, detail in zip(due, details):
+            entry = pending[warehouse_id]
+            entry[3] = min(entry[3] * POLL_BACKOFF, MAX_POLL_INTERVAL)
+            entry[2] = time.monotonic() + entry[3]
+            if detail is None:
+                continue
+            state = detail.get('state')
+            name = entry[0]['name']
+            if state == expected_state:
+                logger.info(f"SQL warehouse {name} is {state}", extra=PER_OBJECT)
+                settled.append((warehouse_id, pending.pop(warehouse_id)[0]))
+            elif state in ('DELETING', 'DELETED') or (expected_state == 'RUNNING' and state == 'STOPPED'):
+                reason = detail.get('health', {}).get('failure_reason', {}).get('code', state)
+                if is_capacity_reason(reason):
+                    logger.warning(f"SQL warehouse {name} stopped during provisioning for lack of "
+                                   f"quota/capacity ({reason})")
+                    capacity_failed.append((warehouse_id, pending.pop(warehouse_id)[0]))
+                else:
+                    logger.error(f"SQL warehouse {name} failed to provision: {reason}")
+                    failed.append((warehouse_id, pending.pop(warehouse_id)[0]))
+        
+        # Sleep until the next poll or deadline, waking early when another create call returns
+        wakeups = [min(deadline, next_poll) for _, deadline, next_poll, _ in pending.values()]
+        wait = max(0.0, min(wakeups) - time.monotonic()) if wakeups else None
+        creating = [future for future in creating if not future.done()]
+        if creating:
+            futures_wait(creating, timeout=wait, return_when=FIRST_COMPLETED)
+        elif wait:
+            time.sleep(wait)
+    return settled, failed, timed_out, capacity_failed
+
+def create_sql_warehouses(config: dict, warehouse_configs: list, retry_queue: list):
+    """Create warehouses concurrently, polling each one as soon as its create call returns
+
+    Returns (created, failed) counts; warehouses that failed to provision or did not settle in time
+    count as failed. Capacity rejections, at create time or during provisioning (the stopped
+    warehouse is deleted first), are added to retry_queue and also counted as failed."""
+    target = config['target']
+    settings = config.get('migration_settings', {})
+    create_stopped = settings.get('create_warehouses_stopped', False)
+    expected_state = 'STOPPED' if create_stopped else 'RUNNING'
+    max_workers = get_max_workers(config)
+    created = queue.Queue()
+    
+    def create(warehouse_config: dict):
+        logger.info(f"Creating SQL warehouse: {warehouse_config['name']}", extra=PER_OBJECT)
+        result = create_sql_warehouse(target['host'], target['token'], warehouse_config, retry_queue)
+        if result and 'id' in result:
+            if create_stopped:
+                stop_sql_warehouse(target['host'], target['token'], result['id'])
+            created.put((result['id'], warehouse_config))
+    
+    if warehouse_configs:
+        logger.info(f"Creating {len(warehouse_configs)} SQL warehouses and waiting for them to reach "
+                    f"{expected_state}...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        creating = [executor.submit(profiled(create), warehouse_config) for warehouse_config in warehouse_configs]
+        settled, failed, timed_out, capacity_failed = wait_for_warehouses(
+            target['host'], target['token'], created, creating, expected_state,
+            settings.get('warehouse_poll_timeout_seconds', DEFAULT_POLL_TIMEOUT), max_workers)
+    
+    # Warehouses that stopped for lack of capacity are removed so the retry does not clash on the name
+    kept = settled + failed + timed_out
+    deleted = run_parallel(lambda item: delete_sql_warehouse(target['host'], target['token'], item[0]),
+                           capacity_failed, max_workers)
+    for (warehouse_id, warehouse_config), was_deleted in zip(capacity_failed, deleted):
+        if was_deleted:
+            logger.warning(f"Deleted SQL warehouse {warehouse_config['name']} - queued for retry")
+            retry_queue.append(warehouse_config)
+        else:
+            kept.append((warehouse_id, warehouse_config))
+    
+    # Timed-out and failed warehouses exist in the target already, so they are not re-queued for creation
+    record_id_mappings("warehouse", {warehouse_config['id']: warehouse_id
+                                     for warehouse_id, warehouse_config in kept})
+    return len(settled), len(warehouse_configs) - len(settled)
+
+def process_warehouses(config: dict, warehouse_configs: list):
+    """Create warehouses, retrying capacity rejections after the others have settled"""
+    retry_queue = []
+    success_count, failed_count = create_sql_warehouses(config, warehouse_configs, retry_queue)
+    
+    for attempt in range(1, RETRY_ROUNDS + 1):
+        if not retry_queue:
+            break
+        queued, retry_queue = retry_queue, []
+        failed_count -= len(queued)
+        delay = POLL_INTERVAL * POLL_BACKOFF ** attempt
+        logger.info(f"Retrying {len(queued)} SQL warehouses in {delay:g}s (attempt {attempt}/{RETRY_ROUNDS})...")
+        time.sleep(delay)
+        created, failed = create_sql_warehouses(config, queued, retry_queue)
+        success_count += created
+        failed_count += failed
+    
+    # Capacity rejections are not failures: keep them for a later --retry run
+    failed_count -= len(retry_queue)
+    if retry_queue:
+        write_json_atomic(RETRY_QUEUE_FILE, retry_queue)
+        logger.warning(f"{len(retry_queue)} SQL warehouses are still waiting for quota/capacity - saved to "
+                       f"{RETRY_QUEUE_FILE}; run 'python migrate_sql_warehouses.py --retry' later")
+    elif os.path.exists(RETRY_QUEUE_FILE):
+        os.remove(RETRY_QUEUE_FILE)
+    
+    log_migration_result("SQL Warehouses", success_count, failed_count)
+
+def retry_sql_warehouses():
+    """Create the warehouses left in the retry queue by an earlier run"""
+    config = load_config()
+    try:
+        with open(RETRY_QUEUE_FILE) as f:
+            warehouse_configs = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"No {RETRY_QUEUE_FILE} - nothing to retry")
+        return
+    logger.info(f"Retrying {len(warehouse_configs)} queued SQL warehouses...")
+    process_warehouses(config, warehouse_configs)
+
 def migrate_sql_warehouses():
     """Main migration function for SQL warehouses"""
     config = load_config()
     source = config['source']
-    target = config['target']
     
     logger.info("Starting SQL warehouse migration...")
     
@@ -71,30 +296,17 @@ def migrate_sql_warehouses():
     warehouses = list_sql_warehouses(source['host'], source['token'])
     logger.info(f"Found {len(warehouses)} SQL warehouses")
     
-    # Get detailed config for each warehouse
-    warehouse_configs = []
-    for warehouse in warehouses:
-        warehouse_id = warehouse['id']
-        config_detail = get_sql_warehouse(source['host'], source['token'], warehouse_id)
-        if config_detail:
-            warehouse_configs.append(config_detail)
+    # Get detailed config for each warehouse (list entries are complete unless trimmed)
+    warehouse_configs = fetch_details(
+        warehouses,
+        lambda warehouse: get_sql_warehouse(source['host'], source['token'], warehouse['id']),
+        WAREHOUSE_DETAIL_FIELDS, get_max_workers(config))
     
     # Save backup
     save_backup(warehouse_configs, "sql_warehouses")
     
-    success_count = 0
-    failed_count = 0
-    
-    # Create warehouses in target
-    for warehouse_config in warehouse_configs:
-        logger.info(f"Creating SQL warehouse: {warehouse_config['name']}")
-        
-        if create_sql_warehouse(target['host'], target['token'], warehouse_config):
-            success_count += 1
-        else:
-            failed_count += 1
-    
-    log_migration_result("SQL Warehouses", success_count, failed_count)
+    process_warehouses(config, warehouse_configs)
 
 if __name__ == "__main__":
-    migrate_sql_warehouses()
+    run_script(migrate_sql_warehouses, "sql_warehouses", __doc__,
+               actions={"retry": (retry_sql_warehouses, f"Create the warehouses queued in {RETRY_QUEUE_FILE}")})
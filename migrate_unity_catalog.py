@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Migrate Unity Catalog metadata (storage credentials, external locations, catalogs,
+schemas, volumes and their grants) from source to target Databricks workspace
+Note: Source and target are inventoried concurrently (schemas and volumes are listed
+in parallel per parent), securables are created level by level in dependency order,
+and anything already present in the target with the same definition is skipped - so
+workspaces sharing a metastore cost only the inventory. Storage credentials are
+migrated by reference (IAM role / access connector); service principal secrets cannot
+be read and those credentials must be created manually. Missing grants are added with
+one PATCH per securable
+"""
+import logging
+from collections import Counter
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   list_all, run_parallel, get_max_workers, get_rate_limiter, translate_principal, RateLimiter,
+                   PER_OBJECT)
+
+logger = logging.getLogger(__name__)
+
+UC_API = "/api/2.1/unity-catalog"
+
+# Page size requested from the Unity Catalog list endpoints
+UC_PAGE_SIZE = 1000
+
+# Catalogs and schemas provided by the platform in every metastore
+SYSTEM_CATALOGS = {'system', 'hive_metastore', 'samples', '__databricks_internal'}
+SYSTEM_SCHEMAS = {'information_schema'}
+
+# (securable type, API collection, create fields, fields compared and updated with PATCH), in creation order
+SECURABLES = [
+    ("storage_credential", "storage-credentials",
+     ['name', 'comment', 'read_only', 'aws_iam_role', 'azure_managed_identity', 'databricks_gcp_service_account'],
+     ['comment', 'read_only', 'owner']),
+    ("external_location", "external-locations",
+     ['name', 'url', 'credential_name', 'comment', 'read_only'],
+     ['url', 'credential_name', 'comment', 'read_only', 'owner']),
+    ("catalog", "catalogs",
+     ['name', 'comment', 'properties', 'storage_root', 'provider_name', 'share_name', 'connection_name', 'options'],
+     ['comment', 'properties', 'owner']),
+    ("schema", "schemas",
+     ['name', 'catalog_name', 'comment', 'properties', 'storage_root'],
+     ['comment', 'properties', 'owner']),
+    ("volume", "volumes",
+     ['name', 'catalog_name', 'schema_name', 'volume_type', 'storage_location', 'comment'],
+     ['comment', 'owner']),
+]
+
+# Cloud identity of a storage credential -> fields accepted on create (the rest is server-generated)
+IDENTITY_INPUT_FIELDS = {
+    'aws_iam_role': ['role_arn'],
+    'azure_managed_identity': ['access_connector_id', 'managed_identity_id'],
+    'databricks_gcp_service_account': [],
+}
+
+def securable_name(obj: dict) -> str:
+    """Name used in the API paths of a securable (three-level for schemas and volumes)"""
+    return obj.get('full_name') or obj['name']
+
+def list_securables(host: str, token: str, collection: str, params: dict = None):
+    """List every securable of a collection, following next_page_token"""
+    try:
+        return list_all(host, token, f"{UC_API}/{collection}", collection.replace('-', '_'),
+                        dict(params or {}, max_results=UC_PAGE_SIZE))
+    except Exception as e:
+        logger.error(f"Failed to list {collection} {params or ''}: {e}")
+        return []
+
+def inventory_unity_catalog(host: str, token: str, max_workers: int):
+    """Securables of a metastore by type; schemas and volumes are listed concurrently per parent"""
+    credentials, locations, catalogs = run_parallel(
+        lambda collection: list_securables(host, token, collection),
+        ["storage-credentials", "external-locations", "catalogs"], 3)
+    catalogs = [c for c in catalogs
+                if c['name'] not in SYSTEM_CATALOGS and c.get('catalog_type') != 'SYSTEM_CATALOG']
+    
+    schema_pages = run_parallel(
+        lambda catalog: list_securables(host, token, "schemas", {"catalog_name": catalog['name']}),
+        catalogs, max_workers)
+    schemas = [s for page in schema_pages for s in page if s['name'] not in SYSTEM_SCHEMAS]
+    
+    volume_pages = run_parallel(
+        lambda schema: list_securables(host, token, "volumes",
+                                       {"catalog_name": schema['catalog_name'], "schema_name": schema['name']}),
+        schemas, max_workers)
+    volumes = [v for page in volume_pages for v in page]
+    
+    return {"storage_credential": credentials, "external_location": locations, "catalog": catalogs,
+            "schema": schemas, "volume": volumes}
+
+def create_securable(host: str, token: str, collection: str, data: dict):
+    """Create a securable and return it"""
+    url = f"{host}{UC_API}/{collection}"
+    headers = get_headers(token)
+    try:
+        response = make_api_request("POST", url, headers, data)
+        logger.info(f"Created {collection[:-1]}: {securable_name(response.json())}", extra=PER_OBJECT)
+        return response.json()
+    except Exception as e:
+        logger.error(f"Failed to create {collection[:-1]} {data.get('name')}: {e}")
+        return None
+
+def update_securable(host: str, token: str, collection: str, name: str, changes: dict):
+    """Update the given fields of a securable"""
+    url = f"{host}{UC_API}/{collection}/{name}"
+    headers = get_headers(token)
+    try:
+        make_api_request("PATCH", url, headers, changes)
+        logger.info(f"Updated {collection[:-1]} {name}: {', '.join(sorted(changes))}", extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to update {collection[:-1]} {name}: {e}")
+        return False
+
+def create_payload(securable_type: str, obj: dict, create_fields: list):
+    """Create request for a source securable, or None when it cannot be recreated from metadata"""
+    data = {field: obj[field] for field in create_fields if obj.get(field) is not None}
+    if securable_type == "storage_credential":
+        identities = [identity for identity in IDENTITY_INPUT_FIELDS if identity in data]
+        if not identities:
+            logger.error(f"Storage credential {obj['name']} uses a secret-based identity that cannot be read "
+                         f"from the source; create it manually in the target")
+            return None
+        for identity in identities:
+            data[identity] = {k: v for k, v in data[identity].items() if k in IDENTITY_INPUT_FIELDS[identity]}
+        if 'databricks_gcp_service_account' in data:
+            logger.warning(f"Storage credential {obj['name']} gets a new GCP service account in the target; "
+                           f"grant it access to the buckets it covers")
+    if securable_type == "volume" and obj.get('volume_type') != 'EXTERNAL':
+        # Managed volumes report a storage location but are placed by the target metastore
+        data.pop('storage_location', None)
+    return data
+
+def sync_securable(host: str, token: str, spec: tuple, obj: dict, existing: dict, mappings: dict,
+                   limiter: RateLimiter):
+    """Create or update one securable; returns 'created', 'updated', 'unchanged' or None on failure
+
+    Only writes go through the rate limiter, so unchanged securables are skipped at full speed."""
+    securable_type, collection, create_fields, update_fields = spec
+    desired = {field: obj[field] for field in update_fields if obj.get(field) is not None}
+    if 'owner' in desired:
+        desired['owner'] = translate_principal(desired['owner'], mappings)
+    
+    status = 'updated'
+    if existing is None:
+        data = create_payload(securable_type, obj, create_fields)
+        if data is None:
+            return None
+        limiter.acquire()
+        existing = create_securable(host, token, collection, data)
+        if existing is None:
+            return None
+        status = 'created'
+    
+    changes = {field: value for field, value in desired.items() if existing.get(field) != value}
+    if not changes:
+        return 'unchanged' if status == 'updated' else status
+    limiter.acquire()
+    return status if update_securable(host, token, collection, securable_name(existing), changes) else None
+
+def get_grants(host: str, token: str, securable_type: str, name: str):
+    """Direct privilege assignments on a securable"""
+    url = f"{host}{UC_API}/permissions/{securable_type}/{name}"
+    headers = get_headers(token)
+    try:
+        response = make_api_request("GET", url, headers)
+        return response.json().get('privilege_assignments', [])
+    except Exception as e:
+        logger.error(f"Failed to get grants on {securable_type} {name}: {e}")
+        return None
+
+def update_grants(host: str, token: str, securable_type: str, name: str, changes: list):
+    """Apply every principal's grant changes on a securable in one PATCH"""
+    url = f"{host}{UC_API}/permissions/{securable_type}/{name}"
+    headers = get_headers(token)
+    try:
+        make_api_request("PATCH", url, headers, {"changes": changes})
+        logger.info(f"Granted privileges to {len(changes)} principals on {securable_type} {name}",
+                    extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to update grants on {securable_type} {name}: {e}")
+        return False
+
+def grant_changes(source_assignments: list, target_assignments: list, mappings: dict):
+    """PATCH changes adding the source privileges the target is missing, with principals translated"""
+    granted = {a['principal']: set(a.get('privileges', [])) for a in target_assignments}
+    missing = {}
+    for assignment in source_assignments:
+        principal = translate_principal(assignment['principal'], mappings)
+        privileges = set(assignment.get('privileges', [])) - granted.get(principal, set())
+        if privileges:
+            missing.setdefault(principal, set()).update(privileges)
+    return [{"principal": principal, "add": sorted(privileges)} for principal, privileges in sorted(missing.items())]
+
+def migrate_unity_catalog():
+    """Main migration function for Unity Catalog metadata"""
+    config = load_config()
+    source = config['source']
+    target = config['target']
+    mappings = config.get('mappings', {})
+    max_workers = get_max_workers(config)
+    limiter = get_rate_limiter(config)
+    
+    logger.info("Starting Unity Catalog migration...")
+    
+    # Inventory both metastores at once
+    source_inventory, target_inventory = run_parallel(
+        lambda workspace: inventory_unity_catalog(workspace['host'], workspace['token'], max_workers),
+        [source, target], 2)
+    logger.info("Found " + ", ".join(f"{len(source_inventory[securable_type])} {collection}"
+                                     for securable_type, collection, _, _ in SECURABLES))
+    
+    # Save backup
+    save_backup(source_inventory, "unity_catalog")
+    
+    # Create level by level so every parent exists before its children
+    counts = Counter()
+    synced = []
+    for spec in SECURABLES:
+        securable_type, collection = spec[0], spec[1]
+        existing = {securable_name(obj): obj for obj in target_inventory[securable_type]}
+        if securable_type == "schema":
+            # Catalogs created above come with their own default schemas
+            new_catalogs = [name for synced_type, name, status in synced
+                            if synced_type == "catalog" and status == 'created']
+            pages = run_parallel(
+                lambda catalog: list_securables(target['host'], target['token'], "schemas", {"catalog_name": catalog}),
+                new_catalogs, max_workers)
+            existing.update((securable_name(schema), schema) for page in pages for schema in page)
+    
+        def sync(obj: dict):
+            return sync_securable(target['host'], target['token'], spec, obj, existing.get(securable_name(obj)),
+                                  mappings, limiter)
+    
+        results = run_parallel(sync, source_inventory[securable_type], max_workers)
+        level = Counter(results)
+        logger.info(f"{collection}: {level['created']} created, {level['updated']} updated, "
+                    f"{level['unchanged']} unchanged, {level[None]} failed")
+        counts.update(level)
+        synced.extend((securable_type, securable_name(obj), status)
+                      for obj, status in zip(source_inventory[securable_type], results) if status)
+    
+    # Securables that already existed may hold some of the grants
+    logger.info(f"Comparing grants on {len(synced)} securables...")
+    
+    def read_grants(item: tuple):
+        securable_type, name, status = item
+        source_assignments = get_grants(source['host'], source['token'], securable_type, name)
+        if status == 'created' or source_assignments is None:
+            return source_assignments, []
+        return source_assignments, get_grants(target['host'], target['token'], securable_type, name)
+    
+    assignments = run_parallel(read_grants, synced, max_workers)
+    updates = [(securable_type, name, grant_changes(source_assignments, target_assignments, mappings))
+               for (securable_type, name, _), (source_assignments, target_assignments) in zip(synced, assignments)
+               if source_assignments is not None and target_assignments is not None]
+    updates = [update for update in updates if update[2]]
+    grant_read_failed = len(synced) - sum(1 for s, t in assignments if s is not None and t is not None)
+    logger.info(f"Adding missing grants on {len(updates)} securables")
+    
+    def apply(update: tuple):
+        limiter.acquire()
+        return update_grants(target['host'], target['token'], *update)
+    
+    grant_results = run_parallel(apply, updates, max_workers)
+    
+    success_count = counts['created'] + counts['updated'] + counts['unchanged']
+    failed_count = counts[None] + grant_read_failed + grant_results.count(False)
+    log_migration_result("Unity Catalog", success_count, failed_count)
+
+if __name__ == "__main__":
+    run_script(migrate_unity_catalog, "unity_catalog", __doc__)
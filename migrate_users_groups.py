@@ -3,13 +3,17 @@
 Migrate AD Groups and Users from source to target Databricks workspace
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   translate_principal, PER_OBJECT)
+from inventory import load_snapshot, load_snapshot_object
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_groups(host: str, token: str):
     """Get all groups from workspace"""
+    cached = load_snapshot(host, "groups")
+    if cached is not None:
+        return [group['group_name'] for group in cached]
     url = f"{host}/api/2.0/groups/list"
     headers = get_headers(token)
     response = make_api_request("GET", url, headers)
@@ -17,10 +21,13 @@ def get_groups(host: str, token: str):
 
 def get_group_members(host: str, token: str, group_name: str):
     """Get members of a specific group"""
+    cached = load_snapshot_object(host, "groups", group_name)
+    if cached is not None:
+        return {'members': cached.get('members', [])}
     url = f"{host}/api/2.0/groups/list-members"
     headers = get_headers(token)
     data = {"group_name": group_name}
-    response = make_api_request("GET", url, headers)
+    response = make_api_request("GET", url, headers, data)
     return response.json()
 
 def create_group(host: str, token: str, group_name: str):
@@ -30,7 +37,7 @@ def create_group(host: str, token: str, group_name: str):
     data = {"group_name": group_name}
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created group: {group_name}")
+        logger.info(f"Created group: {group_name}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to create group {group_name}: {e}")
@@ -47,7 +54,7 @@ def add_user_to_workspace(host: str, token: str, user_name: str):
     }
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Added user: {user_name}")
+        logger.info(f"Added user: {user_name}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to add user {user_name}: {e}")
@@ -63,7 +70,7 @@ def add_member_to_group(host: str, token: str, group_name: str, member_name: str
     }
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Added {member_name} to group {group_name}")
+        logger.info(f"Added {member_name} to group {group_name}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to add {member_name} to group {group_name}: {e}")
@@ -74,6 +81,7 @@ def migrate_users_and_groups():
     config = load_config()
     source = config['source']
     target = config['target']
+    mappings = config.get('mappings', {})
     
     logger.info("Starting users and groups migration...")
     
@@ -90,7 +98,7 @@ def migrate_users_and_groups():
     
     # Migrate each group
     for group in groups:
-        logger.info(f"Processing group: {group}")
+        logger.info(f"Processing group: {group}", extra=PER_OBJECT)
         
         # Create group in target
         if create_group(target['host'], target['token'], group):
@@ -105,6 +113,8 @@ def migrate_users_and_groups():
                 for member in members:
                     member_name = member.get('user_name')
                     if member_name:
+                        # Apply principal / email domain mappings
+                        member_name = translate_principal(member_name, mappings)
                         # First ensure user exists in target workspace
                         add_user_to_workspace(target['host'], target['token'], member_name)
                         # Then add to group
@@ -117,4 +127,4 @@ def migrate_users_and_groups():
     log_migration_result("Users and Groups", success_count, failed_count)
 
 if __name__ == "__main__":
-    migrate_users_and_groups()
+    run_script(migrate_users_and_groups, "users_groups", __doc__)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migrate workspace files and other non-notebook objects from source to target Databricks workspace
+Note: Run after migrate_workspace_folders.py. Objects come from the same workspace listing as the
+folder and notebook migrations. Each file is streamed from the source export straight into a
+multipart import in the target, chunk by chunk, so large files are never held in memory or
+base64-encoded. Repos are migrated by migrate_git_repos.py; legacy workspace libraries cannot be
+exported and are only reported
+"""
+import logging
+from collections import Counter
+from utils import (load_config, save_backup, log_migration_result, run_script, run_parallel, get_max_workers,
+                   get_path_rewriter, transfer_workspace_object, PathRewriter, PER_OBJECT)
+from inventory import load_workspace_objects
+
+logger = logging.getLogger(__name__)
+
+# Object type -> (export format, import format) for the objects migrated here
+TRANSFER_FORMATS = {
+    "FILE": ("RAW", "RAW"),
+    "DASHBOARD": ("AUTO", "AUTO"),
+}
+
+# Object types handled by other migrations or not exportable through the workspace API
+SKIPPED_TYPES = {"DIRECTORY", "NOTEBOOK", "REPO"}
+
+def get_workspace_files(host: str, token: str, max_workers: int):
+    """Files and other non-notebook objects from the shared workspace listing, plus the unsupported ones"""
+    objects = [obj for obj in load_workspace_objects(host, token, max_workers)
+               if obj.get('object_type') not in SKIPPED_TYPES]
+    files = [obj for obj in objects if obj['object_type'] in TRANSFER_FORMATS]
+    unsupported = [obj for obj in objects if obj['object_type'] not in TRANSFER_FORMATS]
+    return files, unsupported
+
+def transfer_file(source: dict, target: dict, obj: dict, rewriter: PathRewriter):
+    """Stream one object from the source export into the target import (at its mapped path)"""
+    path = obj['path']
+    export_format, import_format = TRANSFER_FORMATS[obj['object_type']]
+    try:
+        transfer_workspace_object(source, target, path, export_format, {"format": import_format},
+                                  target_path=rewriter.rewrite_path(path))
+        logger.info(f"Imported {obj['object_type'].lower()}: {path}", extra=PER_OBJECT)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to transfer {path}: {e}")
+        return False
+
+def migrate_workspace_files():
+    """Main migration function for workspace files"""
+    config = load_config()
+    source = config['source']
+    target = config['target']
+    max_workers = get_max_workers(config)
+    
+    logger.info("Starting workspace file migration...")
+    
+    # Get files from source
+    logger.info("Fetching workspace files from source workspace...")
+    files, unsupported = get_workspace_files(source['host'], source['token'], max_workers)
+    logger.info(f"Found {len(files)} files and other objects: "
+                + ", ".join(f"{count} {object_type}" for object_type, count in
+                            Counter(obj['object_type'] for obj in files).items()))
+    for obj in unsupported:
+        logger.warning(f"Cannot export {obj['object_type']} {obj['path']}; recreate it manually in the target")
+    
+    # Save backup (listing only - contents are streamed, not kept)
+    save_backup(files + unsupported, "workspace_files")
+    
+    # Transfer concurrently; each transfer holds at most one chunk in memory
+    rewriter = get_path_rewriter(config)
+    results = run_parallel(lambda obj: transfer_file(source, target, obj, rewriter), files, max_workers)
+    
+    success_count = results.count(True)
+    failed_count = results.count(False) + len(unsupported)
+    log_migration_result("Workspace Files", success_count, failed_count)
+
+if __name__ == "__main__":
+    run_script(migrate_workspace_files, "workspace_files", __doc__)
@@ -3,40 +3,16 @@
 Migrate Workspace Folder structure from source to target Databricks workspace
 """
 import logging
-from utils import load_config, get_headers, make_api_request, save_backup, log_migration_result
+from utils import (load_config, get_headers, make_api_request, save_backup, log_migration_result, run_script,
+                   get_max_workers, get_path_rewriter, PER_OBJECT, DEFAULT_MAX_WORKERS)
+from inventory import load_workspace_objects
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def list_workspace_objects(host: str, token: str, path: str = "/"):
-    """List all objects in a workspace path"""
-    url = f"{host}/api/2.0/workspace/list"
-    headers = get_headers(token)
-    data = {"path": path}
-    try:
-        response = make_api_request("GET", url, headers)
-        return response.json().get('objects', [])
-    except Exception as e:
-        logger.error(f"Failed to list workspace path {path}: {e}")
-        return []
-
-def get_workspace_structure(host: str, token: str, path: str = "/", structure: list = None):
-    """Recursively get workspace folder structure"""
-    if structure is None:
-        structure = []
-    
-    objects = list_workspace_objects(host, token, path)
-    
-    for obj in objects:
-        if obj['object_type'] == 'DIRECTORY':
-            structure.append({
-                'path': obj['path'],
-                'object_type': 'DIRECTORY'
-            })
-            # Recursively get subdirectories
-            get_workspace_structure(host, token, obj['path'], structure)
-    
-    return structure
+def get_workspace_structure(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """Get workspace folder structure from the shared workspace listing"""
+    return [{'path': obj['path'], 'object_type': 'DIRECTORY'}
+            for obj in load_workspace_objects(host, token, max_workers) if obj['object_type'] == 'DIRECTORY']
 
 def create_folder(host: str, token: str, path: str):
     """Create a folder in workspace"""
@@ -45,7 +21,7 @@ def create_folder(host: str, token: str, path: str):
     data = {"path": path}
     try:
         response = make_api_request("POST", url, headers, data)
-        logger.info(f"Created folder: {path}")
+        logger.info(f"Created folder: {path}", extra=PER_OBJECT)
         return True
     except Exception as e:
         logger.error(f"Failed to create folder {path}: {e}")
@@ -61,7 +37,7 @@ def migrate_workspace_folders():
     
     # Get folder structure from source
     logger.info("Fetching folder structure from source workspace...")
-    folders = get_workspace_structure(source['host'], source['token'])
+    folders = get_workspace_structure(source['host'], source['token'], get_max_workers(config))
     logger.info(f"Found {len(folders)} folders")
     
     # Save backup
@@ -69,11 +45,12 @@ def migrate_workspace_folders():
     
     success_count = 0
     failed_count = 0
+    rewriter = get_path_rewriter(config)
     
-    # Create folders in target
+    # Create folders in target (home folders and mapped prefixes move to their target paths)
     for folder in folders:
-        path = folder['path']
-        logger.info(f"Creating folder: {path}")
+        path = rewriter.rewrite_path(folder['path'])
+        logger.info(f"Creating folder: {path}", extra=PER_OBJECT)
         
         if create_folder(target['host'], target['token'], path):
             success_count += 1
@@ -83,4 +60,4 @@ def migrate_workspace_folders():
     log_migration_result("Workspace Folders", success_count, failed_count)
 
 if __name__ == "__main__":
-    migrate_workspace_folders()
+    run_script(migrate_workspace_folders, "workspace_folders", __doc__)
@@ -0,0 +1,163 @@
+"""
+Profiling hooks for migration runs
+
+Wraps a migration phase with cProfile and tracemalloc and writes the results
+next to the backup files:
+  - profile_<phase>_<timestamp>.prof  (raw cProfile stats, open with pstats/snakeviz)
+  - profile_<phase>_<timestamp>.txt   (top-N CPU and memory summary)
+
+CPU stats cover the thread that entered the phase and the worker threads
+started through profiled() (run_parallel and the other thread pools wrap their
+tasks with it); each worker thread keeps its own profiler, merged into the
+phase stats at the end. tracemalloc is process-wide, so allocations made by
+any thread are included.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 25
+
+# cProfile cannot be nested on the same thread, so only the outermost
+# profiled phase records CPU stats
+_active_profiler = None
+_profiled_thread = None
+
+# Worker thread profilers recorded during the outermost phase
+_worker_profilers = []
+_worker_lock = threading.Lock()
+_worker_local = threading.local()
+
+def _phase_slug(phase: str) -> str:
+    """Turn a phase name like 'Users & Groups' into 'users_groups'"""
+    return re.sub(r'[^a-z0-9]+', '_', phase.lower()).strip('_') or "phase"
+
+def _format_memory_stats(snapshot_before, snapshot_after, top_n: int) -> str:
+    """Format the top-N allocation sites that grew during the phase"""
+    lines = []
+    for stat in snapshot_after.compare_to(snapshot_before, 'lineno'):
+        if stat.traceback[0].filename == tracemalloc.__file__:
+            continue
+        lines.append(f"  {stat}")
+        if len(lines) >= top_n:
+            break
+    return "\n".join(lines) if lines else "  (no allocations recorded)"
+
+def _worker_profiler():
+    """This thread's profiler for the active phase, created on first use"""
+    owner = _active_profiler
+    if getattr(_worker_local, 'owner', None) is not owner:
+        _worker_local.owner = owner
+        _worker_local.profiler = cProfile.Profile()
+        with _worker_lock:
+            _worker_profilers.append(_worker_local.profiler)
+    return _worker_local.profiler
+
+def profiled(func):
+    """Wrap a task for a worker thread so its calls land in the active phase's CPU profile
+    (returns func unchanged when nothing is being profiled)"""
+    if _active_profiler is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        if _active_profiler is None or threading.get_ident() == _profiled_thread:
+            return func(*args, **kwargs)
+        profiler = _worker_profiler()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already covers this thread (sys.monitoring based cProfile)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+    return wrapper
+
+@contextmanager
+def profile_phase(phase: str, enabled: bool = True, top_n: int = DEFAULT_TOP_N):
+    """Capture a CPU profile and tracemalloc snapshot for a migration phase"""
+    global _active_profiler, _profiled_thread
+
+    if not enabled:
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    snapshot_before = tracemalloc.take_snapshot()
+
+    profiler = None
+    if _active_profiler is None:
+        profiler = cProfile.Profile()
+        _active_profiler = profiler
+        _profiled_thread = threading.get_ident()
+        profiler.enable()
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        outer_profiler = _active_profiler
+        workers = []
+        if profiler:
+            profiler.disable()
+            _active_profiler = None
+            _profiled_thread = None
+            with _worker_lock:
+                workers = _worker_profilers[:]
+                _worker_profilers.clear()
+        elif outer_profiler:
+            # Keep report generation out of the enclosing phase's profile
+            outer_profiler.disable()
+
+        snapshot_after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        basename = f"profile_{_phase_slug(phase)}_{timestamp}"
+
+        summary = io.StringIO()
+        summary.write(f"Profile for phase: {phase}\n")
+        summary.write(f"Wall time: {elapsed:.2f}s\n")
+        summary.write(f"Traced memory: current {current / 1024 / 1024:.1f} MiB, "
+                      f"peak {peak / 1024 / 1024:.1f} MiB\n\n")
+
+        if profiler:
+            stats = pstats.Stats(profiler, stream=summary)
+            if workers:
+                stats.add(*workers)
+            stats.dump_stats(f"{basename}.prof")
+            summary.write(f"CPU profile: phase thread and {len(workers)} worker threads\n\n")
+            summary.write(f"Top {top_n} functions by cumulative time:\n")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+            summary.write(f"Top {top_n} functions by own time:\n")
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(top_n)
+        else:
+            summary.write("CPU profile recorded by the enclosing phase\n\n")
+
+        summary.write(f"Top {top_n} allocation sites (growth during phase):\n")
+        summary.write(_format_memory_stats(snapshot_before, snapshot_after, top_n))
+        summary.write("\n")
+
+        with open(f"{basename}.txt", 'w') as f:
+            f.write(summary.getvalue())
+        logger.info(f"Profile for {phase} saved to {basename}.txt "
+                    f"(peak memory {peak / 1024 / 1024:.1f} MiB, {elapsed:.2f}s)")
+        if not profiler and outer_profiler:
+            outer_profiler.enable()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Post-migration reconciliation: verify that the target workspace matches the source
+
+Crawls both workspaces concurrently, strips fields that are expected to differ
+(IDs, timestamps, states, creators), indexes each object by its natural key
+and a digest of its normalized definition, and reports per object type which
+objects are missing from the target, extra in the target, or different.
+Notebook contents are compared by SHA-256 digest of the exported source.
+Source workspace paths (and job notebook/file paths) are moved by the path
+mappings first, and notebook sources rewritten, exactly as the migration did.
+
+Usage:
+    python reconcile_migration.py
+    python reconcile_migration.py --types jobs clusters --skip-notebook-content
+"""
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+from utils import (load_config, get_headers, make_api_request, run_parallel, setup_logging,
+                   add_common_arguments, use_cassette, get_path_rewriter, PathRewriter, DEFAULT_MAX_WORKERS)
+from inventory import crawl, CRAWLERS
+from migrate_jobs import rewrite_job_paths
+from profiling import profile_phase
+
+logger = logging.getLogger(__name__)
+
+# Fields that legitimately differ between source and target, removed at any depth
+VOLATILE_FIELDS = {
+    'id', 'object_id', 'cluster_id', 'policy_id', 'job_id', 'instance_pool_id',
+    'existing_cluster_id', 'warehouse_id', 'data_source_id',
+    'created_time', 'created_at_timestamp', 'start_time', 'terminated_time',
+    'last_activity_time', 'last_restarted_time', 'last_state_loss_time',
+    'last_updated_timestamp', 'modified_at', 'created_at',
+    'creator_user_name', 'creator_name', 'run_as_user_name',
+    'state', 'state_message', 'termination_reason', 'health', 'num_active_sessions',
+    'num_clusters', 'stats', 'status', 'jdbc_url', 'odbc_params', 'spark_context_id', 'jdbc_port',
+    'driver', 'executors', 'default_tags', 'cluster_source', 'head_commit_id',
+}
+
+# Lists whose order is not meaningful
+UNORDERED_LISTS = {'members', 'secrets', 'init_scripts', 'ssh_public_keys'}
+
+def natural_key(object_type: str, obj: Dict[str, Any]) -> str:
+    """Identity of an object that survives migration"""
+    if object_type == "groups":
+        return obj['group_name']
+    if object_type in ("cluster_policies", "sql_warehouses", "secret_scopes"):
+        return obj.get('name', '')
+    if object_type == "clusters":
+        return obj.get('cluster_name', '')
+    if object_type == "instance_pools":
+        return obj.get('instance_pool_name', '')
+    if object_type == "jobs":
+        return obj.get('settings', {}).get('name', '')
+    return obj.get('path', '')
+
+def map_source_paths(object_type: str, obj: Dict[str, Any], rewriter: PathRewriter) -> Dict[str, Any]:
+    """Source object with its workspace paths moved as the migration moves them (repos stay put)"""
+    if object_type == "workspace_objects" and obj.get('object_type') != 'REPO':
+        mapped = dict(obj, path=rewriter.rewrite_path(obj.get('path', '')))
+        if obj.get('object_type') == 'NOTEBOOK':
+            # Rewritten sources change size; their contents are compared by digest instead
+            mapped.pop('size', None)
+        return mapped
+    if object_type == "jobs" and 'settings' in obj:
+        settings = copy.deepcopy(obj['settings'])
+        rewrite_job_paths(settings, rewriter)
+        return dict(obj, settings=settings)
+    return obj
+
+def normalize(value: Any, field: str = None) -> Any:
+    """Drop volatile fields and sort unordered lists so equal definitions compare equal"""
+    if isinstance(value, dict):
+        return {k: normalize(v, k) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        items = [normalize(v) for v in value]
+        if field in UNORDERED_LISTS:
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+        return items
+    return value
+
+def digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def build_index(object_type: str, rows: List[tuple]) -> Dict[str, Dict[str, Any]]:
+    """Map natural key -> {digest, object}; duplicate names get a #N suffix"""
+    entries = sorted(((natural_key(object_type, payload), digest(normalize(payload)), payload)
+                      for _, _, payload in rows), key=lambda e: (e[0], e[1]))
+    index = {}
+    for key, object_digest, payload in entries:
+        unique_key = key
+        suffix = 2
+        while unique_key in index:
+            unique_key = f"{key}#{suffix}"
+            suffix += 1
+        index[unique_key] = {"digest": object_digest, "object": payload}
+    return index
+
+def _is_subset(source_value: Any, target_value: Any) -> bool:
+    """True if every source field is present and equal in the target (target may add defaults)"""
+    if isinstance(source_value, dict) and isinstance(target_value, dict):
+        return all(k in target_value and _is_subset(v, target_value[k]) for k, v in source_value.items())
+    return source_value == target_value
+
+def compare_indexes(source_index: dict, target_index: dict) -> Dict[str, Any]:
+    """Set differences over hash-keyed indexes (linear in object count)"""
+    missing = [k for k in source_index if k not in target_index]
+    extra = [k for k in target_index if k not in source_index]
+    different = [k for k, entry in source_index.items()
+                 if k in target_index and target_index[k]["digest"] != entry["digest"]
+                 and not _is_subset(normalize(entry["object"]), normalize(target_index[k]["object"]))]
+    return {
+        "source_count": len(source_index),
+        "target_count": len(target_index),
+        "missing": sorted(missing),
+        "extra": sorted(extra),
+        "different": sorted(different),
+    }
+
+def notebook_digest(host: str, token: str, path: str, rewriter: PathRewriter = None) -> str:
+    """SHA-256 of a notebook's exported source (direct download, no base64 round trip),
+    optionally after rewriting its path references"""
+    url = f"{host}/api/2.0/workspace/export"
+    data = {"path": path, "format": "SOURCE", "direct_download": "true"}
+    response = make_api_request("GET", url, get_headers(token), data)
+    content = rewriter.rewrite(response.content) if rewriter else response.content
+    return hashlib.sha256(content).hexdigest()
+
+def compare_notebook_contents(source: dict, target: dict, paths: List[tuple], rewriter: PathRewriter = None,
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> List[str]:
+    """Return the target paths of the (source path, target path) notebooks whose source differs
+    between workspaces; source contents are rewritten first when a rewriter is given"""
+    def differs(pair: tuple) -> bool:
+        source_path, target_path = pair
+        try:
+            source_digest = notebook_digest(source['host'], source['token'], source_path, rewriter)
+            target_digest = notebook_digest(target['host'], target['token'], target_path)
+            return source_digest != target_digest
+        except Exception as e:
+            logger.error(f"Failed to compare notebook {source_path}: {e}")
+            return True
+
+    results = run_parallel(differs, paths, max_workers)
+    return sorted(target_path for (_, target_path), is_different in zip(paths, results) if is_different)
+
+def reconcile(source: dict, target: dict, object_types: List[str] = None,
+              compare_content: bool = True, max_workers: int = DEFAULT_MAX_WORKERS,
+              rewriter: PathRewriter = None) -> Dict[str, Any]:
+    """Compare source and target inventories and return a report per object type"""
+    object_types = object_types or list(CRAWLERS)
+    rewriter = rewriter if rewriter is not None and rewriter.active else None
+
+    logger.info("Crawling source and target workspaces...")
+    source_inventory, target_inventory = run_parallel(
+        lambda ws: crawl(ws['host'], ws['token'], object_types, max_workers), [source, target], 2)
+
+    report = {}
+    for object_type in object_types:
+        source_rows = source_inventory.get(object_type)
+        target_rows = target_inventory.get(object_type)
+        if source_rows is None or target_rows is None:
+            report[object_type] = {"error": "crawl failed"}
+            continue
+        # Source path of each mapped workspace object, for exporting its contents
+        source_paths = {}
+        if rewriter:
+            mapped_rows = []
+            for key, name, payload in source_rows:
+                mapped = map_source_paths(object_type, payload, rewriter)
+                if object_type == "workspace_objects":
+                    source_paths[mapped.get('path')] = payload.get('path')
+                mapped_rows.append((key, name, mapped))
+            source_rows = mapped_rows
+        source_index = build_index(object_type, source_rows)
+        target_index = build_index(object_type, target_rows)
+        result = compare_indexes(source_index, target_index)
+
+        if object_type == "workspace_objects" and compare_content:
+            notebooks = [(source_paths.get(k, k), k) for k, entry in source_index.items()
+                         if entry["object"].get('object_type') == 'NOTEBOOK' and k in target_index]
+            logger.info(f"Comparing contents of {len(notebooks)} notebooks...")
+            result["content_different"] = compare_notebook_contents(source, target, notebooks, rewriter,
+                                                                    max_workers)
+        report[object_type] = result
+    return report
+
+def log_report(report: Dict[str, Any]):
+    header = f"{'Object type':<20}{'Source':>8}{'Target':>8}{'Missing':>9}{'Extra':>7}{'Different':>11}"
+    logger.info(header)
+    logger.info("-" * len(header))
+    for object_type, result in report.items():
+        if "error" in result:
+            logger.error(f"{object_type:<20}  {result['error']}")
+            continue
+        different = len(result["different"]) + len(result.get("content_different", []))
+        logger.info(f"{object_type:<20}{result['source_count']:>8}{result['target_count']:>8}"
+                    f"{len(result['missing']):>9}{len(result['extra']):>7}{different:>11}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare source and target workspaces after migration')
+    parser.add_argument('--types', nargs='+', choices=list(CRAWLERS),
+                        help='Object types to reconcile (default: all)')
+    parser.add_argument('--skip-notebook-content', action='store_true',
+                        help='Only compare notebook paths, not their contents')
+    parser.add_argument('--output', default=None, help='Path of the JSON report')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    config = load_config()
+    setup_logging(config)
+    max_workers = config.get('migration_settings', {}).get('max_workers', DEFAULT_MAX_WORKERS)
+    output = args.output or f"reconciliation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    start = time.perf_counter()
+    with use_cassette(args.record_cassette, args.replay_cassette), \
+            profile_phase("reconciliation", enabled=args.profile, top_n=args.profile_top):
+        report = reconcile(config['source'], config['target'], args.types,
+                           not args.skip_notebook_content, max_workers, get_path_rewriter(config))
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    log_report(report)
+    logger.info(f"Reconciliation completed in {time.perf_counter() - start:.1f}s - report saved to {output}")
+
+    clean = all("error" not in r and not r["missing"] and not r["different"]
+                and not r.get("content_different") for r in report.values())
+    return 0 if clean else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
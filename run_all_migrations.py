@@ -8,38 +8,50 @@ from datetime import datetime
 
 # Import all migration modules
 from migrate_users_groups import migrate_users_and_groups
+from migrate_unity_catalog import migrate_unity_catalog
 from migrate_cluster_policies import migrate_cluster_policies
+from migrate_instance_pools import migrate_instance_pools, prewarm_instance_pools
 from migrate_sql_warehouses import migrate_sql_warehouses
+from migrate_sql_queries import migrate_sql_queries
 from migrate_secret_scopes import migrate_secret_scopes
 from migrate_workspace_folders import migrate_workspace_folders
 from migrate_clusters import migrate_clusters
 from migrate_notebooks import migrate_notebooks
+from migrate_workspace_files import migrate_workspace_files
 from migrate_git_repos import migrate_git_repos
 from migrate_jobs import migrate_jobs
+from migrate_permissions import migrate_permissions
+from inventory import begin_run
+from profiling import profile_phase, DEFAULT_TOP_N
+from utils import parse_args, load_config, setup_logging, use_cassette
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-def run_all_migrations():
+def run_all_migrations(profile: bool = False, profile_top: int = DEFAULT_TOP_N):
     """Run all migrations in the correct order"""
     start_time = datetime.now()
     logger.info("="*80)
     logger.info("Starting complete workspace migration")
     logger.info("="*80)
     
+    # Listings crawled by one migration (e.g. the workspace tree) are reused by the later ones
+    begin_run()
+    
     migrations = [
         ("Users & Groups", migrate_users_and_groups),
+        ("Unity Catalog", migrate_unity_catalog),
         ("Cluster Policies", migrate_cluster_policies),
+        ("Instance Pools", migrate_instance_pools),
         ("SQL Warehouses", migrate_sql_warehouses),
+        ("SQL Queries & Dashboards", migrate_sql_queries),
         ("Secret Scopes", migrate_secret_scopes),
         ("Workspace Folders", migrate_workspace_folders),
         ("Clusters", migrate_clusters),
         ("Notebooks", migrate_notebooks),
+        ("Workspace Files", migrate_workspace_files),
         ("Git Repos", migrate_git_repos),
-        ("Jobs", migrate_jobs)
+        ("Jobs", migrate_jobs),
+        ("Permissions", migrate_permissions)
     ]
     
     results = []
@@ -50,7 +62,8 @@ def run_all_migrations():
         logger.info(f"{'='*80}")
         
         try:
-            migration_func()
+            with profile_phase(name, enabled=profile, top_n=profile_top):
+                migration_func()
             results.append((name, "SUCCESS"))
             logger.info(f"✓ Completed migration: {name}")
         except Exception as e:
@@ -64,6 +77,13 @@ def run_all_migrations():
                 logger.info("Migration process stopped by user")
                 break
     
+    # Pre-warm pools only once the migration traffic is over
+    if load_config().get('migration_settings', {}).get('prewarm_instance_pools', False):
+        try:
+            prewarm_instance_pools()
+        except Exception as e:
+            logger.error(f"Instance pool pre-warm failed: {e}")
+    
     # Print summary
     end_time = datetime.now()
     duration = end_time - start_time
@@ -88,9 +108,12 @@ def run_all_migrations():
     logger.info("5. Test all-purpose clusters and start them if needed")
     logger.info("6. Verify Git repo credentials are configured")
     logger.info("7. Run test jobs to ensure everything works")
+    logger.info("8. Check permission errors above for principals missing in the target")
     logger.info(f"{'='*80}")
 
 if __name__ == "__main__":
+    args = parse_args(__doc__)
+    setup_logging(load_config())
     print("""
     ╔══════════════════════════════════════════════════════════════╗
     ║   Databricks Unity Catalog Workspace Migration Tool         ║
@@ -107,7 +130,8 @@ if __name__ == "__main__":
     
     response = input("Continue with migration? (yes/no): ")
     if response.lower() == 'yes':
-        run_all_migrations()
+        with use_cassette(args.record_cassette, args.replay_cassette):
+            run_all_migrations(profile=args.profile, profile_top=args.profile_top)
     else:
         logger.info("Migration cancelled by user")
         sys.exit(0)
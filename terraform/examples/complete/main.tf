@@ -83,8 +83,10 @@ module "repos" {
 module "jobs" {
   source = "../../modules/jobs"
   
-  jobs        = var.jobs
-  common_tags = var.common_tags
+  jobs           = var.jobs
+  common_tags    = var.common_tags
+  cluster_ids    = module.clusters.cluster_ids
+  notebook_paths = module.workspace.notebook_paths
   
   # Jobs depend on most other resources
   depends_on = [
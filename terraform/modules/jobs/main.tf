@@ -15,15 +15,49 @@ resource "databricks_job" "jobs" {
   name                = each.value.name
   max_concurrent_runs = lookup(each.value, "max_concurrent_runs", 1)
   timeout_seconds     = lookup(each.value, "timeout_seconds", 0)
-  
+
   # Email notifications
   dynamic "email_notifications" {
     for_each = lookup(each.value, "email_notifications", null) != null ? [each.value.email_notifications] : []
     content {
-      on_start                 = lookup(email_notifications.value, "on_start", [])
-      on_success               = lookup(email_notifications.value, "on_success", [])
-      on_failure               = lookup(email_notifications.value, "on_failure", [])
-      no_alert_for_skipped_runs = lookup(email_notifications.value, "no_alert_for_skipped_runs", false)
+      on_start                               = lookup(email_notifications.value, "on_start", [])
+      on_success                             = lookup(email_notifications.value, "on_success", [])
+      on_failure                             = lookup(email_notifications.value, "on_failure", [])
+      on_duration_warning_threshold_exceeded = lookup(email_notifications.value, "on_duration_warning_threshold_exceeded", [])
+      no_alert_for_skipped_runs              = lookup(email_notifications.value, "no_alert_for_skipped_runs", false)
+    }
+  }
+
+  # Webhook notifications (notification destination IDs)
+  dynamic "webhook_notifications" {
+    for_each = lookup(each.value, "webhook_notifications", null) != null ? [each.value.webhook_notifications] : []
+    content {
+      dynamic "on_start" {
+        for_each = lookup(webhook_notifications.value, "on_start", [])
+        content {
+          id = on_start.value.id
+        }
+      }
+      dynamic "on_success" {
+        for_each = lookup(webhook_notifications.value, "on_success", [])
+        content {
+          id = on_success.value.id
+        }
+      }
+      dynamic "on_failure" {
+        for_each = lookup(webhook_notifications.value, "on_failure", [])
+        content {
+          id = on_failure.value.id
+        }
+      }
+    }
+  }
+
+  dynamic "notification_settings" {
+    for_each = lookup(each.value, "notification_settings", null) != null ? [each.value.notification_settings] : []
+    content {
+      no_alert_for_skipped_runs  = lookup(notification_settings.value, "no_alert_for_skipped_runs", false)
+      no_alert_for_canceled_runs = lookup(notification_settings.value, "no_alert_for_canceled_runs", false)
     }
   }
 
@@ -37,18 +71,76 @@ resource "databricks_job" "jobs" {
     }
   }
 
+  # Continuous trigger
+  dynamic "continuous" {
+    for_each = lookup(each.value, "continuous", null) != null ? [each.value.continuous] : []
+    content {
+      pause_status = lookup(continuous.value, "pause_status", "UNPAUSED")
+    }
+  }
+
+  # Identity the job runs as (a user or a service principal)
+  dynamic "run_as" {
+    for_each = lookup(each.value, "run_as", null) != null ? [each.value.run_as] : []
+    content {
+      user_name              = lookup(run_as.value, "user_name", null)
+      service_principal_name = lookup(run_as.value, "service_principal_name", null)
+    }
+  }
+
+  # Shared job clusters referenced by tasks through job_cluster_key (the for expression
+  # inside try() treats a missing or null list as empty without unifying element types)
+  dynamic "job_cluster" {
+    for_each = try([for c in each.value.job_clusters : c], [])
+    content {
+      job_cluster_key = job_cluster.value.job_cluster_key
+
+      new_cluster {
+        spark_version           = job_cluster.value.new_cluster.spark_version
+        node_type_id            = lookup(job_cluster.value.new_cluster, "node_type_id", null)
+        driver_node_type_id     = lookup(job_cluster.value.new_cluster, "driver_node_type_id", null)
+        instance_pool_id        = lookup(job_cluster.value.new_cluster, "instance_pool_id", null)
+        driver_instance_pool_id = lookup(job_cluster.value.new_cluster, "driver_instance_pool_id", null)
+        policy_id               = lookup(job_cluster.value.new_cluster, "policy_id", null)
+        num_workers             = lookup(job_cluster.value.new_cluster, "autoscale", null) == null ? lookup(job_cluster.value.new_cluster, "num_workers", 1) : null
+        spark_conf              = lookup(job_cluster.value.new_cluster, "spark_conf", {})
+        spark_env_vars          = lookup(job_cluster.value.new_cluster, "spark_env_vars", {})
+        custom_tags             = lookup(job_cluster.value.new_cluster, "custom_tags", {})
+        data_security_mode      = lookup(job_cluster.value.new_cluster, "data_security_mode", null)
+        single_user_name        = lookup(job_cluster.value.new_cluster, "single_user_name", null)
+        runtime_engine          = lookup(job_cluster.value.new_cluster, "runtime_engine", null)
+
+        dynamic "autoscale" {
+          for_each = lookup(job_cluster.value.new_cluster, "autoscale", null) != null ? [job_cluster.value.new_cluster.autoscale] : []
+          content {
+            min_workers = autoscale.value.min_workers
+            max_workers = autoscale.value.max_workers
+          }
+        }
+      }
+    }
+  }
+
   # Tasks (for multi-task jobs)
   dynamic "task" {
-    for_each = lookup(each.value, "tasks", [])
+    for_each = try([for t in each.value.tasks : t], [])
     content {
-      task_key = task.value.task_key
+      task_key                  = task.value.task_key
+      description               = lookup(task.value, "description", null)
+      run_if                    = lookup(task.value, "run_if", null)
+      timeout_seconds           = lookup(task.value, "timeout_seconds", null)
+      max_retries               = lookup(task.value, "max_retries", null)
+      min_retry_interval_millis = lookup(task.value, "min_retry_interval_millis", null)
+      retry_on_timeout          = lookup(task.value, "retry_on_timeout", null)
+      job_cluster_key           = lookup(task.value, "job_cluster_key", null)
 
-      # Notebook task
+      # Notebook task (notebook_key refers to a notebook exported to the workspace module)
       dynamic "notebook_task" {
         for_each = lookup(task.value, "notebook_task", null) != null ? [task.value.notebook_task] : []
         content {
-          notebook_path   = notebook_task.value.notebook_path
+          notebook_path   = lookup(notebook_task.value, "notebook_key", null) != null ? lookup(var.notebook_paths, notebook_task.value.notebook_key, notebook_task.value.notebook_path) : notebook_task.value.notebook_path
           base_parameters = lookup(notebook_task.value, "base_parameters", {})
+          source          = lookup(notebook_task.value, "source", null)
         }
       }
 
@@ -58,6 +150,45 @@ resource "databricks_job" "jobs" {
         content {
           python_file = spark_python_task.value.python_file
           parameters  = lookup(spark_python_task.value, "parameters", [])
+          source      = lookup(spark_python_task.value, "source", null)
+        }
+      }
+
+      # Spark JAR task
+      dynamic "spark_jar_task" {
+        for_each = lookup(task.value, "spark_jar_task", null) != null ? [task.value.spark_jar_task] : []
+        content {
+          main_class_name = spark_jar_task.value.main_class_name
+          parameters      = lookup(spark_jar_task.value, "parameters", [])
+        }
+      }
+
+      # Python wheel task
+      dynamic "python_wheel_task" {
+        for_each = lookup(task.value, "python_wheel_task", null) != null ? [task.value.python_wheel_task] : []
+        content {
+          package_name     = python_wheel_task.value.package_name
+          entry_point      = python_wheel_task.value.entry_point
+          parameters       = lookup(python_wheel_task.value, "parameters", [])
+          named_parameters = lookup(python_wheel_task.value, "named_parameters", {})
+        }
+      }
+
+      # Delta Live Tables pipeline task
+      dynamic "pipeline_task" {
+        for_each = lookup(task.value, "pipeline_task", null) != null ? [task.value.pipeline_task] : []
+        content {
+          pipeline_id  = pipeline_task.value.pipeline_id
+          full_refresh = lookup(pipeline_task.value, "full_refresh", false)
+        }
+      }
+
+      # Run another job (job_id must be the ID in the target workspace)
+      dynamic "run_job_task" {
+        for_each = lookup(task.value, "run_job_task", null) != null ? [task.value.run_job_task] : []
+        content {
+          job_id         = run_job_task.value.job_id
+          job_parameters = lookup(run_job_task.value, "job_parameters", {})
         }
       }
 
@@ -65,10 +196,15 @@ resource "databricks_job" "jobs" {
       dynamic "new_cluster" {
         for_each = lookup(task.value, "new_cluster", null) != null ? [task.value.new_cluster] : []
         content {
-          spark_version = new_cluster.value.spark_version
-          node_type_id  = new_cluster.value.node_type_id
-          num_workers   = lookup(new_cluster.value, "num_workers", 1)
-          
+          spark_version    = new_cluster.value.spark_version
+          node_type_id     = lookup(new_cluster.value, "node_type_id", null)
+          instance_pool_id = lookup(new_cluster.value, "instance_pool_id", null)
+          policy_id        = lookup(new_cluster.value, "policy_id", null)
+          num_workers      = lookup(new_cluster.value, "autoscale", null) == null ? lookup(new_cluster.value, "num_workers", 1) : null
+          spark_conf       = lookup(new_cluster.value, "spark_conf", {})
+          spark_env_vars   = lookup(new_cluster.value, "spark_env_vars", {})
+          custom_tags      = lookup(new_cluster.value, "custom_tags", {})
+
           dynamic "autoscale" {
             for_each = lookup(new_cluster.value, "autoscale", null) != null ? [new_cluster.value.autoscale] : []
             content {
@@ -79,25 +215,58 @@ resource "databricks_job" "jobs" {
         }
       }
 
-      # Existing cluster
-      existing_cluster_id = lookup(task.value, "existing_cluster_id", null)
+      # Existing cluster (existing_cluster_key refers to a cluster in the clusters module)
+      existing_cluster_id = lookup(task.value, "existing_cluster_key", null) != null ? lookup(var.cluster_ids, task.value.existing_cluster_key, null) : lookup(task.value, "existing_cluster_id", null)
 
       # Dependencies
       dynamic "depends_on" {
-        for_each = lookup(task.value, "depends_on", [])
+        for_each = try([for d in task.value.depends_on : d], [])
         content {
           task_key = depends_on.value
         }
       }
 
+      # Task-level email notifications
+      dynamic "email_notifications" {
+        for_each = lookup(task.value, "email_notifications", null) != null ? [task.value.email_notifications] : []
+        content {
+          on_start   = lookup(email_notifications.value, "on_start", [])
+          on_success = lookup(email_notifications.value, "on_success", [])
+          on_failure = lookup(email_notifications.value, "on_failure", [])
+        }
+      }
+
       # Libraries
       dynamic "library" {
-        for_each = lookup(task.value, "libraries", [])
+        for_each = try([for l in task.value.libraries : l], [])
         content {
+          jar          = lookup(library.value, "jar", null)
+          egg          = lookup(library.value, "egg", null)
+          whl          = lookup(library.value, "whl", null)
+          requirements = lookup(library.value, "requirements", null)
+
           dynamic "pypi" {
             for_each = lookup(library.value, "pypi", null) != null ? [library.value.pypi] : []
             content {
               package = pypi.value.package
+              repo    = lookup(pypi.value, "repo", null)
+            }
+          }
+
+          dynamic "maven" {
+            for_each = lookup(library.value, "maven", null) != null ? [library.value.maven] : []
+            content {
+              coordinates = maven.value.coordinates
+              repo        = lookup(maven.value, "repo", null)
+              exclusions  = lookup(maven.value, "exclusions", [])
+            }
+          }
+
+          dynamic "cran" {
+            for_each = lookup(library.value, "cran", null) != null ? [library.value.cran] : []
+            content {
+              package = cran.value.package
+              repo    = lookup(cran.value, "repo", null)
             }
           }
         }
@@ -127,6 +296,6 @@ resource "databricks_job" "jobs" {
   # Tags
   tags = merge(
     var.common_tags,
-    lookup(each.value, "tags", {})
+    try(coalesce(each.value.tags, {}), {})
   )
 }
@@ -1,17 +1,12 @@
 variable "jobs" {
-  description = "Map of jobs to create"
-  type = map(object({
-    name                = string
-    max_concurrent_runs = optional(number)
-    timeout_seconds     = optional(number)
-    email_notifications = optional(any)
-    schedule            = optional(any)
-    tasks               = optional(list(any))
-    notebook_task       = optional(any)
-    new_cluster         = optional(any)
-    existing_cluster_id = optional(string)
-    tags                = optional(map(string))
-  }))
+  description = <<-EOT
+    Map of jobs to create, as written to jobs.auto.tfvars.json by export_to_terraform.py. Each job has a
+    name and any of: max_concurrent_runs, timeout_seconds, email_notifications, webhook_notifications,
+    notification_settings, schedule, continuous, run_as, job_clusters, tasks, tags, plus the legacy
+    single-task notebook_task/new_cluster/existing_cluster_id. Declared as any because tasks differ in
+    shape from job to job, which an object type cannot unify.
+  EOT
+  type    = any
   default = {}
 }
 
@@ -20,3 +15,15 @@ variable "common_tags" {
   type        = map(string)
   default     = {}
 }
+
+variable "cluster_ids" {
+  description = "Map of cluster keys to IDs, used to resolve a task's existing_cluster_key"
+  type        = map(string)
+  default     = {}
+}
+
+variable "notebook_paths" {
+  description = "Map of notebook keys to paths, used to resolve a notebook task's notebook_key"
+  type        = map(string)
+  default     = {}
+}
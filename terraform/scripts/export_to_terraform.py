@@ -7,25 +7,121 @@ Terraform .tf files that can be used to recreate the resources in
 a target workspace.
 """
 
-import json
 import argparse
+import hashlib
+import json
 import os
+import re
+import threading
+import time
+from collections import Counter
 from pathlib import Path
 import sys
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from utils import load_config, get_headers, make_api_request
+from utils import (load_config, get_headers, make_api_request, add_common_arguments, use_cassette, list_all,
+                   run_parallel, write_json_atomic, stream_to_file, DEFAULT_MAX_WORKERS)
+from profiling import profile_phase
+from inventory import load_snapshot, configure_inventory, crawl_workspace_objects
+
+_print_lock = threading.Lock()
+
+def emit(message: str = ""):
+    """Print a whole line at once so output from concurrent exporters does not interleave"""
+    with _print_lock:
+        print(message, flush=True)
+
+MANIFEST_FILE = ".export_manifest.json"
+
+def digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def resource_key(prefix: str, identity: str) -> str:
+    """Stable Terraform key derived from an object's identity (name or path), not its position"""
+    slug = re.sub(r'[^a-z0-9]+', '_', identity.lower()).strip('_')[:40]
+    return f"{prefix}_{slug}_{hashlib.sha256(identity.encode()).hexdigest()[:8]}"
+
+def resource_keys(prefix: str, objects: list, name_of, id_of=None) -> list:
+    """Keys for a list of objects; objects sharing a name are told apart by their source ID"""
+    names = [name_of(obj) or "" for obj in objects]
+    counts = Counter(names)
+    keys = []
+    for obj, name in zip(objects, names):
+        identity = f"{name}#{id_of(obj)}" if counts[name] > 1 and id_of else name
+        keys.append(resource_key(prefix, identity))
+    return keys
+
+class ExportManifest:
+    """Digests of what the previous export wrote, so unchanged resources are not rewritten"""
 
-def export_users_groups(host: str, token: str, output_dir: str):
+    def __init__(self, output_dir: str, enabled: bool = True):
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self.sections = {}
+        self._lock = threading.Lock()
+        if enabled and os.path.exists(self.path):
+            with open(self.path) as f:
+                self.sections = json.load(f).get("sections", {})
+
+    def get(self, section: str) -> dict:
+        with self._lock:
+            return dict(self.sections.get(section, {}))
+
+    def update(self, section: str, entries: dict):
+        with self._lock:
+            self.sections[section] = entries
+
+    def save(self):
+        with self._lock:
+            payload = {"version": 1, "sections": dict(self.sections)}
+        write_json_atomic(self.path, payload)
+
+def write_tfvars(output_dir: str, filename: str, tf_config: dict, manifest: ExportManifest = None):
+    """Write a tfvars file unless no resource in it changed; returns (path, change summary)"""
+    output_file = os.path.join(output_dir, filename)
+    tf_config = {section: dict(sorted(resources.items())) for section, resources in tf_config.items()}
+    digests = {f"{section}/{key}": digest(value)
+               for section, resources in tf_config.items() for key, value in resources.items()}
+    previous = manifest.get(filename) if manifest else {}
+    
+    if manifest and previous == digests and os.path.exists(output_file):
+        summary = "unchanged"
+    else:
+        write_json_atomic(output_file, tf_config)
+        added = len(digests.keys() - previous.keys())
+        removed = len(previous.keys() - digests.keys())
+        changed = sum(1 for key in digests if key in previous and previous[key] != digests[key])
+        summary = f"{added} added, {changed} changed, {removed} removed"
+    if manifest:
+        manifest.update(filename, digests)
+    return output_file, summary
+
+def list_objects(host: str, token: str, inventory_type: str, endpoint: str, items_key: str,
+                 params: dict = None, token_param: str = "page_token"):
+    """Read objects from the inventory snapshot, falling back to a fully paginated live listing"""
+    objects = load_snapshot(host, inventory_type)
+    if objects is None:
+        objects = list_all(host, token, endpoint, items_key, params, token_param)
+    return objects
+
+def list_all_purpose_clusters(host: str, token: str):
+    """All-purpose clusters and their stable resource keys"""
+    clusters = list_objects(host, token, "clusters", "/api/2.0/clusters/list", 'clusters')
+    all_purpose = [c for c in clusters if c.get('cluster_source') != 'JOB']
+    keys = resource_keys("cluster", all_purpose, lambda c: c.get('cluster_name'), lambda c: c.get('cluster_id'))
+    return all_purpose, keys
+
+def export_users_groups(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                        manifest: ExportManifest = None):
     """Export users and groups to Terraform format"""
-    print("Exporting users and groups...")
+    emit("Exporting users and groups...")
     
     # Get groups
-    url = f"{host}/api/2.0/groups/list"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    groups = response.json().get('group_names', [])
+    cached = load_snapshot(host, "groups")
+    if cached is not None:
+        groups = [group['group_name'] for group in cached]
+    else:
+        groups = list_objects(host, token, "groups", "/api/2.0/groups/list", 'group_names')
     
     # Generate Terraform config
     tf_config = {
@@ -34,35 +130,26 @@ def export_users_groups(host: str, token: str, output_dir: str):
         "group_members": {}
     }
     
-    for i, group in enumerate(groups):
-        key = f"group_{i}"
+    for key, group in zip(resource_keys("group", groups, lambda g: g), groups):
         tf_config["groups"][key] = {
             "display_name": group
         }
     
     # Write to file
-    output_file = os.path.join(output_dir, "users_groups.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "users_groups.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(groups)} groups to {output_file}")
+    emit(f"  ✓ Exported {len(groups)} groups to {output_file} ({summary})")
 
-def export_clusters(host: str, token: str, output_dir: str):
+def export_clusters(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                    manifest: ExportManifest = None):
     """Export clusters to Terraform format"""
-    print("Exporting clusters...")
-    
-    url = f"{host}/api/2.0/clusters/list"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    clusters = response.json().get('clusters', [])
+    emit("Exporting clusters...")
     
-    # Filter all-purpose clusters
-    all_purpose = [c for c in clusters if c.get('cluster_source') != 'JOB']
+    all_purpose, keys = list_all_purpose_clusters(host, token)
     
     tf_config = {"clusters": {}}
     
-    for i, cluster in enumerate(all_purpose):
-        key = f"cluster_{i}"
+    for key, cluster in zip(keys, all_purpose):
         tf_config["clusters"][key] = {
             "cluster_name": cluster.get('cluster_name'),
             "spark_version": cluster.get('spark_version'),
@@ -74,84 +161,236 @@ def export_clusters(host: str, token: str, output_dir: str):
         if 'spark_conf' in cluster:
             tf_config["clusters"][key]["spark_conf"] = cluster['spark_conf']
     
-    output_file = os.path.join(output_dir, "clusters.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "clusters.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(all_purpose)} clusters to {output_file}")
+    emit(f"  ✓ Exported {len(all_purpose)} clusters to {output_file} ({summary})")
+
+# Workspace notebook language -> source file extension
+NOTEBOOK_EXTENSIONS = {
+    "PYTHON": ".py",
+    "SQL": ".sql",
+    "SCALA": ".scala",
+    "R": ".r",
+}
+
+def notebook_file_path(notebook_path: str, language: str) -> str:
+    """Relative file for a workspace notebook in the mirrored tree under notebooks/"""
+    relative = os.path.normpath(notebook_path.lstrip('/'))
+    if relative.startswith('..') or os.path.isabs(relative):
+        raise ValueError(f"Unsafe notebook path: {notebook_path}")
+    return os.path.join("notebooks", relative + NOTEBOOK_EXTENSIONS.get(language, ".py"))
+
+# Manifest section: notebook path -> [listing fingerprint, source file]
+NOTEBOOK_SOURCES = "notebook_sources"
+
+def notebook_fingerprint(notebook: dict):
+    """Fingerprint of a notebook's listing entry; None if the listing has no modification time"""
+    if 'modified_at' not in notebook:
+        return None
+    return digest({k: notebook.get(k) for k in ('object_id', 'modified_at', 'size', 'language')})
+
+def download_notebook(host: str, token: str, notebook_path: str, target_file: str) -> int:
+    """Stream a notebook's source straight to disk"""
+    os.makedirs(os.path.dirname(target_file), exist_ok=True)
+    data = {"path": notebook_path, "format": "SOURCE", "direct_download": "true"}
+    response = make_api_request("GET", f"{host}/api/2.0/workspace/export", get_headers(token), data,
+                                stream=True)
+    return stream_to_file(response, target_file)
+
+def export_notebooks(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                     manifest: ExportManifest = None):
+    """Export notebooks to source files and Terraform format"""
+    emit("Exporting notebooks...")
+    
+    objects = load_snapshot(host, "workspace_objects")
+    if objects is None:
+        objects = [payload for _, _, payload in crawl_workspace_objects(host, token, max_workers=max_workers)]
+    notebooks = [obj for obj in objects if obj.get('object_type') == 'NOTEBOOK']
+    previous = manifest.get(NOTEBOOK_SOURCES) if manifest else {}
+    
+    def export(notebook: dict):
+        """Download a notebook unless its listing fingerprint matches the previous export
+
+        Returns (entry, fingerprint, unchanged, failed); a failed download keeps the previous export."""
+        language = notebook.get('language', 'PYTHON')
+        try:
+            source = notebook_file_path(notebook['path'], language)
+            target_file = os.path.join(output_dir, source)
+            fingerprint = notebook_fingerprint(notebook)
+            unchanged = (fingerprint is not None and previous.get(notebook['path']) == [fingerprint, source]
+                         and os.path.exists(target_file))
+            if not unchanged:
+                download_notebook(host, token, notebook['path'], target_file)
+            return {"path": notebook['path'], "source": source, "language": language}, fingerprint, unchanged, False
+        except Exception as e:
+            emit(f"    ✗ Failed to export notebook {notebook['path']}: {e}")
+            # Keep the last good export so a transient error does not remove the notebook from the target
+            if notebook['path'] in previous:
+                fingerprint, source = previous[notebook['path']]
+                if os.path.exists(os.path.join(output_dir, source)):
+                    return {"path": notebook['path'], "source": source, "language": language}, fingerprint, True, True
+            return None, None, False, True
+    
+    results = run_parallel(export, notebooks, max_workers)
+    exported = [(entry, fingerprint, unchanged) for entry, fingerprint, unchanged, _ in results if entry is not None]
+    failed = sum(1 for _, _, _, export_failed in results if export_failed)
+    
+    # Remove files of notebooks that were deleted or renamed since the previous export; notebooks
+    # still in the listing keep their file unless it was re-exported under another name
+    listed = {notebook['path'] for notebook in notebooks}
+    current = {entry["path"]: entry["source"] for entry, _, _ in exported}
+    for path, (_, source) in previous.items():
+        stale = path not in listed or (path in current and current[path] != source)
+        if stale and os.path.exists(os.path.join(output_dir, source)):
+            os.remove(os.path.join(output_dir, source))
+    
+    tf_config = {"notebooks": {}}
+    entries = [entry for entry, _, _ in exported]
+    for key, entry in zip(resource_keys("notebook", entries, lambda n: n['path']), entries):
+        tf_config["notebooks"][key] = entry
+    
+    output_file, summary = write_tfvars(output_dir, "notebooks.auto.tfvars.json", tf_config, manifest)
+    if manifest:
+        manifest.update(NOTEBOOK_SOURCES, {entry["path"]: [fingerprint, entry["source"]]
+                                           for entry, fingerprint, _ in exported if fingerprint is not None})
+    
+    downloaded = sum(1 for _, _, unchanged in exported if not unchanged)
+    emit(f"  ✓ Exported {len(entries)} notebooks to {output_file} ({summary}, {downloaded} downloaded)")
+    if failed:
+        emit(f"    ⚠ {failed} notebooks could not be exported (previous exports kept where available)")
+
+# Jobs 2.1 settings carried over to the jobs module, at job, task and cluster level
+JOB_FIELDS = ['max_concurrent_runs', 'timeout_seconds', 'email_notifications', 'webhook_notifications',
+              'notification_settings', 'continuous', 'run_as', 'tags']
+TASK_FIELDS = ['task_key', 'description', 'run_if', 'timeout_seconds', 'max_retries',
+               'min_retry_interval_millis', 'retry_on_timeout', 'job_cluster_key', 'notebook_task',
+               'spark_python_task', 'spark_jar_task', 'python_wheel_task', 'pipeline_task', 'run_job_task',
+               'libraries', 'email_notifications']
+CLUSTER_FIELDS = ['spark_version', 'node_type_id', 'driver_node_type_id', 'instance_pool_id',
+                  'driver_instance_pool_id', 'policy_id', 'num_workers', 'autoscale', 'spark_conf',
+                  'spark_env_vars', 'custom_tags', 'data_security_mode', 'single_user_name', 'runtime_engine']
+SCHEDULE_FIELDS = ['quartz_cron_expression', 'timezone_id', 'pause_status']
+# Settings converted separately or implied by the module; anything else is reported for review
+IGNORED_JOB_FIELDS = {'name', 'format', 'schedule', 'job_clusters', 'tasks'}
+IGNORED_TASK_FIELDS = {'depends_on', 'existing_cluster_id', 'new_cluster'}
 
-def export_notebooks(host: str, token: str, output_dir: str):
-    """Export notebooks to Terraform format"""
-    print("Exporting notebooks...")
-    print("  Note: Notebook content should be stored in files and referenced")
-    print("  Consider using databricks_notebook resource with 'source' attribute")
+def convert_cluster(new_cluster: dict) -> dict:
+    """Convert a job cluster spec to the jobs module shape"""
+    return {k: new_cluster[k] for k in CLUSTER_FIELDS if new_cluster.get(k) not in (None, {}, [])}
 
-def export_jobs(host: str, token: str, output_dir: str):
+def convert_task(task: dict, cluster_keys: dict, warnings: list) -> dict:
+    """Convert a Jobs 2.1 task, resolving cluster and notebook references to resource keys"""
+    converted = {k: task[k] for k in TASK_FIELDS if task.get(k) not in (None, {}, [])}
+    unsupported = sorted(set(task) - set(TASK_FIELDS) - IGNORED_TASK_FIELDS)
+    if unsupported:
+        warnings.append(f"task '{task.get('task_key')}' has unsupported settings: {', '.join(unsupported)}")
+    
+    if task.get('depends_on'):
+        converted['depends_on'] = [dep['task_key'] for dep in task['depends_on']]
+    if task.get('new_cluster'):
+        converted['new_cluster'] = convert_cluster(task['new_cluster'])
+    
+    cluster_id = task.get('existing_cluster_id')
+    if cluster_id in cluster_keys:
+        converted['existing_cluster_key'] = cluster_keys[cluster_id]
+    elif cluster_id:
+        converted['existing_cluster_id'] = cluster_id
+        warnings.append(f"task '{task.get('task_key')}' uses cluster {cluster_id}, which is not exported")
+    
+    notebook_task = converted.get('notebook_task')
+    if notebook_task and notebook_task.get('source', 'WORKSPACE') == 'WORKSPACE':
+        converted['notebook_task'] = dict(notebook_task,
+                                          notebook_key=resource_key("notebook", notebook_task['notebook_path']))
+    return converted
+
+def convert_job(job: dict, cluster_keys: dict):
+    """Convert a detail-expanded Jobs 2.1 job to the jobs module shape; returns (config, warnings)"""
+    settings = job.get('settings', {})
+    warnings = []
+    config = {"name": settings.get('name', f"Job {job.get('job_id')}")}
+    config.update({k: settings[k] for k in JOB_FIELDS if settings.get(k) not in (None, {}, [])})
+    unsupported = sorted(set(settings) - set(JOB_FIELDS) - IGNORED_JOB_FIELDS)
+    if unsupported:
+        warnings.append(f"unsupported settings: {', '.join(unsupported)}")
+    
+    if settings.get('schedule'):
+        config['schedule'] = {k: settings['schedule'][k] for k in SCHEDULE_FIELDS if k in settings['schedule']}
+    if settings.get('job_clusters'):
+        config['job_clusters'] = [{"job_cluster_key": jc['job_cluster_key'],
+                                   "new_cluster": convert_cluster(jc.get('new_cluster', {}))}
+                                  for jc in settings['job_clusters']]
+    if settings.get('tasks'):
+        config['tasks'] = [convert_task(task, cluster_keys, warnings) for task in settings['tasks']]
+    return config, warnings
+
+def list_jobs_with_tasks(host: str, token: str, max_workers: int = DEFAULT_MAX_WORKERS):
+    """List jobs with tasks and job clusters expanded; jobs whose listing was truncated are fetched in full"""
+    jobs = list_objects(host, token, "jobs", "/api/2.1/jobs/list", 'jobs', {"limit": 100, "expand_tasks": "true"})
+    
+    def complete(job: dict):
+        if not job.get('has_more'):
+            return job
+        response = make_api_request("GET", f"{host}/api/2.1/jobs/get", get_headers(token),
+                                    {"job_id": job['job_id']})
+        return response.json()
+    
+    return run_parallel(complete, jobs, max_workers)
+
+def export_jobs(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                manifest: ExportManifest = None):
     """Export jobs to Terraform format"""
-    print("Exporting jobs...")
+    emit("Exporting jobs...")
     
-    url = f"{host}/api/2.1/jobs/list"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    jobs = response.json().get('jobs', [])
+    jobs = list_jobs_with_tasks(host, token, max_workers)
+    all_purpose, keys = list_all_purpose_clusters(host, token)
+    cluster_keys = {cluster.get('cluster_id'): key for cluster, key in zip(all_purpose, keys)}
     
     tf_config = {"jobs": {}}
+    needs_review = 0
     
-    for i, job in enumerate(jobs):
-        key = f"job_{i}"
-        tf_config["jobs"][key] = {
-            "name": job.get('settings', {}).get('name', f'Job {i}'),
-            "max_concurrent_runs": job.get('settings', {}).get('max_concurrent_runs', 1)
-        }
-        
-        # Add basic task info (would need more detailed conversion)
-        if 'tasks' in job.get('settings', {}):
-            print(f"    ⚠ Job '{tf_config['jobs'][key]['name']}' has multi-task workflow - manual review needed")
+    keys = resource_keys("job", jobs, lambda j: j.get('settings', {}).get('name'), lambda j: j.get('job_id'))
+    for key, job in zip(keys, jobs):
+        tf_config["jobs"][key], warnings = convert_job(job, cluster_keys)
+        if warnings:
+            needs_review += 1
+            emit(f"    ⚠ Job '{tf_config['jobs'][key]['name']}': {'; '.join(warnings)}")
     
-    output_file = os.path.join(output_dir, "jobs.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "jobs.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(jobs)} jobs to {output_file}")
-    print(f"    ⚠ Jobs require manual review for task configurations and cluster references")
+    emit(f"  ✓ Exported {len(jobs)} jobs to {output_file} ({summary})")
+    if needs_review:
+        emit(f"    ⚠ {needs_review} jobs have settings that need manual review")
 
-def export_secret_scopes(host: str, token: str, output_dir: str):
+def export_secret_scopes(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                         manifest: ExportManifest = None):
     """Export secret scopes to Terraform format"""
-    print("Exporting secret scopes...")
+    emit("Exporting secret scopes...")
     
-    url = f"{host}/api/2.0/secrets/scopes/list"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    scopes = response.json().get('scopes', [])
+    scopes = list_objects(host, token, "secret_scopes", "/api/2.0/secrets/scopes/list", 'scopes')
     
     tf_config = {"secret_scopes": {}}
     
-    for i, scope in enumerate(scopes):
-        key = f"scope_{i}"
+    for key, scope in zip(resource_keys("scope", scopes, lambda sc: sc.get('name')), scopes):
         tf_config["secret_scopes"][key] = {
             "name": scope.get('name')
         }
     
-    output_file = os.path.join(output_dir, "secrets.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "secrets.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(scopes)} secret scopes to {output_file}")
-    print(f"    ⚠ Secret values cannot be exported - must be set manually")
+    emit(f"  ✓ Exported {len(scopes)} secret scopes to {output_file} ({summary})")
+    emit(f"    ⚠ Secret values cannot be exported - must be set manually")
 
-def export_sql_warehouses(host: str, token: str, output_dir: str):
+def export_sql_warehouses(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                          manifest: ExportManifest = None):
     """Export SQL warehouses to Terraform format"""
-    print("Exporting SQL warehouses...")
+    emit("Exporting SQL warehouses...")
     
-    url = f"{host}/api/2.0/sql/warehouses"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    warehouses = response.json().get('warehouses', [])
+    warehouses = list_objects(host, token, "sql_warehouses", "/api/2.0/sql/warehouses", 'warehouses')
     
     tf_config = {"sql_warehouses": {}}
     
-    for i, wh in enumerate(warehouses):
-        key = f"warehouse_{i}"
+    keys = resource_keys("warehouse", warehouses, lambda w: w.get('name'), lambda w: w.get('id'))
+    for key, wh in zip(keys, warehouses):
         tf_config["sql_warehouses"][key] = {
             "name": wh.get('name'),
             "cluster_size": wh.get('cluster_size'),
@@ -159,25 +398,20 @@ def export_sql_warehouses(host: str, token: str, output_dir: str):
             "enable_photon": wh.get('enable_photon', True)
         }
     
-    output_file = os.path.join(output_dir, "sql_warehouses.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "sql_warehouses.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(warehouses)} SQL warehouses to {output_file}")
+    emit(f"  ✓ Exported {len(warehouses)} SQL warehouses to {output_file} ({summary})")
 
-def export_repos(host: str, token: str, output_dir: str):
+def export_repos(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 manifest: ExportManifest = None):
     """Export Git repos to Terraform format"""
-    print("Exporting Git repos...")
+    emit("Exporting Git repos...")
     
-    url = f"{host}/api/2.0/repos"
-    headers = get_headers(token)
-    response = make_api_request("GET", url, headers)
-    repos = response.json().get('repos', [])
+    repos = list_objects(host, token, "repos", "/api/2.0/repos", 'repos', token_param="next_page_token")
     
     tf_config = {"repos": {}}
     
-    for i, repo in enumerate(repos):
-        key = f"repo_{i}"
+    for key, repo in zip(resource_keys("repo", repos, lambda r: r.get('path'), lambda r: r.get('id')), repos):
         tf_config["repos"][key] = {
             "url": repo.get('url'),
             "git_provider": repo.get('provider'),
@@ -187,12 +421,37 @@ def export_repos(host: str, token: str, output_dir: str):
         if 'branch' in repo:
             tf_config["repos"][key]["branch"] = repo['branch']
     
-    output_file = os.path.join(output_dir, "repos.auto.tfvars.json")
-    with open(output_file, 'w') as f:
-        json.dump(tf_config, f, indent=2)
+    output_file, summary = write_tfvars(output_dir, "repos.auto.tfvars.json", tf_config, manifest)
     
-    print(f"  ✓ Exported {len(repos)} Git repos to {output_file}")
-    print(f"    ⚠ Git credentials will need to be re-authenticated")
+    emit(f"  ✓ Exported {len(repos)} Git repos to {output_file} ({summary})")
+    emit(f"    ⚠ Git credentials will need to be re-authenticated")
+
+EXPORTERS = [
+    export_users_groups,
+    export_clusters,
+    export_secret_scopes,
+    export_sql_warehouses,
+    export_repos,
+    export_jobs,
+    export_notebooks,
+]
+
+def run_exporters(host: str, token: str, output_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                  manifest: ExportManifest = None):
+    """Run every exporter concurrently; a failing exporter does not stop the others
+
+    Exporters take (host, token, output_dir, max_workers, manifest)."""
+    def run(exporter):
+        start = time.perf_counter()
+        try:
+            exporter(host, token, output_dir, max_workers, manifest)
+            return None
+        except Exception as e:
+            emit(f"  ✗ {exporter.__name__} failed after {time.perf_counter() - start:.1f}s: {e}")
+            return str(e)
+
+    errors = run_parallel(run, EXPORTERS, max_workers)
+    return {exporter.__name__: error for exporter, error in zip(EXPORTERS, errors) if error}
 
 def main():
     parser = argparse.ArgumentParser(description='Export Databricks workspace to Terraform')
@@ -201,11 +460,15 @@ def main():
                        help='Which workspace to export from')
     parser.add_argument('--output', default='./environments/source',
                        help='Output directory for Terraform files')
+    parser.add_argument('--full', action='store_true',
+                       help='Ignore the previous export manifest and rewrite every file')
+    add_common_arguments(parser)
     
     args = parser.parse_args()
     
     # Load configuration
     config = load_config(args.config)
+    configure_inventory(config)
     workspace_config = config[args.workspace]
     
     # Create output directory
@@ -219,16 +482,18 @@ def main():
     print("")
     
     # Export each resource type
-    try:
-        export_users_groups(workspace_config['host'], workspace_config['token'], args.output)
-        export_clusters(workspace_config['host'], workspace_config['token'], args.output)
-        export_secret_scopes(workspace_config['host'], workspace_config['token'], args.output)
-        export_sql_warehouses(workspace_config['host'], workspace_config['token'], args.output)
-        export_repos(workspace_config['host'], workspace_config['token'], args.output)
-        export_jobs(workspace_config['host'], workspace_config['token'], args.output)
-        export_notebooks(workspace_config['host'], workspace_config['token'], args.output)
-    except Exception as e:
-        print(f"\n❌ Error during export: {e}")
+    max_workers = config.get('migration_settings', {}).get('max_workers', DEFAULT_MAX_WORKERS)
+    with use_cassette(args.record_cassette, args.replay_cassette), \
+            profile_phase("terraform_export", enabled=args.profile, top_n=args.profile_top):
+        manifest = ExportManifest(args.output, enabled=not args.full)
+        errors = run_exporters(workspace_config['host'], workspace_config['token'], args.output,
+                               max_workers, manifest)
+        manifest.save()
+    
+    if errors:
+        print(f"\n❌ {len(errors)} exporter(s) failed - their tfvars files were not updated:")
+        for name, error in errors.items():
+            print(f"  - {name}: {error}")
         return 1
     
     print("\n" + "="*80)
@@ -244,7 +509,7 @@ def main():
     print("\n⚠  Important: Review and update:")
     print("  - Secret values (cannot be exported)")
     print("  - Git credentials (need re-authentication)")
-    print("  - Job cluster references (IDs will change)")
+    print("  - Job settings flagged for manual review above")
     
     return 0
 
@@ -0,0 +1,22 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "terraform", "scripts"), os.path.join(ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from mock_databricks_server import MockDatabricksServer, MockWorkspace
+
+@pytest.fixture
+def mock_server():
+    """An empty mock workspace served on a free local port; fill server.workspace as needed"""
+    server = MockDatabricksServer(("127.0.0.1", 0), MockWorkspace())
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
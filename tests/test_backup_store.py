@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+import backup_store
+from backup_store import BLOB_REF, BackupStore
+
+def notebooks(version: int = 0) -> list:
+    return [{"path": f"/Shared/nb{i}", "language": "PYTHON",
+             "content": f"# notebook {i} v{version if i == 0 else 0}\\n" + "x = 1\\n" * 400}
+            for i in range(5)]
+
+@pytest.fixture
+def store(tmp_path):
+    with BackupStore(str(tmp_path / "store")) as store:
+        yield store
+
+def blob_files(store: BackupStore) -> list:
+    return sorted(name for _, _, names in os.walk(store.blob_dir) for name in names)
+
+@pytest.mark.parametrize("data", [
+    notebooks(),
+    {"a": {"id": 1}, "b": {"id": 2, "source": "y" * 5000}},
+    {"settings": {"name": "single"}},
+    "a plain value",
+    [],
+])
+def test_save_and_load_round_trip(store, data):
+    assert store.load(store.save(data, "objects")) == data
+
+def test_unchanged_records_are_stored_once(store):
+    first = store.save(notebooks(), "notebooks")
+    info = store.info()
+    second = store.save(notebooks(), "notebooks")
+
+    assert first != second
+    assert store.info()["blobs"] == info["blobs"]
+    assert store.manifests()[0][5] == 0
+    third = store.save(notebooks(version=1), "notebooks")
+    assert store.info()["blobs"] == info["blobs"] + 2
+    assert store.load(third) == notebooks(version=1)
+    assert store.latest("notebooks") == third
+
+def test_large_strings_become_blobs_of_their_own(store):
+    content = "z" * 10000
+    store.save([{"path": "/a", "content": content}, {"path": "/b", "content": content}], "notebooks")
+
+    files = blob_files(store)
+    assert len(files) == 1
+    assert store.read_blob(files[0]) == content.encode()
+
+def test_lookups_are_batched(store, monkeypatch):
+    monkeypatch.setattr(backup_store, "LOOKUP_BATCH", 2)
+    data = [{"id": i} for i in range(7)]
+
+    name = store.save(data, "jobs")
+    store.save(data, "jobs")
+
+    assert store.load(name) == data
+    assert store.info()["blobs"] == 7
+
+def test_manifest_names_stay_unique(store):
+    first = store.save([1], "jobs")
+    os.remove(os.path.join(store.manifest_dir, f"{first}.json"))
+
+    assert store.save([2], "jobs") != first
+
+def test_collect_garbage_keeps_the_newest_manifests(store):
+    names = [store.save(notebooks(version), "notebooks") for version in range(3)]
+    store.save([{"id": 1}], "jobs")
+
+    manifests, blobs, freed = store.collect_garbage(retention_runs=1)
+
+    assert manifests == 2
+    assert blobs == 4 and freed > 0
+    assert [name for name, *_ in store.manifests("notebooks")] == names[-1:]
+    assert store.load(names[-1]) == notebooks(2)
+    assert store.manifests("jobs")
+    assert not os.path.exists(os.path.join(store.manifest_dir, f"{names[0]}.json"))
+    assert store.collect_garbage(retention_runs=1) == (0, 0, 0)
+
+def test_sweep_removes_old_unindexed_blob_files(store):
+    name = store.save([{"content": "c" * 8000}], "notebooks")
+    kept = blob_files(store)
+    orphan = store.blob_path("ab" * 32)
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    with open(orphan, "wb") as f:
+        f.write(b"o" * 5000)
+    recent = store.blob_path("cd" * 32)
+    os.makedirs(os.path.dirname(recent), exist_ok=True)
+    with open(recent, "wb") as f:
+        f.write(b"r")
+    old = time.time() - 2 * backup_store.ORPHAN_FILE_MIN_AGE
+    for path in [orphan] + [store.blob_path(digest) for digest in kept]:
+        os.utime(path, (old, old))
+
+    assert store.collect_garbage(retention_runs=10) == (0, 0, 0)
+    assert store.collect_garbage(retention_runs=10, sweep=True) == (0, 1, 5000)
+    assert blob_files(store) == sorted(kept + ["cd" * 32])
+    assert store.load(name) == [{"content": "c" * 8000}]
+
+def test_stored_records_reference_their_blobs(store):
+    name = store.save([{"content": "q" * 2000}], "notebooks")
+    record = store.read_blob(store.conn.execute("SELECT hash FROM blobs WHERE size < 200").fetchone()[0])
+
+    assert BLOB_REF.encode() in record
+    assert store.load(name)[0]["content"] == "q" * 2000
@@ -0,0 +1,146 @@
+import json
+import os
+
+from export_to_terraform import ExportManifest, convert_job, convert_task, resource_key, resource_keys, write_tfvars
+
+def test_resource_key_is_stable_and_readable():
+    key = resource_key("cluster", "Shared Autoscaling (prod)")
+    assert key == resource_key("cluster", "Shared Autoscaling (prod)")
+    assert key.startswith("cluster_shared_autoscaling_prod_")
+    assert len(key.rsplit("_", 1)[1]) == 8
+
+def test_resource_key_tells_apart_identities_with_the_same_slug():
+    assert resource_key("job", "etl-daily") != resource_key("job", "ETL daily")
+
+def test_resource_key_truncates_long_names():
+    key = resource_key("notebook", "/Users/someone@example.com/" + "x" * 200)
+    assert len(key) == len("notebook_") + 40 + 1 + 8
+
+def test_resource_keys_do_not_depend_on_position():
+    jobs = [{"name": "a", "id": 1}, {"name": "b", "id": 2}]
+    keys = resource_keys("job", jobs, lambda j: j["name"], lambda j: j["id"])
+    reordered = resource_keys("job", jobs[::-1], lambda j: j["name"], lambda j: j["id"])
+    assert keys == reordered[::-1]
+    assert keys[0] == resource_key("job", "a")
+
+def test_resource_keys_use_the_id_for_duplicate_names():
+    jobs = [{"name": "dup", "id": 1}, {"name": "dup", "id": 2}, {"name": None, "id": 3}]
+    keys = resource_keys("job", jobs, lambda j: j["name"], lambda j: j["id"])
+    assert keys[0] == resource_key("job", "dup#1")
+    assert keys[1] == resource_key("job", "dup#2")
+    assert keys[2] == resource_key("job", "")
+
+def test_manifest_round_trip(tmp_path):
+    manifest = ExportManifest(str(tmp_path))
+    manifest.update("jobs.auto.tfvars.json", {"jobs/job_a": "d1"})
+    manifest.save()
+
+    assert ExportManifest(str(tmp_path)).get("jobs.auto.tfvars.json") == {"jobs/job_a": "d1"}
+    assert ExportManifest(str(tmp_path), enabled=False).get("jobs.auto.tfvars.json") == {}
+
+def test_manifest_get_returns_a_copy(tmp_path):
+    manifest = ExportManifest(str(tmp_path))
+    manifest.update("s", {"k": "v"})
+    manifest.get("s")["k"] = "changed"
+    assert manifest.get("s") == {"k": "v"}
+
+def test_write_tfvars_skips_unchanged_resources(tmp_path):
+    output_dir = str(tmp_path)
+    manifest = ExportManifest(output_dir)
+    config = {"jobs": {"job_b": {"name": "b"}, "job_a": {"name": "a"}}}
+
+    path, summary = write_tfvars(output_dir, "jobs.auto.tfvars.json", config, manifest)
+    assert summary == "2 added, 0 changed, 0 removed"
+    with open(path) as f:
+        assert list(json.load(f)["jobs"]) == ["job_a", "job_b"]
+
+    os.utime(path, (0, 0))
+    _, summary = write_tfvars(output_dir, "jobs.auto.tfvars.json", config, manifest)
+    assert summary == "unchanged"
+    assert os.path.getmtime(path) == 0
+
+    config = {"jobs": {"job_a": {"name": "a2"}, "job_c": {"name": "c"}}}
+    _, summary = write_tfvars(output_dir, "jobs.auto.tfvars.json", config, manifest)
+    assert summary == "1 added, 1 changed, 1 removed"
+
+def test_write_tfvars_rewrites_a_missing_file(tmp_path):
+    output_dir = str(tmp_path)
+    manifest = ExportManifest(output_dir)
+    config = {"jobs": {"job_a": {"name": "a"}}}
+    path, _ = write_tfvars(output_dir, "jobs.auto.tfvars.json", config, manifest)
+    os.remove(path)
+
+    _, summary = write_tfvars(output_dir, "jobs.auto.tfvars.json", config, manifest)
+    assert summary == "0 added, 0 changed, 0 removed"
+    assert os.path.exists(path)
+
+MULTI_TASK_JOB = {
+    "job_id": 42,
+    "settings": {
+        "name": "nightly etl",
+        "format": "MULTI_TASK",
+        "max_concurrent_runs": 1,
+        "tags": {},
+        "run_as": {"service_principal_name": "sp-etl"},
+        "schedule": {"quartz_cron_expression": "0 0 2 * * ?", "timezone_id": "UTC", "pause_status": "PAUSED",
+                     "extra": "dropped"},
+        "job_clusters": [{"job_cluster_key": "shared",
+                          "new_cluster": {"spark_version": "13.3.x-scala2.12", "node_type_id": "i3.xlarge",
+                                          "num_workers": 2, "spark_conf": {}, "aws_attributes": {"x": 1}}}],
+        "tasks": [
+            {"task_key": "ingest", "job_cluster_key": "shared",
+             "notebook_task": {"notebook_path": "/Shared/ingest", "source": "WORKSPACE"}},
+            {"task_key": "load", "depends_on": [{"task_key": "ingest"}], "existing_cluster_id": "0101-abc",
+             "spark_python_task": {"python_file": "dbfs:/load.py"}, "libraries": [{"pypi": {"package": "x"}}]},
+        ],
+    },
+}
+
+def test_convert_job_keeps_tasks_clusters_and_schedule():
+    config, warnings = convert_job(MULTI_TASK_JOB, {"0101-abc": "cluster_shared_12345678"})
+
+    assert warnings == []
+    assert config["name"] == "nightly etl"
+    assert config["max_concurrent_runs"] == 1
+    assert config["run_as"] == {"service_principal_name": "sp-etl"}
+    assert "tags" not in config
+    assert config["schedule"] == {"quartz_cron_expression": "0 0 2 * * ?", "timezone_id": "UTC",
+                                  "pause_status": "PAUSED"}
+    assert config["job_clusters"] == [{"job_cluster_key": "shared",
+                                       "new_cluster": {"spark_version": "13.3.x-scala2.12",
+                                                       "node_type_id": "i3.xlarge", "num_workers": 2}}]
+    ingest, load = config["tasks"]
+    assert ingest["notebook_task"]["notebook_key"] == resource_key("notebook", "/Shared/ingest")
+    assert load["depends_on"] == ["ingest"]
+    assert load["existing_cluster_key"] == "cluster_shared_12345678"
+    assert "existing_cluster_id" not in load
+    assert load["libraries"] == [{"pypi": {"package": "x"}}]
+
+def test_convert_job_reports_unsupported_settings():
+    job = {"job_id": 7, "settings": {"git_source": {"git_url": "https://example.com/repo.git"}, "queue": {}}}
+    config, warnings = convert_job(job, {})
+
+    assert config == {"name": "Job 7"}
+    assert warnings == ["unsupported settings: git_source, queue"]
+
+def test_convert_task_keeps_unexported_cluster_ids():
+    warnings = []
+    task = convert_task({"task_key": "t", "existing_cluster_id": "gone", "condition_task": {"op": "EQUAL_TO"}},
+                        {}, warnings)
+
+    assert task == {"task_key": "t", "existing_cluster_id": "gone"}
+    assert warnings == ["task 't' has unsupported settings: condition_task",
+                        "task 't' uses cluster gone, which is not exported"]
+
+def test_convert_task_only_keys_workspace_notebooks():
+    git_task = convert_task({"task_key": "t", "notebook_task": {"notebook_path": "nb", "source": "GIT"}}, {}, [])
+    default_task = convert_task({"task_key": "t", "notebook_task": {"notebook_path": "/Repos/nb"}}, {}, [])
+
+    assert "notebook_key" not in git_task["notebook_task"]
+    assert default_task["notebook_task"]["notebook_key"] == resource_key("notebook", "/Repos/nb")
+
+def test_convert_task_converts_its_own_cluster():
+    task = convert_task({"task_key": "t", "new_cluster": {"spark_version": "14.3.x", "num_workers": 0,
+                                                            "custom_tags": {}, "init_scripts": []}}, {}, [])
+
+    assert task["new_cluster"] == {"spark_version": "14.3.x", "num_workers": 0}
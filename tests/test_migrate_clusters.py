@@ -0,0 +1,45 @@
+from migrate_clusters import migrate_cluster_libraries, split_libraries
+
+JAR = {"jar": "dbfs:/libs/a.jar"}
+WHEEL = {"whl": "dbfs:/libs/b.whl"}
+PYPI = {"pypi": {"package": "requests"}}
+MAVEN = {"maven": {"coordinates": "org.example:lib:1.0"}}
+
+STATUSES = [
+    {"library": JAR, "status": "INSTALLED"},
+    {"library": WHEEL, "status": "FAILED", "messages": ["not found"]},
+    {"library": PYPI, "status": "UNINSTALL_ON_RESTART"},
+    {"library": MAVEN, "status": "INSTALLED", "is_library_for_all_clusters": True},
+    {"library": {"egg": "dbfs:/libs/c.egg"}, "status": "SKIPPED"},
+    {"library": {"cran": {"package": "x"}}, "status": "PENDING"},
+]
+
+def test_split_libraries():
+    to_install, unresolved, uninstall_pending = split_libraries(STATUSES)
+
+    assert to_install == [JAR, {"cran": {"package": "x"}}]
+    assert unresolved == [{"library": WHEEL, "status": "FAILED", "messages": ["not found"]},
+                          {"library": {"egg": "dbfs:/libs/c.egg"}, "status": "SKIPPED", "messages": []}]
+    assert uninstall_pending == [PYPI]
+
+def test_split_libraries_of_a_cluster_without_libraries():
+    assert split_libraries([]) == ([], [], [])
+
+def test_migrate_cluster_libraries_installs_once_per_cluster(mock_server):
+    ws = mock_server.workspace
+    ws.clusters["t1"] = {"cluster_id": "t1", "cluster_name": "one"}
+    config = {"target": {"host": mock_server.url, "token": "token"}, "migration_settings": {"max_workers": 2}}
+    clusters = [{"cluster_id": "s1", "cluster_name": "one"}, {"cluster_id": "s2", "cluster_name": "two"},
+                {"cluster_id": "s3", "cluster_name": "three"}, {"cluster_id": "s4", "cluster_name": "four"}]
+    statuses = {"s1": STATUSES, "s2": None, "s3": [{"library": JAR, "status": "INSTALLED"}],
+                "s4": [{"library": JAR, "status": "INSTALLED"}]}
+
+    issues = migrate_cluster_libraries(config, clusters, statuses, {"s1": "t1", "s4": "deleted"})
+
+    assert [library["library"] for library in ws.libraries["t1"]] == [JAR, {"cran": {"package": "x"}}]
+    assert mock_server.request_counts["POST /api/2.0/libraries/install"] == 2
+    assert issues == [
+        {"cluster_name": "one", "unresolved": split_libraries(STATUSES)[1], "uninstall_pending": [PYPI]},
+        {"cluster_name": "two", "error": "library status unavailable"},
+        {"cluster_name": "four", "install_failed": [JAR]},
+    ]
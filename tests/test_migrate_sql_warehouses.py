@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+import requests
+
+import migrate_sql_warehouses
+from migrate_sql_warehouses import RETRY_QUEUE_FILE, is_capacity_error, is_capacity_reason, process_warehouses
+
+def http_error(status: int, body: str) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body.encode()
+    return requests.HTTPError(f"{status} error", response=response)
+
+@pytest.mark.parametrize("code, message, expected", [
+    ("QUOTA_EXCEEDED", None, True),
+    ("RESOURCE_EXHAUSTED", "", True),
+    ("CLOUD_PROVIDER_RESOURCE_STOCKOUT", None, True),
+    ("INVALID_PARAMETER_VALUE", "Insufficient capacity in us-east-1a", True),
+    ("RESOURCE_ALREADY_EXISTS", "Warehouse etl already exists", False),
+    (None, None, False),
+])
+def test_is_capacity_reason(code, message, expected):
+    assert is_capacity_reason(code, message) is expected
+
+def test_is_capacity_error():
+    assert is_capacity_error(http_error(400, '{"error_code": "QUOTA_EXCEEDED", "message": "limit"}'))
+    assert is_capacity_error(http_error(503, "Cloud provider stockout"))
+    assert not is_capacity_error(http_error(400, '{"error_code": "INVALID_PARAMETER_VALUE", "message": "bad"}'))
+    assert not is_capacity_error(requests.ConnectionError("connection refused"))
+
+@pytest.fixture
+def run_warehouses(mock_server, tmp_path, monkeypatch):
+    """process_warehouses against the mock target, returning the (success, failed) counts it logged"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(migrate_sql_warehouses, "POLL_INTERVAL", 0.01)
+    results = []
+    monkeypatch.setattr(migrate_sql_warehouses, "log_migration_result",
+                        lambda object_type, success, failed: results.append((success, failed)))
+    config = {"target": {"host": mock_server.url, "token": "token"},
+              "migration_settings": {"max_workers": 4, "warehouse_poll_timeout_seconds": 30}}
+
+    def run(names):
+        process_warehouses(config, [{"id": f"src-{name}", "name": name, "cluster_size": "Small"}
+                                    for name in names])
+        return results.pop()
+    return run
+
+def test_all_warehouses_created(run_warehouses, mock_server):
+    assert run_warehouses(["a", "b", "c"]) == (3, 0)
+    assert sorted(w["state"] for w in mock_server.workspace.warehouses.values()) == ["RUNNING"] * 3
+    with open("id_mappings.json") as f:
+        assert sorted(json.load(f)["warehouse"]) == ["src-a", "src-b", "src-c"]
+
+def test_stocked_out_warehouses_are_deleted_and_retried(run_warehouses, mock_server):
+    mock_server.workspace.warehouse_stockouts = 2
+
+    assert run_warehouses(["a", "b", "c", "d"]) == (4, 0)
+    assert mock_server.request_counts["DELETE /api/2.0/sql/warehouses/(?P<warehouse_id>[^/]+)"] == 2
+    assert len(mock_server.workspace.warehouses) == 4
+
+def test_quota_rejections_are_queued_not_failed(run_warehouses, mock_server):
+    mock_server.workspace.warehouse_quota = 2
+
+    assert run_warehouses(["a", "b", "c", "d"]) == (2, 0)
+    with open(RETRY_QUEUE_FILE) as f:
+        queued = [warehouse["name"] for warehouse in json.load(f)]
+    assert len(queued) == 2
+
+    mock_server.workspace.warehouse_quota = 0
+    assert run_warehouses(queued) == (2, 0)
+    assert len(mock_server.workspace.warehouses) == 4
+    assert not os.path.exists(RETRY_QUEUE_FILE)
+
+def test_other_create_errors_count_as_failed(run_warehouses, mock_server):
+    assert run_warehouses(["a"]) == (1, 0)
+    assert run_warehouses(["a", "b"]) == (1, 1)
@@ -0,0 +1,48 @@
+from migrate_unity_catalog import get_grants, grant_changes, update_grants
+
+MAPPINGS = {"principal_mapping": {"data-eng": "data-engineers"},
+            "user_email_domain_mapping": {"old.example.com": "new.example.com"}}
+
+def test_grant_changes_adds_only_missing_privileges():
+    source = [{"principal": "data-eng", "privileges": ["USE_CATALOG", "SELECT"]},
+              {"principal": "ana@old.example.com", "privileges": ["USE_CATALOG"]},
+              {"principal": "account users", "privileges": ["USE_CATALOG"]}]
+    target = [{"principal": "data-engineers", "privileges": ["SELECT"]},
+              {"principal": "account users", "privileges": ["USE_CATALOG", "MODIFY"]}]
+
+    assert grant_changes(source, target, MAPPINGS) == [
+        {"principal": "ana@new.example.com", "add": ["USE_CATALOG"]},
+        {"principal": "data-engineers", "add": ["USE_CATALOG"]},
+    ]
+
+def test_grant_changes_merges_principals_mapped_to_the_same_target():
+    source = [{"principal": "data-eng", "privileges": ["SELECT"]},
+              {"principal": "data-engineers", "privileges": ["MODIFY"]},
+              {"principal": "no-privileges"}]
+
+    assert grant_changes(source, [], MAPPINGS) == [{"principal": "data-engineers", "add": ["MODIFY", "SELECT"]}]
+
+def test_grant_changes_without_differences():
+    assignments = [{"principal": "g", "privileges": ["SELECT"]}]
+
+    assert grant_changes(assignments, assignments, {}) == []
+    assert grant_changes([], assignments, {}) == []
+
+def test_grants_round_trip_through_the_api(mock_server):
+    ws = mock_server.workspace
+    ws.uc["catalogs"]["main"] = {"name": "main"}
+    ws.uc_grants[("catalog", "main")] = {"data-engineers": ["SELECT"]}
+    source = [{"principal": "data-eng", "privileges": ["USE_CATALOG", "SELECT"]},
+              {"principal": "analysts", "privileges": ["USE_CATALOG"]}]
+
+    changes = grant_changes(source, get_grants(mock_server.url, "token", "catalog", "main"), MAPPINGS)
+    assert update_grants(mock_server.url, "token", "catalog", "main", changes)
+
+    assert ws.uc_grants[("catalog", "main")] == {"analysts": ["USE_CATALOG"],
+                                                 "data-engineers": ["SELECT", "USE_CATALOG"]}
+    assert grant_changes(source, get_grants(mock_server.url, "token", "catalog", "main"), MAPPINGS) == []
+    assert mock_server.request_counts["PATCH /api/2.1/unity-catalog/permissions/"
+                                      "(?P<securable_type>[a-z_]+)/(?P<name>[^/]+)"] == 1
+
+def test_grants_on_a_missing_securable(mock_server):
+    assert not update_grants(mock_server.url, "token", "catalog", "gone", [{"principal": "g", "add": ["SELECT"]}])
@@ -0,0 +1,126 @@
+import pytest
+
+from migrate_clusters import CLUSTER_DETAIL_FIELDS, get_cluster
+from utils import PathRewriter, fetch_details
+
+def test_fetch_details_uses_complete_list_payloads():
+    fetched = []
+
+    def get_details(item):
+        fetched.append(item["id"])
+        return dict(item, name=f"full {item['id']}")
+
+    items = [{"id": 1, "name": "a"}, {"id": 2}, {"id": 3, "name": "c"}, {"id": 4}]
+    details = fetch_details(items, get_details, ("id", "name"), max_workers=2)
+
+    assert sorted(fetched) == [2, 4]
+    assert details == [{"id": 1, "name": "a"}, {"id": 2, "name": "full 2"}, {"id": 3, "name": "c"},
+                       {"id": 4, "name": "full 4"}]
+
+def test_fetch_details_drops_failed_fetches():
+    details = fetch_details([{"id": 1}, {"id": 2, "name": "b"}, {"id": 3}],
+                            lambda item: None if item["id"] == 1 else dict(item, name="x"), ("name",))
+
+    assert details == [{"id": 2, "name": "b"}, {"id": 3, "name": "x"}]
+
+def test_fetch_details_fetches_everything_without_required_fields():
+    details = fetch_details([{"id": 1, "name": "a"}], lambda item: {"id": 1, "name": "fetched"})
+
+    assert details == [{"id": 1, "name": "fetched"}]
+
+def test_fetch_details_only_gets_trimmed_clusters(mock_server):
+    mock_server.workspace.clusters["c1"] = {"cluster_id": "c1", "cluster_name": "full", "spark_version": "14.3.x"}
+    mock_server.workspace.clusters["c2"] = {"cluster_id": "c2", "cluster_name": "trimmed", "spark_version": "14.3.x"}
+    listed = [dict(mock_server.workspace.clusters["c1"]), {"cluster_id": "c2", "cluster_name": "trimmed"},
+              {"cluster_id": "gone", "cluster_name": "deleted since listing"}]
+
+    details = fetch_details(listed, lambda cluster: get_cluster(mock_server.url, "token", cluster["cluster_id"]),
+                            CLUSTER_DETAIL_FIELDS)
+
+    assert [detail["cluster_name"] for detail in details] == ["full", "trimmed"]
+    assert details[1]["spark_version"] == "14.3.x"
+    assert mock_server.request_counts["GET /api/2.0/clusters/get"] == 2
+
+PATH_MAPPINGS = {
+    "workspace_path_mapping": {"/Shared/old/": "/Shared/new", "/Shared/old/deep": "/Projects/deep", "/Same": "/Same"},
+    "principal_mapping": {"ana@corp.com": "ana.lopez@corp.com"},
+    "user_email_domain_mapping": {"old.example.com": "new.example.com"},
+}
+
+@pytest.mark.parametrize("path, expected", [
+    ("/Shared/old", "/Shared/new"),
+    ("/Shared/old/etl/ingest", "/Shared/new/etl/ingest"),
+    ("/Shared/old/deep/job", "/Projects/deep/job"),
+    ("/Shared/older/etl", "/Shared/older/etl"),
+    ("/Users/ana@corp.com/scratch", "/Users/ana.lopez@corp.com/scratch"),
+    ("/Users/bo@old.example.com", "/Users/bo@new.example.com"),
+    ("/Users/bo@old.example.community/x", "/Users/bo@old.example.community/x"),
+    ("/Users/cy@other.com/x", "/Users/cy@other.com/x"),
+])
+def test_rewrite_path(path, expected):
+    assert PathRewriter(PATH_MAPPINGS).rewrite_path(path) == expected
+
+SOURCE = b"""# Databricks notebook source
+%run /Shared/old/etl/common
+dbutils.notebook.run("/Users/bo@old.example.com/child", 60)
+dbutils.notebook.run('/Workspace/Shared/old/deep/child', 60)
+paths = ['/Shared/old', "/Shared/older"]
+spark.read.load("s3://bucket/Shared/old/data")
+spark.read.load("dbfs:/Users/bo@old.example.com/data")
+open(f"/Workspace/Users/ana@corp.com/config.json")
+"""
+
+EXPECTED = b"""# Databricks notebook source
+%run /Shared/new/etl/common
+dbutils.notebook.run("/Users/bo@new.example.com/child", 60)
+dbutils.notebook.run('/Workspace/Projects/deep/child', 60)
+paths = ['/Shared/new', "/Shared/older"]
+spark.read.load("s3://bucket/Shared/old/data")
+spark.read.load("dbfs:/Users/bo@old.example.com/data")
+open(f"/Workspace/Users/ana.lopez@corp.com/config.json")
+"""
+
+def test_rewrite_only_touches_workspace_paths():
+    rewriter = PathRewriter(PATH_MAPPINGS)
+
+    assert rewriter.rewrite(SOURCE) == EXPECTED
+    assert (rewriter.references, rewriter.rewritten) == (5, 1)
+
+def test_rewrite_at_the_edges_of_the_source():
+    rewriter = PathRewriter(PATH_MAPPINGS)
+
+    assert rewriter.rewrite(b"/Shared/old") == b"/Shared/new"
+    assert rewriter.rewrite(b"/Shared/old/") == b"/Shared/new/"
+    assert rewriter.rewrite(b"x/Shared/old") == b"x/Shared/old"
+    assert rewriter.rewrite(b"/Users/ana@corp.com") == b"/Users/ana.lopez@corp.com"
+    assert rewriter.rewrite(b"/Users/ana@corp.company") == b"/Users/ana@corp.company"
+    assert rewriter.rewrite(b"") == b""
+
+def test_rewrite_without_mappings_is_a_no_op():
+    rewriter = PathRewriter({"workspace_path_mapping": {"/Same": "/Same/"}})
+
+    assert not rewriter.active
+    assert rewriter.rewrite(SOURCE) is SOURCE
+    assert rewriter.rewrite_path("/Same/x") == "/Same/x"
+
+def test_rewrite_chunks_matches_rewrite_at_every_split():
+    for split in range(len(SOURCE) + 1):
+        rewriter = PathRewriter(PATH_MAPPINGS)
+        chunks = [SOURCE[:split], SOURCE[split:]]
+
+        assert b"".join(rewriter.rewrite_chunks(chunks)) == EXPECTED, split
+        assert (rewriter.references, rewriter.rewritten) == (5, 1)
+
+def test_rewrite_chunks_with_tiny_chunks_and_no_trailing_newline():
+    rewriter = PathRewriter(PATH_MAPPINGS)
+    source = SOURCE.rstrip(b"\n")
+    chunks = [source[i:i + 3] for i in range(0, len(source), 3)]
+
+    assert b"".join(rewriter.rewrite_chunks(chunks)) == EXPECTED.rstrip(b"\n")
+
+def test_rewrite_chunks_of_an_unchanged_source():
+    rewriter = PathRewriter(PATH_MAPPINGS)
+
+    assert b"".join(rewriter.rewrite_chunks([b"print(1)\n", b"print(2)"])) == b"print(1)\nprint(2)"
+    assert b"".join(rewriter.rewrite_chunks([])) == b""
+    assert (rewriter.references, rewriter.rewritten) == (0, 0)
@@ -1,18 +1,133 @@
 """
 Utility functions for Databricks workspace migration
 """
+import argparse
+import atexit
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+import uuid
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterable, Iterator, List
 from datetime import datetime
 
-# Configure logging
+from cassette import Cassette
+from profiling import profile_phase, profiled, DEFAULT_TOP_N
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Configure logging (replaced by setup_logging() for command line runs)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format=LOG_FORMAT
 )
 
+# Pass as extra= on INFO lines emitted once per migrated object so they can be sampled
+PER_OBJECT = {'per_object': True}
+
+class PerObjectSampler(logging.Filter):
+    """Keep every Nth per-object INFO record; warnings and errors always pass"""
+
+    def __init__(self, sample_every: int = 1):
+        super().__init__()
+        self.sample_every = sample_every
+        self.seen = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, 'per_object', False):
+            return True
+        with self._lock:
+            self.seen += 1
+            if self.sample_every > 0 and (self.seen - 1) % self.sample_every == 0:
+                return True
+            self.suppressed += 1
+            return False
+
+    def take_suppressed(self) -> int:
+        """Return and reset the number of records dropped since the last call"""
+        with self._lock:
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_log_listener = None
+_log_sampler = None
+
+def setup_logging(config: Dict[str, Any] = None):
+    """
+    Route logging through a background thread so worker threads never block on I/O.
+
+    Honors migration_settings.log_level and migration_settings.log_sample_every
+    (1 = log every per-object line, N = log one in N, 0 = summary counts only).
+    """
+    global _log_listener, _log_sampler
+
+    settings = (config or {}).get('migration_settings', {})
+    level = logging.getLevelName(str(settings.get('log_level', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+    sample_every = int(settings.get('log_sample_every', 1))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    if _log_listener is not None:
+        _log_sampler.sample_every = sample_every
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    _log_sampler = PerObjectSampler(sample_every)
+    queue_handler.addFilter(_log_sampler)
+
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+# Default number of concurrent API calls (migration_settings.max_workers)
+DEFAULT_MAX_WORKERS = 8
+
+# Chunk size for streamed downloads and uploads
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Default API request budget per workspace (migration_settings.requests_per_second)
+DEFAULT_REQUESTS_PER_SECOND = 25
+
+# Shared HTTP session so concurrent requests reuse pooled connections
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64))
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64))
+
+# Active record/replay cassette (see use_cassette)
+_cassette = None
+
 def load_config(config_path: str = "config.json") -> Dict[str, Any]:
     """Load configuration from JSON file"""
     with open(config_path, 'r') as f:
@@ -29,21 +144,195 @@ def make_api_request(
     method: str,
     url: str,
     headers: Dict[str, str],
-    data: Dict[str, Any] = None
+    data: Dict[str, Any] = None,
+    timeout: float = None,
+    stream: bool = False
 ) -> requests.Response:
-    """Make API request with error handling"""
+    """Make API request with error handling (GET requests send data as query parameters)"""
     try:
-        if method.upper() == "GET":
-            response = requests.get(url, headers=headers)
+        if _cassette is not None and _cassette.replaying:
+            response = _cassette.play(method, url, data)
+        elif method.upper() == "GET":
+            response = _session.get(url, headers=headers, params=data, timeout=timeout, stream=stream)
         elif method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=data)
+            response = _session.post(url, headers=headers, json=data, timeout=timeout)
         elif method.upper() == "PUT":
-            response = requests.put(url, headers=headers, json=data)
+            response = _session.put(url, headers=headers, json=data, timeout=timeout)
+        elif method.upper() == "PATCH":
+            response = _session.patch(url, headers=headers, json=data, timeout=timeout)
         elif method.upper() == "DELETE":
-            response = requests.delete(url, headers=headers, json=data)
+            response = _session.delete(url, headers=headers, json=data, timeout=timeout)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
-        
+
+        if _cassette is not None and not _cassette.replaying:
+            _cassette.record(method, url, data, response)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException as e:
+        logging.error(f"API request failed: {e}")
+        if hasattr(e.response, 'text'):
+            logging.error(f"Response: {e.response.text}")
+        raise
+
+def list_all(
+    host: str,
+    token: str,
+    endpoint: str,
+    items_key: str,
+    params: Dict[str, Any] = None,
+    token_param: str = "page_token",
+    timeout: float = None
+) -> List[Dict[str, Any]]:
+    """Fetch every page of a list endpoint (next_page_token or has_more/offset pagination)"""
+    url = f"{host}{endpoint}"
+    headers = get_headers(token)
+    params = dict(params or {})
+    items = []
+    while True:
+        response = make_api_request("GET", url, headers, params or None, timeout=timeout)
+        result = response.json()
+        page = result.get(items_key, [])
+        items.extend(page)
+        next_token = result.get('next_page_token')
+        if next_token:
+            params[token_param] = next_token
+        elif result.get('has_more') and page:
+            params['offset'] = params.get('offset', 0) + len(page)
+        else:
+            return items
+
+def run_parallel(func: Callable, items: Iterable, max_workers: int = DEFAULT_MAX_WORKERS) -> list:
+    """Apply func to each item on a thread pool and return the results in input order"""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(profiled(func), items))
+
+def get_max_workers(config: Dict[str, Any]) -> int:
+    """Concurrency limit for API calls (migration_settings.max_workers)"""
+    return config.get('migration_settings', {}).get('max_workers', DEFAULT_MAX_WORKERS)
+
+class RateLimiter:
+    """Token bucket shared by worker threads: acquire() blocks to keep calls under rate per second"""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+def get_rate_limiter(config: Dict[str, Any]) -> RateLimiter:
+    """Rate limiter for the migration_settings.requests_per_second budget (0 = unlimited)"""
+    return RateLimiter(config.get('migration_settings', {}).get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND))
+
+def fetch_details(
+    items: Iterable[Dict[str, Any]],
+    get_details: Callable,
+    required_fields: Iterable[str] = (),
+    max_workers: int = DEFAULT_MAX_WORKERS
+) -> List[Dict[str, Any]]:
+    """Full objects for listed items: list payloads that carry every required field are used as is,
+    the others are fetched with get_details concurrently (failed fetches are dropped)"""
+    items = list(items)
+    required_fields = list(required_fields)
+    complete = [bool(required_fields) and all(field in item for field in required_fields) for item in items]
+    incomplete = [item for item, is_complete in zip(items, complete) if not is_complete]
+    fetched = iter(run_parallel(get_details, incomplete, max_workers))
+    details = [item if is_complete else next(fetched) for item, is_complete in zip(items, complete)]
+    return [detail for detail in details if detail]
+
+def write_json_atomic(path: str, data: Any, indent: int = 2):
+    """Write JSON to a temporary file next to path and rename it into place"""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def stream_to_file(response: requests.Response, path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """Write a (streamed) response body to path chunk by chunk, atomically; returns bytes written"""
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        response.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return size
+
+class MultipartStream:
+    """multipart/form-data body whose file part is passed through chunk by chunk
+
+    With a known file size the body has a length, so requests sends it with Content-Length;
+    otherwise it goes out with chunked transfer encoding."""
+
+    def __init__(self, fields: Dict[str, str], file_field: str, filename: str,
+                 chunks: Iterable[bytes], size: int = None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._head = "".join(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                             for name, value in fields.items())
+        self._head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                       f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n')
+        self._head = self._head.encode()
+        self._tail = f"\r\n--{boundary}--\r\n".encode()
+        self._chunks = chunks
+        self._size = size
+
+    def __iter__(self):
+        yield self._head
+        for chunk in self._chunks:
+            if chunk:
+                yield chunk
+        yield self._tail
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+def stream_upload(
+    url: str,
+    token: str,
+    fields: Dict[str, str],
+    file_field: str,
+    filename: str,
+    chunks: Iterable[bytes],
+    size: int = None,
+    timeout: float = None
+) -> requests.Response:
+    """POST a multipart upload without buffering the file: chunks (e.g. a streamed download's
+    iter_content) are forwarded as they arrive"""
+    stream = MultipartStream(fields, file_field, filename, chunks, size)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": stream.content_type}
+    # An unsized body must not expose __len__, or requests would ask it for a length
+    body = stream if size is not None else iter(stream)
+    try:
+        if _cassette is not None and _cassette.replaying:
+            response = _cassette.play("POST", url, fields)
+        else:
+            response = _session.post(url, headers=headers, data=body, timeout=timeout)
         response.raise_for_status()
         return response
     except requests.exceptions.RequestException as e:
@@ -52,8 +341,242 @@ def make_api_request(
             logging.error(f"Response: {e.response.text}")
         raise
 
+def streamed_size(response: requests.Response):
+    """Body size of a streamed response, or None when unknown (a compressed body is decoded
+    while streaming, so its Content-Length is not the size that will be read)"""
+    if response.headers.get('Content-Encoding'):
+        return None
+    length = response.headers.get('Content-Length')
+    return int(length) if length else None
+
+def transfer_workspace_object(
+    source: Dict[str, str],
+    target: Dict[str, str],
+    path: str,
+    export_format: str,
+    import_fields: Dict[str, str],
+    response: requests.Response = None,
+    target_path: str = None,
+    transform: Callable[[Iterable[bytes]], Iterable[bytes]] = None,
+    head: bytes = b''
+) -> int:
+    """Stream a workspace object from a direct-download export into a multipart import, one chunk
+    at a time; response is an already opened export (head holds bytes already read from it),
+    transform rewrites the chunks on the way (e.g. PathRewriter.rewrite_chunks). Returns the bytes
+    read from the source"""
+    if response is None:
+        response = make_api_request("GET", f"{source['host']}/api/2.0/workspace/export",
+                                    get_headers(source['token']),
+                                    {"path": path, "format": export_format, "direct_download": "true"},
+                                    stream=True)
+    transferred = 0
+
+    def chunks():
+        nonlocal transferred
+        if head:
+            transferred += len(head)
+            yield head
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            transferred += len(chunk)
+            yield chunk
+
+    target_path = target_path or path
+    try:
+        stream_upload(f"{target['host']}/api/2.0/workspace/import", target['token'],
+                      dict(import_fields, path=target_path, overwrite="false"), "content",
+                      os.path.basename(target_path), transform(chunks()) if transform else chunks(),
+                      size=None if transform else streamed_size(response))
+    finally:
+        response.close()
+    return transferred
+
+# Source -> target ID mappings recorded by migrations, keyed by object type
+ID_MAPPINGS_FILE = "id_mappings.json"
+_id_mappings_lock = threading.Lock()
+
+def load_id_mappings(object_type: str) -> Dict[str, str]:
+    """Source -> target IDs recorded by earlier migrations for an object type"""
+    try:
+        with open(ID_MAPPINGS_FILE) as f:
+            return json.load(f).get(object_type, {})
+    except FileNotFoundError:
+        return {}
+
+def record_id_mappings(object_type: str, mapping: Dict[str, str]):
+    """Merge source -> target IDs into the shared mapping file (skipped while replaying a cassette, where
+    writes return no IDs)"""
+    if not mapping:
+        return
+    if _cassette is not None and _cassette.replaying:
+        logging.debug(f"Cassette replay: not recording {len(mapping)} {object_type} ID mappings")
+        return
+    with _id_mappings_lock:
+        try:
+            with open(ID_MAPPINGS_FILE) as f:
+                mappings = json.load(f)
+        except FileNotFoundError:
+            mappings = {}
+        mappings.setdefault(object_type, {}).update(mapping)
+        write_json_atomic(ID_MAPPINGS_FILE, mappings)
+
+def get_id_mapping(config: Dict[str, Any], object_type: str, matched: Dict[str, str] = None) -> Dict[str, str]:
+    """Source -> target IDs for an object type: name matches, overridden by recorded migration
+    results, overridden by mappings.<object_type>_id_mapping in config"""
+    mapping = dict(matched or {})
+    mapping.update(load_id_mappings(object_type))
+    mapping.update(config.get('mappings', {}).get(f"{object_type}_id_mapping", {}))
+    return mapping
+
+def match_ids_by_name(
+    source: Dict[str, str],
+    target: Dict[str, str],
+    endpoint: str,
+    items_key: str,
+    name_field: str,
+    id_field: str
+) -> Dict[str, str]:
+    """Map source IDs to target IDs of objects with the same name (both workspaces listed concurrently)"""
+    def ids_by_name(workspace: Dict[str, str]) -> Dict[str, str]:
+        items = list_all(workspace['host'], workspace['token'], endpoint, items_key)
+        return {item[name_field]: item[id_field] for item in items if name_field in item and id_field in item}
+
+    source_ids, target_ids = run_parallel(ids_by_name, [source, target], 2)
+    return {source_id: target_ids[name] for name, source_id in source_ids.items() if name in target_ids}
+
+def translate_principal(principal: str, mappings: Dict[str, Any]) -> str:
+    """Target name of a user, group or service principal: mappings.principal_mapping first,
+    then mappings.user_email_domain_mapping for email-style user names"""
+    explicit = mappings.get('principal_mapping', {})
+    if principal in explicit:
+        return explicit[principal]
+    local, at, domain = principal.rpartition('@')
+    if at:
+        return f"{local}@{mappings.get('user_email_domain_mapping', {}).get(domain, domain)}"
+    return principal
+
+# Where a workspace path can start inside notebook source: at the start, after whitespace, a quote
+# or an opening parenthesis, optionally behind /Workspace - never inside a URL or storage path
+PATH_START = r"""(?:^|(?<=[\s'"`(])|(?<=[\s'"`(]/Workspace)|(?<=^/Workspace))"""
+
+# Characters that can follow a workspace path inside notebook source (quotes, brackets, separators)
+PATH_END = r"""(?=[/\s'"`)\],;]|$)"""
+
+class PathRewriter:
+    """Moves workspace paths by mappings.workspace_path_mapping (path prefixes) and by the user
+    mappings for /Users/<name> home folders (principal_mapping, user_email_domain_mapping).
+
+    One pattern is compiled for all mappings and applied to paths, whole notebook sources or
+    streamed chunks; in sources it only runs where a candidate substring was found. Matches must
+    start and end on a path boundary, so cloud storage URLs containing /Users/ or a mapped prefix
+    are left alone."""
+
+    def __init__(self, mappings: Dict[str, Any]):
+        self.mappings = mappings
+        self.path_mapping = {source.rstrip('/'): target.rstrip('/')
+                             for source, target in mappings.get('workspace_path_mapping', {}).items()
+                             if source.rstrip('/') != target.rstrip('/')}
+        domains = [domain for domain, target in mappings.get('user_email_domain_mapping', {}).items()
+                   if domain != target]
+        users = [re.escape(name) for name in sorted(mappings.get('principal_mapping', {}), key=len, reverse=True)]
+        if domains:
+            users.append(r"""[^/\s'"`@]+@(?:""" + "|".join(re.escape(domain) for domain in domains) + ")")
+
+        alternatives = []
+        if self.path_mapping:
+            prefixes = sorted(self.path_mapping, key=len, reverse=True)
+            alternatives.append("(?P<prefix>" + "|".join(re.escape(prefix) for prefix in prefixes) + ")")
+        if users:
+            alternatives.append("/Users/(?P<user>" + "|".join(users) + ")")
+        self.active = bool(alternatives)
+        pattern = PATH_START + "(?:" + "|".join(alternatives) + ")" + PATH_END
+        self._text_pattern = re.compile(pattern)
+        self._bytes_pattern = re.compile(pattern.encode())
+        self._markers = [b"/Users/"] * bool(users) + [prefix.encode() for prefix in self.path_mapping]
+        self.references = 0
+        self.rewritten = 0
+        self._lock = threading.Lock()
+
+    def _target(self, prefix: str, user: str) -> str:
+        if prefix is not None:
+            return self.path_mapping[prefix]
+        return f"/Users/{translate_principal(user, self.mappings)}"
+
+    def _text_replacement(self, match) -> str:
+        groups = match.groupdict()
+        return self._target(groups.get('prefix'), groups.get('user'))
+
+    def _bytes_replacement(self, match) -> bytes:
+        groups = {name: value.decode() for name, value in match.groupdict().items() if value is not None}
+        return self._target(groups.get('prefix'), groups.get('user')).encode()
+
+    def _rewrite_bytes(self, data: bytes) -> tuple:
+        # Every match starts with a marker: find those with bytes.find and anchor the pattern
+        # there, instead of letting the regex engine try each position of the source
+        starts = []
+        for marker in self._markers:
+            position = data.find(marker)
+            while position >= 0:
+                starts.append(position)
+                position = data.find(marker, position + 1)
+        pieces = []
+        end = 0
+        for start in sorted(starts):
+            match = self._bytes_pattern.match(data, start) if start >= end else None
+            if match:
+                pieces += [data[end:start], self._bytes_replacement(match)]
+                end = match.end()
+        if not pieces:
+            return data, 0
+        pieces.append(data[end:])
+        return b"".join(pieces), len(pieces) // 2
+
+    def _record(self, count: int):
+        if count:
+            with self._lock:
+                self.references += count
+                self.rewritten += 1
+
+    def rewrite_path(self, path: str) -> str:
+        """Target path of a workspace object"""
+        if not self.active:
+            return path
+        return self._text_pattern.sub(self._text_replacement, path)
+
+    def rewrite(self, content: bytes) -> bytes:
+        """Rewrite every path reference in a notebook source"""
+        if not self.active:
+            return content
+        content, count = self._rewrite_bytes(content)
+        self._record(count)
+        return content
+
+    def rewrite_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Rewrite a streamed source line-wise, holding back only the unfinished last line"""
+        count = 0
+        pending = []
+        for chunk in chunks:
+            end = chunk.rfind(b"\n") + 1
+            if not end:
+                pending.append(chunk)
+                continue
+            pending.append(chunk[:end])
+            data, changed = self._rewrite_bytes(b"".join(pending))
+            count += changed
+            pending = [chunk[end:]]
+            yield data
+        data, changed = self._rewrite_bytes(b"".join(pending))
+        self._record(count + changed)
+        yield data
+
+def get_path_rewriter(config: Dict[str, Any]) -> PathRewriter:
+    """Path rewriter for the mappings section of a configuration"""
+    return PathRewriter(config.get('mappings', {}))
+
 def save_backup(data: Any, object_type: str):
-    """Save backup of objects before migration"""
+    """Save backup of objects before migration (into the backup store when one is configured)"""
+    from backup_store import save_to_store  # backup_store builds on this module
+    if save_to_store(data, object_type):
+        return
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"backup_{object_type}_{timestamp}.json"
     with open(filename, 'w') as f:
@@ -65,3 +588,60 @@ def log_migration_result(object_type: str, success: int, failed: int):
     logging.info(f"Migration completed for {object_type}")
     logging.info(f"  Success: {success}")
     logging.info(f"  Failed: {failed}")
+    if _log_sampler is not None:
+        suppressed = _log_sampler.take_suppressed()
+        if suppressed:
+            logging.info(f"  ({suppressed} per-object log lines suppressed by log_sample_every)")
+
+@contextmanager
+def use_cassette(record: str = None, replay: str = None):
+    """Record API read traffic to, or replay it from, a cassette file for the block"""
+    global _cassette
+    if not record and not replay:
+        yield None
+        return
+    cassette = Cassette(replay or record, "replay" if replay else "record")
+    _cassette = cassette
+    try:
+        yield cassette
+    finally:
+        _cassette = None
+        if not cassette.replaying:
+            cassette.save()
+
+def add_common_arguments(parser: argparse.ArgumentParser):
+    """Add the command line options shared by all entry points"""
+    parser.add_argument('--profile', action='store_true',
+                        help='Capture cProfile and tracemalloc reports for the run')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP_N,
+                        help='Number of entries in the profile summaries')
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument('--record-cassette', metavar='PATH',
+                          help='Record API read responses to a cassette file')
+    cassette.add_argument('--replay-cassette', metavar='PATH',
+                          help='Replay API reads from a cassette file; writes are not sent')
+
+def parse_args(description: str = None, actions: Dict[str, tuple] = None) -> argparse.Namespace:
+    """Parse the command line options shared by all migration scripts"""
+    parser = argparse.ArgumentParser(description=description,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    for flag, (_, help_text) in (actions or {}).items():
+        parser.add_argument(f"--{flag}", action='store_true', help=help_text)
+    return parser.parse_args()
+
+def run_script(migration_func: Callable, phase: str, description: str = None, actions: Dict[str, tuple] = None):
+    """Command line entry point for an individual migration script
+
+    actions maps an extra --flag to (function, help text); the flag runs that function instead."""
+    args = parse_args(description, actions)
+    for flag, (action_func, _) in (actions or {}).items():
+        if getattr(args, flag.replace('-', '_')):
+            migration_func, phase = action_func, f"{phase}_{flag.replace('-', '_')}"
+    try:
+        setup_logging(load_config())
+    except (FileNotFoundError, json.JSONDecodeError):
+        setup_logging()
+    with use_cassette(args.record_cassette, args.replay_cassette):
+        with profile_phase(phase, enabled=args.profile, top_n=args.profile_top):
+            return migration_func()
@@ -2,18 +2,39 @@
 """
 Pre-migration validation script to check prerequisites before running migration
 """
+import argparse
 import json
 import logging
+import math
 import sys
-from utils import load_config, get_headers, make_api_request
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from utils import (load_config, get_headers, make_api_request, setup_logging, list_all, run_parallel,
+                   add_common_arguments, use_cassette, DEFAULT_REQUESTS_PER_SECOND)
+from inventory import load_snapshot
+from profiling import profile_phase, profiled
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROBE_TIMEOUT = 30
+DEFAULT_LATENCY_SAMPLES = 5
+
+CONNECTION_PROBE = "/api/2.0/clusters/list"
+
+# Permission probes: check name -> (endpoint, query parameters)
+PERMISSION_PROBES = {
+    "Workspace": ("/api/2.0/workspace/list", {"path": "/"}),
+    "Clusters": ("/api/2.0/clusters/list", None),
+    "Jobs": ("/api/2.1/jobs/list", {"limit": 1}),
+    "Groups": ("/api/2.0/groups/list", None),
+    "Secret Scopes": ("/api/2.0/secrets/scopes/list", None),
+}
+
 def validate_config_exists():
     """Check if config.json exists and is valid"""
     try:
         config = load_config()
+        setup_logging(config)
         logger.info("✓ Configuration file loaded successfully")
         return True, config
     except FileNotFoundError:
@@ -23,43 +44,64 @@ def validate_config_exists():
         logger.error("✗ config.json is not valid JSON")
         return False, None
 
-def validate_workspace_connection(host: str, token: str, workspace_name: str):
-    """Validate connection to workspace"""
-    url = f"{host}/api/2.0/clusters/list"
-    headers = get_headers(token)
-    
+def within_deadline(func, timeout: float):
+    """Return func() run on its own thread, raising TimeoutError once timeout seconds have passed
+    (retries, backoff and pagination included)"""
+    executor = ThreadPoolExecutor(max_workers=1)
     try:
-        response = make_api_request("GET", url, headers)
-        logger.info(f"✓ Successfully connected to {workspace_name} workspace")
-        return True
+        return executor.submit(profiled(func)).result(timeout=timeout)
+    except FutureTimeout:
+        raise TimeoutError(f"no result within {timeout:g}s")
+    finally:
+        executor.shutdown(wait=False)
+
+def probe_endpoint(host: str, token: str, endpoint: str, params: dict = None,
+                   timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Call an endpoint once within a timeout-second deadline and return (success, seconds, error)"""
+    start = time.perf_counter()
+    try:
+        within_deadline(lambda: make_api_request("GET", f"{host}{endpoint}", get_headers(token), params,
+                                                 timeout=timeout), timeout)
+        return True, time.perf_counter() - start, None
     except Exception as e:
-        logger.error(f"✗ Failed to connect to {workspace_name} workspace: {e}")
-        return False
+        return False, time.perf_counter() - start, e
 
-def check_workspace_permissions(host: str, token: str, workspace_name: str):
-    """Check if user has necessary permissions"""
-    checks = {
-        "Workspace": f"{host}/api/2.0/workspace/list",
-        "Clusters": f"{host}/api/2.0/clusters/list",
-        "Jobs": f"{host}/api/2.1/jobs/list",
-        "Groups": f"{host}/api/2.0/groups/list",
-        "Secret Scopes": f"{host}/api/2.0/secrets/scopes/list",
-    }
-    
-    headers = get_headers(token)
-    all_passed = True
-    
+def probe_permissions(host: str, token: str, timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Run all permission probes concurrently and return {check name: (success, seconds, error)}"""
+    names = list(PERMISSION_PROBES)
+    results = run_parallel(lambda name: probe_endpoint(host, token, *PERMISSION_PROBES[name], timeout=timeout),
+                           names, len(names))
+    return dict(zip(names, results))
+
+def _log_connection(result, workspace_name: str) -> bool:
+    success, seconds, error = result
+    if success:
+        logger.info(f"✓ Successfully connected to {workspace_name} workspace ({seconds * 1000:.0f} ms)")
+    else:
+        logger.error(f"✗ Failed to connect to {workspace_name} workspace: {error}")
+    return success
+
+def _log_permissions(results: dict, workspace_name: str) -> bool:
     logger.info(f"\nChecking permissions in {workspace_name} workspace:")
-    for check_name, url in checks.items():
-        try:
-            response = make_api_request("GET", url, headers)
+    all_passed = True
+    for check_name, (success, seconds, error) in results.items():
+        if success:
             logger.info(f"  ✓ {check_name} access")
-        except Exception as e:
-            logger.error(f"  ✗ {check_name} access - {e}")
+        else:
+            logger.error(f"  ✗ {check_name} access - {error}")
             all_passed = False
-    
     return all_passed
 
+def validate_workspace_connection(host: str, token: str, workspace_name: str,
+                                  timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Validate connection to workspace"""
+    return _log_connection(probe_endpoint(host, token, CONNECTION_PROBE, timeout=timeout), workspace_name)
+
+def check_workspace_permissions(host: str, token: str, workspace_name: str,
+                                timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Check if user has necessary permissions"""
+    return _log_permissions(probe_permissions(host, token, timeout), workspace_name)
+
 def check_python_packages():
     """Check if required Python packages are installed"""
     required_packages = [
@@ -80,82 +122,85 @@ def check_python_packages():
     
     return all_installed
 
-def get_workspace_stats(host: str, token: str, workspace_name: str):
-    """Get statistics about objects in workspace"""
+# (stats key, label, inventory type, endpoint, response key, extra params, filter)
+STAT_SOURCES = [
+    ('groups', 'Groups', 'groups', '/api/2.0/groups/list', 'group_names', None, None),
+    ('clusters', 'All-Purpose Clusters', 'clusters', '/api/2.0/clusters/list', 'clusters', None,
+     lambda c: c.get('cluster_source') != 'JOB'),
+    ('jobs', 'Jobs', 'jobs', '/api/2.1/jobs/list', 'jobs', {"limit": 100}, None),
+    ('secret_scopes', 'Secret Scopes', 'secret_scopes', '/api/2.0/secrets/scopes/list', 'scopes', None, None),
+    ('sql_warehouses', 'SQL Warehouses', 'sql_warehouses', '/api/2.0/sql/warehouses', 'warehouses', None, None),
+    ('git_repos', 'Git Repos', 'repos', '/api/2.0/repos', 'repos', None, None),
+]
+
+def count_objects(host: str, token: str, timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Count objects of each type concurrently (fully paginated, each type within a timeout-second
+    deadline); None if unavailable"""
+    def count(source):
+        key, label, inventory_type, endpoint, response_key, params, keep = source
+        try:
+            objects = load_snapshot(host, inventory_type)
+            if objects is None:
+                token_param = "next_page_token" if inventory_type == "repos" else "page_token"
+                objects = within_deadline(lambda: list_all(host, token, endpoint, response_key, params,
+                                                           token_param, timeout), timeout)
+            if keep:
+                objects = [obj for obj in objects if keep(obj)]
+            return len(objects)
+        except Exception:
+            return None
+
+    counts = run_parallel(count, STAT_SOURCES, len(STAT_SOURCES))
+    return {source[0]: n for source, n in zip(STAT_SOURCES, counts)}
+
+def _log_stats(counts: dict, workspace_name: str):
     logger.info(f"\n{workspace_name} Workspace Statistics:")
-    
-    stats = {}
-    
-    # Count groups
-    try:
-        url = f"{host}/api/2.0/groups/list"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        groups = response.json().get('group_names', [])
-        stats['groups'] = len(groups)
-        logger.info(f"  Groups: {len(groups)}")
-    except:
-        logger.warning("  Groups: Unable to retrieve")
-    
-    # Count clusters
-    try:
-        url = f"{host}/api/2.0/clusters/list"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        clusters = response.json().get('clusters', [])
-        all_purpose = [c for c in clusters if c.get('cluster_source') != 'JOB']
-        stats['clusters'] = len(all_purpose)
-        logger.info(f"  All-Purpose Clusters: {len(all_purpose)}")
-    except:
-        logger.warning("  Clusters: Unable to retrieve")
-    
-    # Count jobs
-    try:
-        url = f"{host}/api/2.1/jobs/list"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        jobs = response.json().get('jobs', [])
-        stats['jobs'] = len(jobs)
-        logger.info(f"  Jobs: {len(jobs)}")
-    except:
-        logger.warning("  Jobs: Unable to retrieve")
-    
-    # Count secret scopes
-    try:
-        url = f"{host}/api/2.0/secrets/scopes/list"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        scopes = response.json().get('scopes', [])
-        stats['secret_scopes'] = len(scopes)
-        logger.info(f"  Secret Scopes: {len(scopes)}")
-    except:
-        logger.warning("  Secret Scopes: Unable to retrieve")
-    
-    # Count SQL warehouses
-    try:
-        url = f"{host}/api/2.0/sql/warehouses"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        warehouses = response.json().get('warehouses', [])
-        stats['sql_warehouses'] = len(warehouses)
-        logger.info(f"  SQL Warehouses: {len(warehouses)}")
-    except:
-        logger.warning("  SQL Warehouses: Unable to retrieve")
-    
-    # Count repos
-    try:
-        url = f"{host}/api/2.0/repos"
-        headers = get_headers(token)
-        response = make_api_request("GET", url, headers)
-        repos = response.json().get('repos', [])
-        stats['git_repos'] = len(repos)
-        logger.info(f"  Git Repos: {len(repos)}")
-    except:
-        logger.warning("  Git Repos: Unable to retrieve")
-    
-    return stats
-
-def validate_pre_migration():
+    for key, label, *_ in STAT_SOURCES:
+        if counts.get(key) is None:
+            logger.warning(f"  {label}: Unable to retrieve")
+        else:
+            logger.info(f"  {label}: {counts[key]}")
+    return {key: n for key, n in counts.items() if n is not None}
+
+def get_workspace_stats(host: str, token: str, workspace_name: str,
+                        timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Get statistics about objects in workspace"""
+    return _log_stats(count_objects(host, token, timeout), workspace_name)
+
+def benchmark_latency(host: str, token: str, samples: int = DEFAULT_LATENCY_SAMPLES,
+                      timeout: float = DEFAULT_PROBE_TIMEOUT):
+    """Time repeated calls to each probed endpoint; endpoints run concurrently, samples in sequence"""
+    def sample(name: str):
+        seconds = []
+        for _ in range(samples):
+            success, elapsed, _ = probe_endpoint(host, token, *PERMISSION_PROBES[name], timeout=timeout)
+            if success:
+                seconds.append(elapsed)
+        return sorted(seconds)
+
+    names = list(PERMISSION_PROBES)
+    return dict(zip(names, run_parallel(sample, names, len(names))))
+
+def _log_latency(latencies: dict, workspace_name: str, requests_per_second: float):
+    """Log p50/p95 per endpoint and the concurrency that sustains the request budget"""
+    logger.info(f"\n{workspace_name} API latency:")
+    medians = []
+    for name, seconds in latencies.items():
+        if not seconds:
+            logger.warning(f"  {name}: no successful samples")
+            continue
+        p50 = seconds[len(seconds) // 2]
+        p95 = seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))]
+        medians.append(p50)
+        logger.info(f"  {name:<15} p50 {p50 * 1000:7.0f} ms   p95 {p95 * 1000:7.0f} ms")
+    if medians:
+        # Little's law: in-flight requests = throughput x latency
+        median = sorted(medians)[len(medians) // 2]
+        workers = max(1, math.ceil(requests_per_second * median))
+        logger.info(f"  Suggested max_workers for {requests_per_second:g} req/s: {workers}")
+
+def validate_pre_migration(probe_timeout: float = DEFAULT_PROBE_TIMEOUT,
+                           latency_samples: int = DEFAULT_LATENCY_SAMPLES):
     """Main validation function"""
     logger.info("="*80)
     logger.info("Pre-Migration Validation Check")
@@ -178,60 +223,60 @@ def validate_pre_migration():
         logger.error("Please install required packages: pip install -r requirements.txt")
     all_checks_passed = all_checks_passed and packages_ok
     
-    # Check 3: Source workspace connection
+    # Checks 3-6 and statistics: every probe for both workspaces runs concurrently
+    settings = config.get('migration_settings', {})
+    workspaces = [config['source'], config['target']]
+    probes = []
+    for workspace in workspaces:
+        host, token = workspace['host'], workspace['token']
+        probes += [
+            lambda host=host, token=token: probe_endpoint(host, token, CONNECTION_PROBE, timeout=probe_timeout),
+            lambda host=host, token=token: probe_permissions(host, token, probe_timeout),
+            lambda host=host, token=token: count_objects(host, token, probe_timeout),
+        ]
+    (source_connection, source_permissions, source_counts,
+     target_connection, target_permissions, target_counts) = run_parallel(lambda probe: probe(), probes, len(probes))
+    
+    # The latency benchmark runs once the other probes are done, so it does not time their traffic
+    source_latency, target_latency = {}, {}
+    if latency_samples > 0:
+        source_latency, target_latency = run_parallel(
+            lambda workspace: benchmark_latency(workspace['host'], workspace['token'], latency_samples, probe_timeout),
+            workspaces, len(workspaces))
+    
     logger.info("\n[3/6] Validating source workspace connection...")
-    source_connected = validate_workspace_connection(
-        config['source']['host'],
-        config['source']['token'],
-        "source"
-    )
+    source_connected = _log_connection(source_connection, "source")
     all_checks_passed = all_checks_passed and source_connected
     
-    # Check 4: Target workspace connection
     logger.info("\n[4/6] Validating target workspace connection...")
-    target_connected = validate_workspace_connection(
-        config['target']['host'],
-        config['target']['token'],
-        "target"
-    )
+    target_connected = _log_connection(target_connection, "target")
     all_checks_passed = all_checks_passed and target_connected
     
-    # Check 5: Source permissions
     if source_connected:
         logger.info("\n[5/6] Checking source workspace permissions...")
-        source_perms = check_workspace_permissions(
-            config['source']['host'],
-            config['source']['token'],
-            "source"
-        )
+        source_perms = _log_permissions(source_permissions, "source")
         all_checks_passed = all_checks_passed and source_perms
     
-    # Check 6: Target permissions
     if target_connected:
         logger.info("\n[6/6] Checking target workspace permissions...")
-        target_perms = check_workspace_permissions(
-            config['target']['host'],
-            config['target']['token'],
-            "target"
-        )
+        target_perms = _log_permissions(target_permissions, "target")
         all_checks_passed = all_checks_passed and target_perms
     
-    # Get statistics
+    # Statistics
     if source_connected:
         logger.info("\n" + "="*80)
-        source_stats = get_workspace_stats(
-            config['source']['host'],
-            config['source']['token'],
-            "Source"
-        )
+        source_stats = _log_stats(source_counts, "Source")
     
     if target_connected:
         logger.info("")
-        target_stats = get_workspace_stats(
-            config['target']['host'],
-            config['target']['token'],
-            "Target"
-        )
+        target_stats = _log_stats(target_counts, "Target")
+    
+    # Latency benchmark
+    requests_per_second = settings.get('requests_per_second', DEFAULT_REQUESTS_PER_SECOND)
+    if source_connected and source_latency:
+        _log_latency(source_latency, "Source", requests_per_second)
+    if target_connected and target_latency:
+        _log_latency(target_latency, "Target", requests_per_second)
     
     # Final summary
     logger.info("\n" + "="*80)
@@ -250,5 +295,14 @@ def validate_pre_migration():
         return False
 
 if __name__ == "__main__":
-    success = validate_pre_migration()
+    parser = argparse.ArgumentParser(description='Pre-migration validation')
+    parser.add_argument('--probe-timeout', type=float, default=DEFAULT_PROBE_TIMEOUT,
+                        help='Deadline in seconds for each API probe, retries and pagination included')
+    parser.add_argument('--latency-samples', type=int, default=DEFAULT_LATENCY_SAMPLES,
+                        help='Latency samples per endpoint (0 disables the benchmark)')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+    with use_cassette(args.record_cassette, args.replay_cassette), \
+            profile_phase("validation", enabled=args.profile, top_n=args.profile_top):
+        success = validate_pre_migration(args.probe_timeout, args.latency_samples)
     sys.exit(0 if success else 1)